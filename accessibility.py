@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Accessibility Analysis
+Travel-time isochrones and a national "time to nearest facility" raster.
+
+Both are built on scipy.sparse.csgraph.dijkstra over the travel-time CSR
+matrix of the cached road arrays (see routing.weighted_csr):
+
+- Isochrones run one Dijkstra per source, bounded by the largest
+  threshold so the search stops at the isochrone edge. Sources are split
+  across a ProcessPoolExecutor, and each worker turns the reached nodes
+  into concave hull polygons, one per threshold.
+- The accessibility raster runs a single multi-source Dijkstra (min_only)
+  on the reversed graph, which gives every node its travel time to the
+  nearest source. Every raster cell then takes the time of its nearest
+  node plus the off-road walk to it.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_MINUTES = (15, 30, 60, 120)
+DEFAULT_CELL_SIZE = 0.01
+WALK_SPEED_KPH = 5
+MAX_SNAP_M = 5000
+# Isochrone hulls use at most one node per cell of this size (degrees), and at
+# most HULL_CELLS cells across the isochrone
+HULL_RESOLUTION = 0.005
+HULL_CELLS = 150
+
+# Colour ramp of the raster layer: (minutes, RGB)
+TIME_COLORS = [
+    (0, (26, 152, 80)),
+    (30, (145, 207, 96)),
+    (60, (254, 224, 139)),
+    (120, (252, 141, 89)),
+    (240, (215, 48, 39)),
+]
+ISOCHRONE_COLORS = {15: '#1a9850', 30: '#91cf60', 60: '#fee08b', 120: '#fc8d59'}
+
+_WORKER_STATE = None
+
+
+def isochrone_polygon(x, y, ratio=0.3, resolution=HULL_RESOLUTION):
+    """
+    Concave hull around reached node coordinates
+
+    Nodes are thinned to one per cell first, with cells no smaller than
+    resolution and HULL_CELLS across the isochrone. Dense urban networks
+    have thousands of nodes per cell, which cannot change the hull at map
+    scale but would dominate its cost.
+
+    Args:
+        x, y (ndarray): Longitudes and latitudes of the reached nodes
+        ratio (float): 0 gives the tightest hull, 1 the convex hull
+        resolution (float): Thinning cell size in degrees (0 keeps every node)
+    """
+    import shapely
+
+    if len(x) == 0:
+        return shapely.Polygon()
+    if resolution:
+        resolution = max(resolution, max(np.ptp(x), np.ptp(y)) / HULL_CELLS)
+        cells = np.floor(np.column_stack([x, y]) / resolution).astype(np.int64)
+        _, keep = np.unique(cells, axis=0, return_index=True)
+        x, y = x[keep], y[keep]
+    points = shapely.multipoints(np.column_stack([x, y]))
+    if len(x) < 3:
+        return shapely.buffer(points, 0.001)
+    return shapely.concave_hull(points, ratio=ratio)
+
+
+def _init_worker(matrix, x, y):
+    global _WORKER_STATE
+    _WORKER_STATE = (matrix, x, y)
+
+
+def _source_isochrones(source, minutes, ratio):
+    """
+    (minutes, reached node count, polygon WKB) per threshold for one source node
+    """
+    import shapely
+    from scipy.sparse.csgraph import dijkstra
+
+    matrix, x, y = _WORKER_STATE
+    times = dijkstra(matrix, directed=True, indices=source, limit=max(minutes) * 60)
+    reached = np.flatnonzero(np.isfinite(times))
+    results = []
+    for limit in minutes:
+        nodes = reached[times[reached] <= limit * 60]
+        results.append((limit, len(nodes), shapely.to_wkb(isochrone_polygon(x[nodes], y[nodes], ratio))))
+    return results
+
+
+def isochrones(matrix, road_arrays, sources, minutes=DEFAULT_MINUTES, ratio=0.3, workers=None):
+    """
+    Isochrone polygons around every source node
+
+    Args:
+        matrix (csr_matrix): Directed travel times in seconds (see routing.weighted_csr)
+        road_arrays (RoadGraphArrays): Road network
+        sources (array-like): Source node positions
+        minutes (iterable): Travel time thresholds in minutes
+        ratio (float): Concave hull ratio (see isochrone_polygon)
+        workers (int): Worker processes (default: CPU count, 1 runs in-process)
+
+    Returns:
+        list: (source index, minutes, reached nodes, polygon WKB) tuples
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    minutes = sorted(minutes)
+    x = np.asarray(road_arrays.node_x, dtype=np.float64)
+    y = np.asarray(road_arrays.node_y, dtype=np.float64)
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+    if workers <= 1:
+        _init_worker(matrix, x, y)
+        per_source = [_source_isochrones(int(s), minutes, ratio) for s in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(matrix, x, y)) as pool:
+            per_source = list(pool.map(
+                _source_isochrones, sources.tolist(), [minutes] * len(sources), [ratio] * len(sources),
+                chunksize=max(1, math.ceil(len(sources) / (4 * workers)))
+            ))
+    return [
+        (i, limit, count, wkb)
+        for i, results in enumerate(per_source)
+        for limit, count, wkb in results
+    ]
+
+
+def time_to_nearest(matrix, sources):
+    """
+    Travel time in seconds from every node to its nearest source (inf if unreachable)
+    """
+    from scipy.sparse.csgraph import dijkstra
+
+    # Reversing the edges turns "from the sources" into "to the sources"
+    return dijkstra(matrix.T.tocsr(), directed=True, indices=np.asarray(sources, dtype=np.int64),
+                    min_only=True)
+
+
+def accessibility_raster(node_seconds, index, bounds, cell_size=DEFAULT_CELL_SIZE,
+                         walk_speed_kph=WALK_SPEED_KPH, max_snap_m=MAX_SNAP_M, chunk_rows=256):
+    """
+    Grid of travel minutes to the nearest source, including the walk to the road
+
+    Args:
+        node_seconds (ndarray): Travel time of every node (see time_to_nearest)
+        index (SpatialIndex): Node index used to snap the cell centres
+        bounds (tuple): (west, south, east, north) in degrees
+        cell_size (float): Cell size in degrees
+        walk_speed_kph (float): Off-road speed from a cell centre to its nearest node
+        max_snap_m (float): Cells further than this from any road are left empty
+
+    Returns:
+        dict: minutes (float32 rows x cols, north up, NaN where unknown),
+        bounds and cell_size
+    """
+    west, south, east, north = bounds
+    cols = max(1, math.ceil((east - west) / cell_size))
+    rows = max(1, math.ceil((north - south) / cell_size))
+    lons = west + (np.arange(cols) + 0.5) * cell_size
+    minutes = np.full((rows, cols), np.nan, dtype=np.float32)
+    walk_mps = walk_speed_kph / 3.6
+
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        lats = north - (np.arange(start, stop) + 0.5) * cell_size
+        grid_lon, grid_lat = np.meshgrid(lons, lats)
+        positions, distances = index.nearest_nodes(grid_lon.ravel(), grid_lat.ravel(),
+                                                   max_distance=max_snap_m)
+        snapped = positions >= 0
+        seconds = np.full(len(positions), np.inf)
+        seconds[snapped] = node_seconds[positions[snapped]] + distances[snapped] / walk_mps
+        block = (seconds / 60).reshape(stop - start, cols)
+        minutes[start:stop] = np.where(np.isfinite(block), block, np.nan)
+
+    return {
+        'minutes': minutes,
+        'bounds': (west, north - rows * cell_size, west + cols * cell_size, north),
+        'cell_size': cell_size,
+    }
+
+
+def save_raster(raster, path):
+    """
+    Write an accessibility raster as GeoTIFF (.tif, needs rasterio) or NumPy .npz
+    """
+    west, south, east, north = raster['bounds']
+    if path.lower().endswith(('.tif', '.tiff')):
+        import rasterio
+        from rasterio.transform import from_origin
+
+        minutes = raster['minutes']
+        with rasterio.open(
+            path, 'w', driver='GTiff', height=minutes.shape[0], width=minutes.shape[1], count=1,
+            dtype='float32', crs='EPSG:4326', nodata=np.nan, compress='deflate',
+            transform=from_origin(west, north, raster['cell_size'], raster['cell_size'])
+        ) as dst:
+            dst.write(minutes, 1)
+            dst.update_tags(units='minutes')
+    else:
+        np.savez_compressed(path, minutes=raster['minutes'], bounds=np.asarray(raster['bounds']),
+                            cell_size=raster['cell_size'])
+
+
+def raster_rgba(minutes, opacity=180):
+    """
+    RGBA image of a minutes grid using TIME_COLORS; empty cells are transparent
+    """
+    stops = np.array([m for m, _ in TIME_COLORS], dtype=np.float64)
+    colors = np.array([c for _, c in TIME_COLORS], dtype=np.float64)
+    values = np.nan_to_num(minutes, nan=0.0)
+    image = np.zeros(minutes.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        image[..., channel] = np.interp(values, stops, colors[:, channel]).astype(np.uint8)
+    image[..., 3] = np.where(np.isnan(minutes), 0, opacity)
+    return image
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Concurrent Data Acquisition
+Fetches the road network, district boundaries and place geocodes at the same time.
+
+The three downloads are independent and spend most of their time waiting
+on Overpass and Nominatim, so an asyncio event loop runs them concurrently.
+Blocking calls (osmnx, local PBF ingestion) run on a bounded thread pool.
+Geocodes go straight to the Nominatim search API, so they do not need the
+geospatial stack.
+
+Every call is subject to per-service limits that follow the public usage
+policies: Nominatim allows at most one request per second and no parallel
+requests; Overpass gets two concurrent slots. Failed calls are retried with
+exponential backoff and jitter, and an HTTP Retry-After header is honoured.
+Endpoints are configurable, so the client can be pointed at a local
+stand-in server or a self-hosted instance.
+"""
+
+import asyncio
+import json
+import random
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = "bangladesh-road-connectivity-analysis/1.0"
+
+# service -> (max concurrent calls, minimum seconds between call starts)
+SERVICE_LIMITS = {
+    'nominatim': (1, 1.0),
+    'overpass': (2, 1.0),
+    'local': (None, 0.0),
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RetryableError(Exception):
+    """
+    A failed call that may succeed if repeated
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_transient(error):
+    """
+    Whether an exception is a connection or timeout error, which may not recur
+    """
+    if isinstance(error, urllib.error.HTTPError):
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError, urllib.error.URLError)):
+        return True
+    # osmnx downloads with requests, whose errors do not derive from the builtin ones
+    requests = sys.modules.get('requests')
+    return requests is not None and isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+class RateLimiter:
+    """
+    Spaces out call starts by a minimum interval
+    """
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait(self):
+        if self.min_interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            delay = self._next_start - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = loop.time() + self.min_interval
+
+
+class AsyncAcquirer:
+    def __init__(self, max_workers=4, retries=3, backoff=2.0, max_backoff=60.0, timeout=180,
+                 nominatim_url=NOMINATIM_URL, user_agent=USER_AGENT, service_limits=None):
+        """
+        Args:
+            max_workers (int): Threads available to blocking calls (the connection pool)
+            retries (int): Retries after the first failed attempt
+            backoff (float): Base delay in seconds, doubled on every retry
+            max_backoff (float): Upper bound of a single retry delay
+            timeout (float): Timeout of a single HTTP request in seconds
+            nominatim_url (str): Nominatim search endpoint
+            user_agent (str): User-Agent sent with every request, as the policies require
+            service_limits (dict): Overrides of SERVICE_LIMITS
+        """
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.nominatim_url = nominatim_url
+        self.user_agent = user_agent
+        self.service_limits = dict(SERVICE_LIMITS, **(service_limits or {}))
+        self._executor = None
+        self._semaphores = {}
+        self._limiters = {}
+
+    def _limits(self, service):
+        if service not in self._limiters:
+            concurrency, interval = self.service_limits[service]
+            self._semaphores[service] = asyncio.Semaphore(concurrency) if concurrency else None
+            self._limiters[service] = RateLimiter(interval)
+        return self._semaphores[service], self._limiters[service]
+
+    def _retry_delay(self, attempt, error):
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return min(self.backoff * 2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+
+    async def call(self, service, func, *args, retry=True, **kwargs):
+        """
+        Run a blocking function on the pool under a service's limits, with retries
+
+        Args:
+            service (str): Key of service_limits the call counts against
+            func (callable): Blocking function to run
+            retry (bool): Retry RetryableError and connection or timeout errors
+                (otherwise only RetryableError)
+        """
+        semaphore, limiter = self._limits(service)
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            try:
+                if semaphore is not None:
+                    async with semaphore:
+                        await limiter.wait()
+                        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+                await limiter.wait()
+                return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+            except Exception as e:
+                if attempt >= self.retries or not (isinstance(e, RetryableError) or retry and is_transient(e)):
+                    raise
+                delay = self._retry_delay(attempt, e)
+                name = getattr(func, '__name__', 'call')
+                print(f"{service} {name} failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _get_json(self, url, params):
+        request = urllib.request.Request(
+            f"{url}?{urllib.parse.urlencode(params)}", headers={'User-Agent': self.user_agent}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            if e.code in RETRY_STATUS:
+                retry_after = e.headers.get('Retry-After')
+                raise RetryableError(
+                    f"HTTP {e.code}",
+                    float(retry_after) if retry_after and retry_after.isdigit() else None
+                ) from e
+            raise
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise RetryableError(str(e)) from e
+
+    async def fetch_json(self, service, url, params):
+        """
+        GET a JSON document, retrying rate limiting, server and connection errors
+        """
+        return await self.call(service, self._get_json, url, params, retry=False)
+
+    async def geocode(self, place, country_code='bd'):
+        """
+        (lat, lon) of a place from Nominatim
+        """
+        results = await self.fetch_json('nominatim', self.nominatim_url, {
+            'q': place, 'format': 'json', 'limit': 1, 'countrycodes': country_code,
+        })
+        if not results:
+            raise LookupError(f"No Nominatim result for {place}")
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+    async def geocode_many(self, places):
+        """
+        Geocode many places; the Nominatim limits serialise the requests
+
+        Returns:
+            dict: place -> (lat, lon) for every place that was found
+        """
+        results = await asyncio.gather(*(self.geocode(place) for place in places),
+                                       return_exceptions=True)
+        found = {}
+        for place, result in zip(places, results):
+            if isinstance(result, Exception):
+                print(f"Could not geocode {place}: {result}")
+            else:
+                found[place] = result
+        return found
+
+    async def gather(self, tasks):
+        """
+        Await named coroutines concurrently
+
+        Returns:
+            dict: name -> result, or the exception the task raised
+        """
+        names = list(tasks)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            try:
+                results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+            finally:
+                self._executor = None
+        return dict(zip(names, results))
+
+    def run(self, make_tasks):
+        """
+        Run acquisition tasks to completion from synchronous code
+
+        Args:
+            make_tasks (callable): make_tasks(acquirer) -> dict of name -> coroutine,
+                called inside the event loop
+
+        Returns:
+            dict: name -> result, or the exception the task raised
+        """
+        async def main():
+            self._semaphores, self._limiters = {}, {}
+            return await self.gather(make_tasks(self))
+        return asyncio.run(main())
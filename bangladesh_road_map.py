@@ -13,92 +13,532 @@ Author: AI Assistant
 Date: 2024
 """
 
-import osmnx as ox
-import folium
-import geopandas as gpd
-import pandas as pd
-import networkx as nx
 import numpy as np
-from folium import plugins
 import warnings
 import pickle
+import json
 import os
+import re
+import shutil
 from datetime import datetime
+from road_graph_store import RoadGraphArrays, directory_size
+from centrality import betweenness_centrality
+from connectivity import (
+    component_state, component_summary, degree_state, undirected_pairs,
+    update_component_state, update_degree_state
+)
+from result_cache import ResultCache
+from gazetteer import Gazetteer
+from profiling import Profiler
+from map_stream import highway_classes_present, write_streaming_map
+from lazy_imports import LazyModule
+from network_filters import FILTER_TAGS
 warnings.filterwarnings('ignore')
 
-# Configure OSMnx settings
-ox.settings.use_cache = True
-ox.settings.log_console = True
+
+def configure_osmnx(osmnx):
+    """
+    Configure OSMnx settings (applied when osmnx is first imported)
+    """
+    osmnx.settings.use_cache = True
+    osmnx.settings.log_console = True
+    # Keep the tags the network type filters need, so drive/walk/bike can be derived from 'all'
+    osmnx.settings.useful_tags_way = sorted(set(osmnx.settings.useful_tags_way) | set(FILTER_TAGS))
+
+
+# The geospatial stack is imported on first use, so cache commands start instantly
+ox = LazyModule('osmnx', on_import=configure_osmnx)
+folium = LazyModule('folium')
+plugins = LazyModule('folium.plugins')
+gpd = LazyModule('geopandas')
+pd = LazyModule('pandas')
+
+def network_source(pbf_path=None):
+    """
+    Cache key of a data source: 'overpass', or 'pbf-' and the name of a PBF extract
+    """
+    if pbf_path is None:
+        return 'overpass'
+    name = os.path.basename(pbf_path)
+    for suffix in ('.osm.pbf', '.pbf'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return 'pbf-' + re.sub(r'[^A-Za-z0-9._-]+', '_', name)
+
+
+def download_network_base(place):
+    """
+    Download the 'all' road network of a place, recording the network types of every edge
+    
+    Edges are not merged across changes of the tags the network type filters
+    look at, so each edge belongs to a well-defined set of network types.
+    
+    Returns:
+        RoadGraphArrays: The 'all' graph; network_view() derives the other types
+    """
+    from network_filters import add_network_bits
+    
+    G = ox.graph_from_place(place, network_type='all', simplify=False)
+    G = ox.simplify_graph(G, edge_attrs_differ=['highway', 'oneway'] + FILTER_TAGS)
+    add_network_bits(G)
+    return RoadGraphArrays.from_networkx(G)
+
+
+# Road styles by highway type
+ROAD_STYLES = {
+    'motorway': {'color': '#FF0000', 'weight': 4, 'opacity': 0.8},
+    'trunk': {'color': '#FF4500', 'weight': 3, 'opacity': 0.8},
+    'primary': {'color': '#FFA500', 'weight': 2.5, 'opacity': 0.7},
+    'secondary': {'color': '#FFFF00', 'weight': 2, 'opacity': 0.6},
+    'tertiary': {'color': '#90EE90', 'weight': 1.5, 'opacity': 0.5},
+    'residential': {'color': '#87CEEB', 'weight': 1, 'opacity': 0.4},
+    'default': {'color': '#808080', 'weight': 1, 'opacity': 0.3}
+}
+
+def get_road_style(highway_type):
+    """
+    Get the map style for a highway type
+    """
+    if isinstance(highway_type, list):
+        highway_type = highway_type[0] if highway_type else 'default'
+    
+    return ROAD_STYLES.get(highway_type, ROAD_STYLES['default'])
+
+def get_road_min_zoom(highway_type):
+    """
+    First zoom level at which a highway type is drawn in tiled maps
+    
+    Major roads (the heaviest styles in ROAD_STYLES) are shown from the
+    lowest zoom; minor classes only appear once the map is zoomed in.
+    """
+    weight = get_road_style(highway_type)['weight']
+    if weight >= 2.5:
+        return 0
+    if weight >= 2:
+        return 9
+    if weight >= 1.5:
+        return 11
+    return 13
+
+def normalize_road_edges(edges_gdf):
+    """
+    Reduce an edge table to one row per drawn road segment
+    
+    List-valued highway and name attributes are reduced to their first
+    entry, and the two directions of a two-way street are kept once.
+    
+    Args:
+        edges_gdf (GeoDataFrame): Edges with highway, length, name and geometry columns
+    
+    Returns:
+        GeoDataFrame: highway, name, length and geometry columns
+    """
+    highway = edges_gdf['highway'].map(
+        lambda h: (h[0] if h else 'default') if isinstance(h, list) else h
+    ).fillna('default').astype(str)
+    name = edges_gdf['name'].map(
+        lambda n: n[0] if isinstance(n, list) and n else n
+    ) if 'name' in edges_gdf else pd.Series(None, index=edges_gdf.index)
+    
+    roads = gpd.GeoDataFrame({
+        'highway': highway.values,
+        'name': name.values,
+        'length': edges_gdf['length'].values,
+    }, geometry=edges_gdf.geometry.values, crs=edges_gdf.crs)
+    
+    # Drop the reverse direction of two-way streets
+    if {'u', 'v'}.issubset(edges_gdf.columns):
+        u = edges_gdf['u'].to_numpy()
+        v = edges_gdf['v'].to_numpy()
+        pair = pd.DataFrame({'a': np.minimum(u, v), 'b': np.maximum(u, v), 'h': highway.values})
+        roads = roads[~pair.duplicated().to_numpy()]
+    
+    return roads.reset_index(drop=True)
+
+def build_road_layers(edges_gdf):
+    """
+    Group road edges into one merged FeatureCollection per highway type
+    
+    Popup and tooltip text are built column-wise rather than per edge.
+    
+    Args:
+        edges_gdf (GeoDataFrame): Edges with highway, length, name and geometry columns
+    
+    Returns:
+        dict: highway type -> GeoDataFrame with geometry, popup and tooltip columns
+    """
+    roads = normalize_road_edges(edges_gdf)
+    length = roads['length'].round().astype('Int64').astype(str).replace('<NA>', 'N/A')
+    
+    roads['popup'] = ('<b>Road Information</b><br>Type: ' + roads['highway']
+                      + '<br>Length: ' + length + 'm<br>Name: '
+                      + roads['name'].fillna('Unnamed').astype(str))
+    roads['tooltip'] = roads['highway'].str.title() + ' Road'
+    roads = roads.drop(columns=['name', 'length'])
+    
+    return {hw: group.drop(columns='highway') for hw, group in roads.groupby('highway', sort=True)}
+
+def tile_road_layers(tile):
+    """
+    build_road_layers for one partition tile (runs in a worker process)
+    """
+    return build_road_layers(tile.to_geodataframe())
 
 class BangladeshRoadMap:
     def __init__(self):
         self.country_name = "Bangladesh"
-        self.road_graph = None
+        self._road_graph = None
+        self.road_arrays = None
         self.districts_gdf = None
         self.major_cities = [
             "Dhaka", "Chittagong", "Sylhet", "Rajshahi", 
             "Khulna", "Barisal", "Rangpur", "Mymensingh"
         ]
         self.cache_dir = "data_cache"
-        self.graph_cache_file = os.path.join(self.cache_dir, "bangladesh_road_graph.pkl")
+        self.network_type = 'drive'
+        self.data_source = None
+        self.base_arrays = None
+        self.networks_dir = os.path.join(self.cache_dir, "networks")
+        self.legacy_graph_cache_dir = os.path.join(self.cache_dir, "bangladesh_road_graph")
+        self.legacy_graph_cache_file = os.path.join(self.cache_dir, "bangladesh_road_graph.pkl")
         self.districts_cache_file = os.path.join(self.cache_dir, "bangladesh_districts.pkl")
-        self.stats_cache_file = os.path.join(self.cache_dir, "connectivity_stats.pkl")
+        self.boundaries_dir = os.path.join(self.cache_dir, "boundaries")
+        self.upazilas_gdf = None
+        self.legacy_stats_cache_file = os.path.join(self.cache_dir, "connectivity_stats.pkl")
+        self.results_cache_dir = os.path.join(self.cache_dir, "results")
+        self.routing_index_dir = os.path.join(self.cache_dir, "routing_index")
+        self.routing_indexes = {}
+        self.gazetteer_file = os.path.join(self.cache_dir, "gazetteer.sqlite")
+        self.gazetteer = None
+        self.spatial_index = None
+        self.profiler = Profiler()
+        self.result_cache = ResultCache(self.results_cache_dir)
+        self._graph_fingerprint = None
+        self.node_centrality = None
+        self.component_labels = None
         
         # Create cache directory if it doesn't exist
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
             print(f"Created cache directory: {self.cache_dir}")
+        self._migrate_legacy_cache()
+    
+    def _migrate_legacy_cache(self):
+        """
+        Move a single-network columnar cache into the keyed network store
         
+        Older versions always analysed the Overpass drive network, so that is
+        where the old cache goes.
+        """
+        target = os.path.join(self.networks_dir, 'overpass', 'drive')
+        if RoadGraphArrays.exists(self.legacy_graph_cache_dir) and not os.path.exists(target):
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(self.legacy_graph_cache_dir, target)
+                print(f"Moved cached road network to {target}")
+            except Exception as e:
+                print(f"Error moving cached road network: {e}")
+    
+    @property
+    def network_cache_dir(self):
+        """
+        Cache directory of the current data source
+        """
+        return os.path.join(self.networks_dir, self.data_source or 'overpass')
+    
+    @property
+    def graph_cache_dir(self):
+        """
+        Graph cache directory of the current network: its own arrays, or the
+        'all' graph it is derived from
+        """
+        if self.base_arrays is None and self.road_arrays is not None:
+            return os.path.join(self.network_cache_dir, self.network_type)
+        if self.base_arrays is None:
+            cached = self._cached_network_dir(self.data_source or 'overpass')
+            if cached is not None:
+                return cached
+        return os.path.join(self.network_cache_dir, 'base')
+    
+    @property
+    def ways_cache_dir(self):
+        """
+        Way store of the current data source (PBF extracts only)
+        """
+        return os.path.join(self.network_cache_dir, 'ways')
+    
+    def cached_sources(self):
+        """
+        Data sources with a cached network, most recently written first
+        """
+        if not os.path.isdir(self.networks_dir):
+            return []
+        sources = [name for name in os.listdir(self.networks_dir)
+                   if os.path.isdir(os.path.join(self.networks_dir, name))]
+        return sorted(sources, key=lambda name: os.path.getmtime(os.path.join(self.networks_dir, name)),
+                      reverse=True)
+    
+    def select_network(self, network_type=None, source=None):
+        """
+        Choose the network type and data source that later loads and analyses use
+        
+        Switching the type of a loaded 'all' graph only derives a new view.
+        
+        Args:
+            network_type (str): 'drive', 'walk', 'bike' or 'all' (default: unchanged)
+            source (str): Data source key, 'overpass' or network_source(pbf_path)
+                (default: unchanged; None at start means any cached source)
+        """
+        new_type = network_type is not None and network_type != self.network_type
+        new_source = source is not None and source != self.data_source
+        if network_type is not None:
+            self.network_type = network_type
+        if source is not None:
+            self.data_source = source
+        if not (new_type or new_source):
+            return
+        base = None if new_source else self.base_arrays
+        self._road_graph = None
+        self.road_arrays = None
+        self.base_arrays = None
+        self._graph_fingerprint = None
+        self.spatial_index = None
+        self.routing_indexes = {}
+        self.node_centrality = None
+        self.component_labels = None
+        if base is not None:
+            self._set_network(base)
+    
+    def _set_network(self, road_arrays):
+        """
+        Use a road graph, deriving the current network type if it records the types of its edges
+        """
+        if road_arrays.edge_networks is not None:
+            self.base_arrays = road_arrays
+            self.road_arrays = road_arrays.network_view(self.network_type)
+        else:
+            self.base_arrays = None
+            self.road_arrays = road_arrays
+        self._road_graph = None
+        self._graph_fingerprint = None
+    
+    @property
+    def road_graph(self):
+        """
+        NetworkX view of the road network, built from the cached arrays on first access
+        """
+        if self._road_graph is None and self.road_arrays is not None:
+            print("Building NetworkX graph from cached arrays...")
+            self._road_graph = self.road_arrays.to_networkx()
+        return self._road_graph
+    
+    @road_graph.setter
+    def road_graph(self, graph):
+        self._road_graph = graph
+        self.road_arrays = None
+        self.base_arrays = None
+        self._graph_fingerprint = None
+    
+    def has_road_network(self):
+        """
+        Check whether a road network is loaded, without materialising NetworkX
+        """
+        return self.road_arrays is not None or self._road_graph is not None
+    
+    def get_road_arrays(self):
+        """
+        Columnar view of the road network, converting a NetworkX graph if needed
+        """
+        if self.road_arrays is None and self._road_graph is not None:
+            self.road_arrays = RoadGraphArrays.from_networkx(self._road_graph)
+        return self.road_arrays
+    
+    def _cached_network_dir(self, source):
+        """
+        Newest cache of the current network type for a data source: its own
+        arrays or the 'all' graph it is derived from, or None
+        """
+        candidates = [os.path.join(self.networks_dir, source, name) for name in (self.network_type, 'base')]
+        candidates = [path for path in candidates if RoadGraphArrays.exists(path)]
+        if not candidates:
+            return None
+        return max(candidates, key=os.path.getmtime)
+    
     def load_cached_graph(self):
         """
         Load cached road network if available
+        
+        The columnar cache is memory-mapped. Networks are cached per data
+        source; a cached 'all' graph serves every network type as a view. An
+        old pickle cache is converted to the columnar format the first time
+        it is found.
         """
-        if os.path.exists(self.graph_cache_file):
+        sources = [self.data_source] if self.data_source else self.cached_sources()
+        for source in sources:
+            path = self._cached_network_dir(source)
+            if path is None:
+                continue
             try:
-                print("Loading cached road network...")
-                with open(self.graph_cache_file, 'rb') as f:
-                    self.road_graph = pickle.load(f)
-                print(f"Successfully loaded cached network with {len(self.road_graph.nodes)} nodes and {len(self.road_graph.edges)} edges")
+                print(f"Loading cached {self.network_type} road network ({source})...")
+                with self.profiler.stage('load_graph_cache'):
+                    road_arrays = RoadGraphArrays.load(path)
+                self.data_source = source
+                self._set_network(road_arrays)
+                print(f"Successfully loaded cached network with {self.road_arrays.n_nodes} nodes and {self.road_arrays.n_edges} edges")
                 return True
             except Exception as e:
                 print(f"Error loading cached graph: {e}")
                 return False
+        if (os.path.exists(self.legacy_graph_cache_file) and self.network_type == 'drive'
+                and self.data_source in (None, 'overpass')):
+            try:
+                print("Converting legacy pickled road network to columnar cache...")
+                with open(self.legacy_graph_cache_file, 'rb') as f:
+                    graph = pickle.load(f)
+                self.data_source = 'overpass'
+                self.road_graph = graph
+                self.save_graph_to_cache()
+                os.remove(self.legacy_graph_cache_file)
+                return True
+            except Exception as e:
+                print(f"Error loading legacy cached graph: {e}")
+                return False
         return False
     
     def save_graph_to_cache(self):
         """
         Save road network to cache
+        
+        An 'all' graph with the network types of its edges is saved once per
+        data source; other graphs are saved under their network type.
         """
         try:
             print("Saving road network to cache...")
-            with open(self.graph_cache_file, 'wb') as f:
-                pickle.dump(self.road_graph, f)
-            print(f"Road network cached successfully at {self.graph_cache_file}")
+            if self.road_arrays is None:
+                self.road_arrays = RoadGraphArrays.from_networkx(self._road_graph)
+            if self.base_arrays is not None:
+                path = os.path.join(self.network_cache_dir, 'base')
+                self.base_arrays.save(path)
+            else:
+                path = os.path.join(self.network_cache_dir, self.network_type)
+                self.road_arrays.save(path)
+            print(f"Road network cached successfully at {path}")
         except Exception as e:
             print(f"Error saving graph to cache: {e}")
     
-    def download_road_network(self, network_type='drive', force_download=False):
+    def ingest_pbf(self, pbf_path, network_type=None, location_storage='flex_mem'):
+        """
+        Build the road network from a local .osm.pbf extract, without network access
+        
+        The extract is streamed straight into the columnar graph cache; no
+        NetworkX graph is built. The 'all' network is built once per extract
+        and the other network types are derived from it. Its ways are kept
+        in a way store, so OSM change files can be applied later (see
+        apply_osm_changes).
+        
+        Args:
+            pbf_path (str): Path to the .osm.pbf extract
+            network_type (str): Type of network ('drive', 'walk', 'bike', 'all'; default: current)
+            location_storage (str): osmium node location index; use e.g.
+                'sparse_file_array,/tmp/bd_nodes.idx' to keep node locations on disk
+        """
+        from pbf_ingest import ingest_pbf
+        
+        self.select_network(network_type, network_source(pbf_path))
+        print(f"Ingesting road networks from {pbf_path}...")
+        try:
+            self._set_network(ingest_pbf(pbf_path, None, location_storage, ways_path=self.ways_cache_dir))
+            print(f"Successfully ingested {self.network_type} network with {self.road_arrays.n_nodes} nodes and {self.road_arrays.n_edges} edges")
+            
+            # Save to cache
+            self.save_graph_to_cache()
+            return True
+        except Exception as e:
+            print(f"Error ingesting road network: {e}")
+            return False
+    
+    def apply_osm_changes(self, changes_dir):
+        """
+        Patch the cached road network with OSM change files (.osc / .osc.gz)
+        
+        Only the ways touched by the changes are split again and their edges
+        replaced, so a daily diff applies in seconds. Change files up to the
+        recorded replication sequence number are skipped. Indexes and results
+        keyed by the graph fingerprint follow the new network: component and
+        degree results are updated incrementally, the routing and spatial
+        indexes are rebuilt on next use.
+        
+        Needs a network ingested from a PBF extract (see ingest_pbf), whose
+        ways are kept in the way store. Every network type of the extract is
+        updated at once.
+        
+        Args:
+            changes_dir (str): Directory of change files, in the replication
+                layout (000/004/123.osc.gz with state.txt files) or named by
+                sequence number
+        
+        Returns:
+            dict: Summary of the update (empty if there was nothing new), or None on failure
+        """
+        from osm_updates import apply_change_files
+        
+        if not self.load_cached_graph():
+            print("No cached road network to update")
+            return None
+        if self.base_arrays is None or not os.path.exists(self.ways_cache_dir):
+            print("No way store found; build the network with --pbf before applying change files")
+            return None
+        try:
+            with self.profiler.stage('apply_changes'):
+                result = apply_change_files(self.base_arrays, self.ways_cache_dir, changes_dir)
+            if result is None:
+                sequence = self.base_arrays.graph_attrs.get('replication_sequence')
+                print(f"No change files newer than sequence {sequence} in {changes_dir}")
+                return {}
+            patched, ways, attrs, summary = result
+            self._set_network(patched)
+            self.spatial_index = None
+            self.routing_indexes = {}
+            self.save_graph_to_cache()
+            ways.save(self.ways_cache_dir, attrs)
+            self.load_cached_graph()
+            print(f"Applied {summary['files']} change files up to sequence {summary['replication_sequence']}: "
+                  f"{summary['ways_rebuilt']} ways rebuilt, {summary['edges_removed']} edges removed, "
+                  f"{summary['edges_added']} edges added")
+            return summary
+        except Exception as e:
+            print(f"Error applying change files: {e}")
+            return None
+    
+    def download_road_network(self, network_type=None, force_download=False, pbf_path=None):
         """
         Download Bangladesh road network from OpenStreetMap
         
+        The 'all' network is downloaded once and cached; the drive, walk and
+        bike networks are derived from it without another download.
+        
         Args:
-            network_type (str): Type of network ('drive', 'walk', 'bike', 'all')
+            network_type (str): Type of network ('drive', 'walk', 'bike', 'all'; default: current)
             force_download (bool): Force download even if cache exists
+            pbf_path (str): Local .osm.pbf extract to ingest instead of querying Overpass
         """
+        self.select_network(network_type, network_source(pbf_path) if pbf_path else None)
+        
         # Try to load from cache first
         if not force_download and self.load_cached_graph():
             return True
+        
+        if pbf_path is not None:
+            return self.ingest_pbf(pbf_path)
             
-        print(f"Downloading {network_type} network for {self.country_name}...")
+        self.select_network(source='overpass')
+        print(f"Downloading road networks for {self.country_name}...")
         print("This may take several minutes. Please be patient.")
         try:
             # Download the road network for Bangladesh
-            self.road_graph = ox.graph_from_place(
-                self.country_name, 
-                network_type=network_type,
-                simplify=True
-            )
-            print(f"Successfully downloaded road network with {len(self.road_graph.nodes)} nodes and {len(self.road_graph.edges)} edges")
+            self._set_network(download_network_base(self.country_name))
+            print(f"Successfully downloaded {self.network_type} network with {self.road_arrays.n_nodes} nodes and {self.road_arrays.n_edges} edges")
             
             # Save to cache
             self.save_graph_to_cache()
@@ -110,7 +550,12 @@ class BangladeshRoadMap:
     def load_cached_districts(self):
         """
         Load cached district boundaries if available
+        
+        District polygons imported with load_boundaries take precedence over
+        the downloaded country outline.
         """
+        if os.path.exists(self.boundary_cache_file('district')):
+            return self.load_boundaries(level='district') is not None
         if os.path.exists(self.districts_cache_file):
             try:
                 print("Loading cached district boundaries...")
@@ -139,6 +584,9 @@ class BangladeshRoadMap:
         """
         Download Bangladesh district boundaries
         
+        Nominatim only returns the country outline; use load_boundaries with
+        a local boundary file for real district polygons.
+        
         Args:
             force_download (bool): Force download even if cache exists
         """
@@ -161,111 +609,436 @@ class BangladeshRoadMap:
         except Exception as e:
             print(f"Error downloading districts: {e}")
             return False
+
+    def boundary_cache_file(self, level):
+        """
+        GeoParquet cache of the district or upazila polygons
+        """
+        return os.path.join(self.boundaries_dir, f"{level}.parquet")
     
-    def load_cached_stats(self):
+    def load_boundaries(self, path=None, level='district', name_column=None, layer=None):
         """
-        Load cached connectivity statistics if available
+        Load district or upazila polygons from a local boundary file or the cache
+        
+        The file is read once and cached as GeoParquet; without a path the
+        cached polygons are loaded.
+        
+        Args:
+            path (str): Boundary file (GeoJSON, shapefile, GeoPackage, ...)
+            level (str): 'district' or 'upazila'
+            name_column (str): Column with the area names (default: detected)
+            layer (str): Layer of a multi-layer file
+        
+        Returns:
+            GeoDataFrame: name, parent names and geometry, or None
         """
-        if os.path.exists(self.stats_cache_file):
-            try:
-                print("Loading cached connectivity statistics...")
-                with open(self.stats_cache_file, 'rb') as f:
-                    stats = pickle.load(f)
-                print("Successfully loaded cached connectivity statistics")
-                return stats
-            except Exception as e:
-                print(f"Error loading cached stats: {e}")
+        from boundaries import load_boundary_file
+        
+        cache_file = self.boundary_cache_file(level)
+        try:
+            if path is not None:
+                print(f"Loading {level} boundaries from {path}...")
+                boundaries = load_boundary_file(path, level, name_column=name_column, layer=layer)
+                os.makedirs(self.boundaries_dir, exist_ok=True)
+                boundaries.to_parquet(cache_file)
+                print(f"Cached {len(boundaries)} {level} polygons at {cache_file}")
+            elif os.path.exists(cache_file):
+                print(f"Loading cached {level} boundaries...")
+                boundaries = gpd.read_parquet(cache_file)
+            else:
+                print(f"No {level} boundaries cached; pass a boundary file to load_boundaries")
                 return None
-        return None
+        except Exception as e:
+            print(f"Error loading {level} boundaries: {e}")
+            return None
+        
+        if level == 'district':
+            self.districts_gdf = boundaries
+        else:
+            self.upazilas_gdf = boundaries
+        return boundaries
     
-    def save_stats_to_cache(self, stats):
+    def road_stats_by_area(self, level='district'):
         """
-        Save connectivity statistics to cache
+        Road km by highway class, road density and component counts per district or upazila
+        
+        Args:
+            level (str): 'district' or 'upazila'
+        
+        Returns:
+            DataFrame: One row per area (see boundaries.road_stats_by_area), or None
         """
+        from boundaries import road_stats_by_area
+        
+        if not self.has_road_network():
+            print("No road network available for analysis")
+            return None
+        areas = self.districts_gdf if level == 'district' else self.upazilas_gdf
+        if areas is None or len(areas) < 2 or 'name' not in areas.columns:
+            areas = self.load_boundaries(level=level)
+        if areas is None:
+            return None
+        
+        print(f"Joining roads to {len(areas)} {level} polygons...")
+        with self.profiler.stage(f'area_stats:{level}', areas=len(areas)):
+            stats = road_stats_by_area(self.get_road_arrays(), areas)
+        return stats
+    
+    def export_parquet(self, out_dir="road_network_parquet", by='highway'):
+        """
+        Export nodes and edges as partitioned GeoParquet for downstream analytics
+        
+        Districts from load_boundaries add a district column (and are
+        required for by='district'); see parquet_export for the layout.
+        
+        Args:
+            out_dir (str): Export directory
+            by (str): Partition edges by 'highway' class or 'district'
+        
+        Returns:
+            dict: Dataset directories and row counts, or None
+        """
+        from parquet_export import export_road_parquet
+        
+        if not self.has_road_network():
+            print("No road network available for export")
+            return None
+        areas = self.districts_gdf
+        if areas is None or 'name' not in areas.columns:
+            areas = self.load_boundaries(level='district')
+        if by == 'district' and areas is None:
+            print("Partitioning by district needs district boundaries; import them with --boundaries")
+            return None
+        
+        print(f"Exporting road network to {out_dir} (partitioned by {by})...")
         try:
-            print("Saving connectivity statistics to cache...")
-            with open(self.stats_cache_file, 'wb') as f:
-                pickle.dump(stats, f)
-            print(f"Statistics cached successfully at {self.stats_cache_file}")
+            with self.profiler.stage('export_parquet', by=by):
+                result = export_road_parquet(self.get_road_arrays(), out_dir, by=by, areas_gdf=areas)
+            print(f"Exported {result['n_edges']:,} edges to {result['edges']} "
+                  f"and {result['n_nodes']:,} nodes to {result['nodes']}")
+            return result
         except Exception as e:
-            print(f"Error saving stats to cache: {e}")
+            print(f"Error exporting road network: {e}")
+            return None
     
-    def analyze_connectivity(self, force_analysis=False):
+    def acquire_data(self, network_type=None, force_download=False, pbf_path=None, places=None,
+                     acquirer=None):
+        """
+        Fetch the road network, district boundaries and city geocodes concurrently
+
+        Cached data is loaded first. The remaining downloads run at the same
+        time on an asyncio event loop, within the Overpass and Nominatim rate
+        limits and with retries. Geocodes are written through to the
+        gazetteer, so the map step finds them offline.
+
+        Args:
+            network_type (str): Type of network ('drive', 'walk', 'bike', 'all'; default: current)
+            force_download (bool): Force download even if cache exists
+            pbf_path (str): Local .osm.pbf extract to ingest instead of querying Overpass
+            places (list): Places to geocode (default: self.major_cities)
+            acquirer (AsyncAcquirer): Client with custom limits, retries or endpoints
+
+        Returns:
+            bool: True if a road network is available
+        """
+        from acquisition import AsyncAcquirer
+
+        if places is None:
+            places = self.major_cities
+        self.select_network(network_type, network_source(pbf_path) if pbf_path else None)
+        need_graph = force_download or not self.load_cached_graph()
+        if need_graph and pbf_path is None:
+            self.select_network(source='overpass')
+        need_districts = force_download or not self.load_cached_districts()
+        try:
+            gazetteer = self.get_gazetteer()
+            known = gazetteer.lookup_many(places)
+            missing = [place for place in places if place not in known]
+        except Exception as e:
+            print(f"Error resolving places: {e}")
+            gazetteer, missing = None, []
+
+        def make_tasks(acquirer):
+            tasks = {}
+            if need_graph and pbf_path is not None:
+                from pbf_ingest import ingest_pbf
+                print(f"Ingesting road networks from {pbf_path}...")
+                tasks['road_network'] = acquirer.call('local', ingest_pbf, pbf_path, None,
+                                                      ways_path=self.ways_cache_dir, retry=False)
+            elif need_graph:
+                print(f"Downloading road networks for {self.country_name}...")
+                print("This may take several minutes. Please be patient.")
+                tasks['road_network'] = acquirer.call('overpass', download_network_base, self.country_name)
+            if need_districts:
+                print("Downloading district boundaries...")
+                tasks['districts'] = acquirer.call('nominatim', ox.geocode_to_gdf, "Bangladesh", which_result=None)
+            if missing:
+                print(f"Geocoding {len(missing)} places...")
+                tasks['geocodes'] = acquirer.geocode_many(missing)
+            return tasks
+
+        if need_graph or need_districts or missing:
+            results = (acquirer or AsyncAcquirer()).run(make_tasks)
+        else:
+            results = {}
+
+        network = results.get('road_network')
+        if isinstance(network, Exception):
+            print(f"Error acquiring road network: {network}")
+        elif network is not None:
+            self._set_network(network)
+            print(f"Successfully acquired {self.network_type} network with {self.road_arrays.n_nodes} nodes and {self.road_arrays.n_edges} edges")
+            self.save_graph_to_cache()
+
+        districts = results.get('districts')
+        if isinstance(districts, Exception):
+            print(f"Error downloading districts: {districts}")
+        elif districts is not None:
+            self.districts_gdf = districts
+            print("Successfully downloaded district boundaries")
+            self.save_districts_to_cache()
+
+        geocodes = results.get('geocodes')
+        if isinstance(geocodes, Exception):
+            print(f"Error geocoding places: {geocodes}")
+        elif geocodes:
+            gazetteer.add_places(
+                [{'name': name, 'lat': lat, 'lon': lon, 'kind': 'geocoded'}
+                 for name, (lat, lon) in geocodes.items()],
+                source='geocoder'
+            )
+        return self.has_road_network()
+
+    def load_cached_stats(self, betweenness_samples='auto'):
+        """
+        Load the connectivity statistics of the loaded road network from the result cache
+        
+        The report is stored by analyze_connectivity under the road network
+        fingerprint, so statistics of another network are never returned.
+        
+        Args:
+            betweenness_samples (int, None or 'auto'): As passed to analyze_connectivity
+        
+        Returns:
+            dict: The statistics, or None if they have not been computed for this network
+        """
+        if not self.has_road_network():
+            return None
+        params = {'betweenness_samples': self._betweenness_samples(betweenness_samples)}
+        stats = self.result_cache.get(
+            'connectivity_stats',
+            self.result_cache.make_key(self.graph_fingerprint(), 'connectivity_stats', params)
+        )
+        if stats is not None:
+            print("Loaded cached connectivity statistics")
+        return stats
+    
+    def _betweenness_samples(self, betweenness_samples):
+        """
+        Resolve 'auto' to 1000 sampled sources on networks over 5000 nodes, exact otherwise
+        """
+        if betweenness_samples == 'auto':
+            return 1000 if self.get_road_arrays().n_nodes > 5000 else None
+        return betweenness_samples
+    
+    def _result_scope(self):
+        """
+        Network the latest result pointers are kept apart by
+        """
+        return {'data_source': self.data_source, 'network_type': self.network_type}
+    
+    def graph_fingerprint(self):
+        """
+        Content hash of the loaded road network arrays
+        """
+        if self._graph_fingerprint is None:
+            self._graph_fingerprint = self.get_road_arrays().fingerprint()
+        return self._graph_fingerprint
+    
+    def compute_metric(self, metric, compute, params=None, update=None, force=False):
+        """
+        Look up a metric in the result cache, computing it only on a miss
+        
+        Results are keyed by the graph fingerprint, the metric name and its
+        parameters, so a changed network or setting never returns stale values.
+        
+        Args:
+            metric (str): Metric name
+            compute (callable): compute() -> value, the full computation
+            params (dict): Parameters the metric depends on
+            update (callable): update(previous_fingerprint, previous_value) -> value or None,
+                an incremental update from the latest result for another network
+            force (bool): Recompute even if a cached value exists
+        """
+        fingerprint = self.graph_fingerprint()
+        key = self.result_cache.make_key(fingerprint, metric, params)
+        if not force:
+            value = self.result_cache.get(metric, key)
+            if value is not None:
+                print(f"Using cached {metric} results")
+                return value
+        
+        value = None
+        if not force and update is not None:
+            latest = self.result_cache.latest(metric, params, self._result_scope())
+            if latest is not None and latest[0] != fingerprint:
+                print(f"Updating {metric} incrementally from the previous road network...")
+                with self.profiler.stage(f"update:{metric}"):
+                    value = update(*latest)
+        if value is None:
+            print(f"Computing {metric}...")
+            with self.profiler.stage(f"compute:{metric}", **(params or {})):
+                value = compute()
+        
+        self.result_cache.put(metric, key, value, params, fingerprint, self._result_scope())
+        return value
+    
+    def _incremental_update(self, update_state, node_ids, pairs):
+        """
+        Build a compute_metric update callback from a connectivity update_* function
+        """
+        def update(previous_fingerprint, previous_state):
+            previous_pairs = self.result_cache.get(
+                'edge_pairs', self.result_cache.make_key(previous_fingerprint, 'edge_pairs')
+            )
+            if previous_pairs is None:
+                return None
+            return update_state(previous_state, previous_pairs, node_ids, pairs)
+        return update
+    
+    def analyze_connectivity(self, force_analysis=False, betweenness_samples='auto', workers=None):
         """
         Analyze road network connectivity metrics
         
+        Each metric is cached under the road network fingerprint and its
+        parameters. After a data refresh, component and degree results are
+        updated incrementally from the previous network where possible. The
+        report is stored in the result cache as well (see load_cached_stats).
+        
         Args:
             force_analysis (bool): Force analysis even if cache exists
+            betweenness_samples (int, None or 'auto'): Sampled sources for the betweenness
+                estimator; None computes it exactly, 'auto' samples 1000 sources on
+                networks over 5000 nodes
+            workers (int): Worker processes for centrality (default: CPU count)
         """
-        if self.road_graph is None:
+        if not self.has_road_network():
             print("No road network available for analysis")
             return None
-        
-        # Try to load from cache first
-        if not force_analysis:
-            cached_stats = self.load_cached_stats()
-            if cached_stats is not None:
-                return cached_stats
             
         print("Analyzing road network connectivity...")
         print("This may take a few minutes for large networks...")
         
         # Basic network statistics
+        road_arrays = self.get_road_arrays()
+        betweenness_samples = self._betweenness_samples(betweenness_samples)
+        n_nodes = road_arrays.n_nodes
         stats = {
-            'total_nodes': len(self.road_graph.nodes),
-            'total_edges': len(self.road_graph.edges),
-            'is_connected': nx.is_connected(self.road_graph.to_undirected()),
-            'number_of_components': nx.number_connected_components(self.road_graph.to_undirected()),
+            'total_nodes': n_nodes,
+            'total_edges': road_arrays.n_edges,
+            'graph_fingerprint': self.graph_fingerprint(),
             'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
         
-        # Calculate centrality measures for major nodes
+        node_ids = np.asarray(road_arrays.node_ids)
+        pairs = self.compute_metric(
+            'edge_pairs',
+            lambda: undirected_pairs(node_ids, road_arrays.edge_sources(), road_arrays.indices),
+            force=force_analysis
+        )
+        
+        # Label connected components in one pass over the edge arrays
+        components = self.compute_metric(
+            'components',
+            lambda: component_state(node_ids, pairs),
+            update=self._incremental_update(update_component_state, node_ids, pairs),
+            force=force_analysis
+        )
+        self.component_labels = components['labels']
+        stats.update(component_summary(self.component_labels))
+        
+        # Calculate degree centrality
+        degree = self.compute_metric(
+            'degree',
+            lambda: degree_state(node_ids, pairs),
+            update=self._incremental_update(update_degree_state, node_ids, pairs),
+            force=force_analysis
+        )
+        degree_centrality = degree['degree'] / max(n_nodes - 1, 1)
+        stats['avg_degree_centrality'] = float(np.mean(degree_centrality))
+        self.node_centrality = {'node_ids': node_ids, 'degree': degree_centrality}
+        
+        # Calculate betweenness centrality (sampled estimator for large networks)
         try:
-            # Convert to undirected for centrality calculations
-            G_undirected = self.road_graph.to_undirected()
-            
-            # Calculate degree centrality
-            degree_centrality = nx.degree_centrality(G_undirected)
-            
-            # Calculate betweenness centrality (sample for large networks)
-            if len(G_undirected.nodes) > 5000:
-                sample_nodes = list(G_undirected.nodes)[:1000]
-                betweenness_centrality = nx.betweenness_centrality(
-                    G_undirected.subgraph(sample_nodes)
-                )
+            if betweenness_samples is None:
+                print("Using exact betweenness centrality...")
             else:
-                betweenness_centrality = nx.betweenness_centrality(G_undirected)
+                print(f"Using betweenness centrality estimated from {betweenness_samples} sampled sources...")
+            betweenness = self.compute_metric(
+                'betweenness',
+                lambda: betweenness_centrality(
+                    *road_arrays.undirected_csr(), k=betweenness_samples, seed=42, workers=workers
+                ),
+                params={'samples': betweenness_samples, 'seed': 42, 'confidence': 0.95},
+                force=force_analysis
+            )
+            
+            stats['avg_betweenness_centrality'] = float(np.mean(betweenness['values']))
+            stats['max_betweenness_centrality'] = float(np.max(betweenness['values']))
+            stats['betweenness_exact'] = betweenness['exact']
+            stats['betweenness_sources'] = betweenness['sources']
+            if betweenness['max_ci_halfwidth'] is not None:
+                stats['betweenness_max_ci_halfwidth'] = betweenness['max_ci_halfwidth']
             
-            stats['avg_degree_centrality'] = np.mean(list(degree_centrality.values()))
-            stats['avg_betweenness_centrality'] = np.mean(list(betweenness_centrality.values()))
+            self.node_centrality['betweenness'] = betweenness['values']
+            if betweenness['stderr'] is not None:
+                self.node_centrality['betweenness_stderr'] = betweenness['stderr']
             
         except Exception as e:
             print(f"Error calculating centrality measures: {e}")
         
         # Save to cache
-        self.save_stats_to_cache(stats)
+        params = {'betweenness_samples': betweenness_samples}
+        self.result_cache.put(
+            'connectivity_stats',
+            self.result_cache.make_key(stats['graph_fingerprint'], 'connectivity_stats', params),
+            stats, params, stats['graph_fingerprint'], self._result_scope()
+        )
         
         return stats
     
-    def create_interactive_map(self, save_path="bangladesh_road_map.html"):
+    def create_interactive_map(self, save_path="bangladesh_road_map.html", tiled=False,
+                               tiles_dir=None, min_zoom=5, max_zoom=14, workers=None,
+                               streaming=None, isochrones=None, accessibility=None, vulnerability=None):
         """
         Create an interactive Folium map of Bangladesh roads
         
         Args:
             save_path (str): Path to save the HTML map
+            tiled (bool): Write roads as a static vector tile directory loaded lazily by the map
+            tiles_dir (str): Tile directory (default: next to save_path, named <map>_tiles)
+            min_zoom (int): Lowest zoom level to generate tiles for
+            max_zoom (int): Highest zoom level to generate tiles for
+            workers (int): Build road layers tile by tile across this many processes
+            streaming (str): Stream road features from the graph arrays while
+                writing, with memory independent of network size: 'inline'
+                embeds them in the HTML, 'sidecar' writes <map>_layers/*.geojson
+                files the page fetches (must be served over HTTP)
+            isochrones (GeoDataFrame): compute_isochrones output to show as layers
+            accessibility (dict): accessibility_grid output to show as a raster layer
+            vulnerability (DataFrame): vulnerability_analysis output to show as critical links
         """
-        if self.road_graph is None:
+        if not self.has_road_network():
             print("No road network available for mapping")
             return None
             
         print("Creating interactive map...")
         
-        # Convert graph to GeoDataFrames
-        nodes_gdf, edges_gdf = ox.graph_to_gdfs(self.road_graph)
+        road_arrays = self.get_road_arrays()
         
         # Calculate map center
-        center_lat = nodes_gdf.geometry.y.mean()
-        center_lon = nodes_gdf.geometry.x.mean()
+        center_lat = float(np.mean(road_arrays.node_y))
+        center_lon = float(np.mean(road_arrays.node_x))
         
         # Create base map
         m = folium.Map(
@@ -278,74 +1051,42 @@ class BangladeshRoadMap:
         folium.TileLayer('Stamen Terrain', attr='Map tiles by <a href="http://stamen.com">Stamen Design</a>, under <a href="http://creativecommons.org/licenses/by/3.0">CC BY 3.0</a>. Data by <a href="http://openstreetmap.org">OpenStreetMap</a>, under <a href="http://www.openstreetmap.org/copyright">ODbL</a>.').add_to(m)
         folium.TileLayer('CartoDB positron', attr='Map tiles by <a href="https://carto.com/attributions">CARTO</a>, under <a href="https://creativecommons.org/licenses/by/3.0/">CC BY 3.0</a>. Data by <a href="http://openstreetmap.org">OpenStreetMap</a>, under <a href="http://www.openstreetmap.org/copyright">ODbL</a>.').add_to(m)
         
-        # Style roads by type
-        def get_road_style(highway_type):
-            styles = {
-                'motorway': {'color': '#FF0000', 'weight': 4, 'opacity': 0.8},
-                'trunk': {'color': '#FF4500', 'weight': 3, 'opacity': 0.8},
-                'primary': {'color': '#FFA500', 'weight': 2.5, 'opacity': 0.7},
-                'secondary': {'color': '#FFFF00', 'weight': 2, 'opacity': 0.6},
-                'tertiary': {'color': '#90EE90', 'weight': 1.5, 'opacity': 0.5},
-                'residential': {'color': '#87CEEB', 'weight': 1, 'opacity': 0.4},
-                'default': {'color': '#808080', 'weight': 1, 'opacity': 0.3}
-            }
-            
-            if isinstance(highway_type, list):
-                highway_type = highway_type[0] if highway_type else 'default'
-            
-            return styles.get(highway_type, styles['default'])
-        
-        # Add roads to map
-        print("Adding roads to map...")
-        road_groups = {}
-        
-        for idx, row in edges_gdf.iterrows():
-            highway_type = row.get('highway', 'default')
-            if isinstance(highway_type, list):
-                highway_type = highway_type[0] if highway_type else 'default'
-            
-            if highway_type not in road_groups:
-                road_groups[highway_type] = folium.FeatureGroup(name=f"{highway_type.title()} Roads")
-            
-            style = get_road_style(highway_type)
-            
-            # Create popup with road information
-            popup_text = f"""
-            <b>Road Information</b><br>
-            Type: {highway_type}<br>
-            Length: {row.get('length', 'N/A'):.0f}m<br>
-            Name: {row.get('name', 'Unnamed')}
-            """
-            
-            folium.GeoJson(
-                row.geometry,
-                style_function=lambda x, style=style: style,
-                popup=folium.Popup(popup_text, max_width=200),
-                tooltip=f"{highway_type.title()} Road"
-            ).add_to(road_groups[highway_type])
-        
-        # Add road groups to map
-        for group in road_groups.values():
-            group.add_to(m)
+        with self.profiler.stage('map:road_layers', tiled=tiled, edges=int(road_arrays.n_edges)):
+            if streaming:
+                # Empty groups now; features are streamed in when the page is written
+                road_groups = {}
+                for highway_type in highway_classes_present(road_arrays):
+                    road_groups[highway_type] = folium.FeatureGroup(name=f"{highway_type.title()} Roads")
+                    road_groups[highway_type].add_to(m)
+            elif tiled:
+                self.add_road_tiles(m, road_arrays.to_geodataframe(), save_path, tiles_dir, min_zoom, max_zoom)
+            elif workers is not None and workers > 1:
+                self.add_road_layers(m, layers=self.build_road_layers_parallel(workers))
+            else:
+                self.add_road_layers(m, road_arrays.to_geodataframe())
         
         # Add major cities
         print("Adding major cities...")
         cities_group = folium.FeatureGroup(name="Major Cities")
         
-        for city in self.major_cities:
-            try:
-                city_location = ox.geocode(f"{city}, Bangladesh")
-                folium.Marker(
-                    location=[city_location[0], city_location[1]],
-                    popup=f"<b>{city}</b><br>Major City",
-                    tooltip=city,
-                    icon=folium.Icon(color='red', icon='info-sign')
-                ).add_to(cities_group)
-            except Exception as e:
-                print(f"Could not geocode {city}: {e}")
+        with self.profiler.stage('map:geocode', places=len(self.major_cities)):
+            city_locations = self.geocode_places(self.major_cities)
+        for city, city_location in city_locations.items():
+            folium.Marker(
+                location=[city_location[0], city_location[1]],
+                popup=f"<b>{city}</b><br>Major City",
+                tooltip=city,
+                icon=folium.Icon(color='red', icon='info-sign')
+            ).add_to(cities_group)
         
         cities_group.add_to(m)
         
+        if isochrones is not None or accessibility is not None:
+            self.add_accessibility_layers(m, isochrones, accessibility)
+        
+        if vulnerability is not None:
+            self.add_vulnerability_layer(m, vulnerability)
+        
         # Add layer control
         folium.LayerControl().add_to(m)
         
@@ -360,19 +1101,819 @@ class BangladeshRoadMap:
         plugins.Fullscreen().add_to(m)
         
         # Save map
-        m.save(save_path)
+        with self.profiler.stage('map:save_html', streaming=streaming):
+            if streaming:
+                print(f"Streaming road layers ({streaming})...")
+                counts = write_streaming_map(
+                    m, road_arrays, save_path, road_groups, get_road_style,
+                    sidecar=(streaming == 'sidecar')
+                )
+                for highway_type, count in counts.items():
+                    print(f"  {highway_type}: {count} segments")
+            else:
+                m.save(save_path)
         print(f"Interactive map saved to {save_path}")
         
         return m
     
-    def generate_report(self, force_analysis=False):
+    def add_road_layers(self, m, edges_gdf=None, layers=None):
+        """
+        Add roads to a map, one merged GeoJSON layer per highway type
+        
+        Args:
+            m (folium.Map): Map to add the layers to
+            edges_gdf (GeoDataFrame): Edges to build the layers from
+            layers (dict): Prebuilt build_road_layers output, used instead of edges_gdf
+        """
+        print("Adding roads to map...")
+        if layers is None:
+            layers = build_road_layers(edges_gdf)
+        for highway_type, roads in layers.items():
+            print(f"  {highway_type}: {len(roads)} segments")
+            group = folium.FeatureGroup(name=f"{highway_type.title()} Roads")
+            style = get_road_style(highway_type)
+            
+            folium.GeoJson(
+                roads,
+                style_function=lambda x, style=style: style,
+                popup=folium.GeoJsonPopup(fields=['popup'], labels=False, max_width=200),
+                tooltip=folium.GeoJsonTooltip(fields=['tooltip'], labels=False)
+            ).add_to(group)
+            group.add_to(m)
+    
+    def add_road_tiles(self, m, edges_gdf, save_path, tiles_dir=None, min_zoom=5, max_zoom=14):
+        """
+        Write roads as z/x/y vector tiles and add a lazily loaded tile layer to a map
+        
+        Each zoom level only carries the road classes visible at that zoom
+        (see get_road_min_zoom), simplified to about one pixel of tolerance.
+        The map must be served over HTTP for the browser to fetch the tiles.
+        """
+        from map_tiles import write_vector_tiles
+        
+        if tiles_dir is None:
+            tiles_dir = os.path.splitext(save_path)[0] + "_tiles"
+        
+        print(f"Writing vector tiles to {tiles_dir} (zoom {min_zoom}-{max_zoom})...")
+        roads = normalize_road_edges(edges_gdf)
+        if os.path.exists(tiles_dir):
+            shutil.rmtree(tiles_dir)
+        metadata = write_vector_tiles(
+            roads, tiles_dir, get_road_min_zoom, min_zoom=min_zoom, max_zoom=max_zoom
+        )
+        print(f"Wrote {metadata['tile_count']} tiles ({metadata['total_bytes'] / (1024 * 1024):.1f} MB)")
+        
+        tiles_url = os.path.relpath(
+            tiles_dir, os.path.dirname(os.path.abspath(save_path))
+        ).replace(os.sep, '/') + "/{z}/{x}/{y}.pbf"
+        options = {
+            'maxNativeZoom': max_zoom,
+            'vectorTileLayerStyles': {
+                highway_type: get_road_style(highway_type) for highway_type in metadata['layers']
+            },
+        }
+        plugins.VectorGridProtobuf(tiles_url, "Roads", options).add_to(m)
+    
+    def partition_network(self, by='grid', cell_size=None):
+        """
+        Split the road network into tiles
+        
+        Args:
+            by (str): 'grid' for a regular lon/lat grid or 'district' for the district polygons
+            cell_size (float): Grid cell size in degrees (default: about four tiles per CPU)
+        
+        Returns:
+            RoadPartition: Node and edge tile assignment with boundary nodes
+        """
+        from partitioning import default_cell_size, district_partition, grid_partition
+        
+        road_arrays = self.get_road_arrays()
+        if by == 'district':
+            if self.districts_gdf is None:
+                self.download_districts()
+            partition = district_partition(road_arrays, self.districts_gdf)
+        else:
+            if cell_size is None:
+                cell_size = default_cell_size(road_arrays, 4 * (os.cpu_count() or 1))
+            partition = grid_partition(road_arrays, cell_size)
+        print(f"Partitioned network into {partition.n_tiles} tiles "
+              f"({len(partition.boundary_nodes)} boundary nodes, {partition.n_cut_edges} cut edges)")
+        return partition
+    
+    def analyze_tiles(self, by='grid', cell_size=None, workers=None):
+        """
+        Compute per-tile road statistics in parallel and stitch the components back together
+        
+        Args:
+            by (str): 'grid' or 'district' (see partition_network)
+            cell_size (float): Grid cell size in degrees
+            workers (int): Worker processes (default: CPU count)
+        
+        Returns:
+            DataFrame: One row per tile with node, edge, boundary node, road km and
+            component counts; the national component labels are stored in
+            self.component_labels
+        """
+        from partitioning import process_tiles, stitch_components, tile_statistics
+        
+        if not self.has_road_network():
+            print("No road network available for analysis")
+            return None
+        
+        road_arrays = self.get_road_arrays()
+        partition = self.partition_network(by=by, cell_size=cell_size)
+        print("Processing tiles...")
+        results = process_tiles(road_arrays, partition, tile_statistics, workers=workers)
+        
+        self.component_labels = stitch_components(road_arrays, results)
+        boundary = partition.boundary_counts()
+        rows = []
+        for tile, _, result in results:
+            row = {
+                'tile': partition.tile_names[tile],
+                'nodes': result['nodes'],
+                'edges': result['edges'],
+                'boundary_nodes': int(boundary[tile]),
+                'components': int(result['labels'].max()) + 1,
+                'road_km': sum(result['road_km'].values()),
+            }
+            row.update({f"{h}_km": km for h, km in result['road_km'].items()})
+            rows.append(row)
+        tiles_df = pd.DataFrame(rows).fillna(0.0)
+        print(f"Processed {len(tiles_df)} tiles; network has "
+              f"{int(self.component_labels.max()) + 1} components after stitching")
+        return tiles_df
+    
+    def build_road_layers_parallel(self, workers=None, by='grid', cell_size=None):
+        """
+        build_road_layers over the whole network, tile by tile across a process pool
+        """
+        from partitioning import process_tiles
+        
+        partition = self.partition_network(by=by, cell_size=cell_size)
+        layers = {}
+        for _, _, tile_layers in process_tiles(self.get_road_arrays(), partition,
+                                               tile_road_layers, workers=workers):
+            for highway_type, roads in tile_layers.items():
+                layers.setdefault(highway_type, []).append(roads)
+        return {
+            highway_type: pd.concat(parts, ignore_index=True)
+            for highway_type, parts in sorted(layers.items())
+        }
+    
+    def get_gazetteer(self):
+        """
+        Offline gazetteer of place coordinates, seeded on first use
+        """
+        if self.gazetteer is None:
+            self.gazetteer = Gazetteer(self.gazetteer_file)
+        return self.gazetteer
+    
+    def geocode_places(self, places, live=True):
+        """
+        Resolve place names in Bangladesh to coordinates
+        
+        All names are looked up in the offline gazetteer in one batch
+        (including fuzzy matches of misspelt names); only the remaining ones
+        are sent to the live geocoder, and its answers are stored in the
+        gazetteer for the next run.
+        
+        Args:
+            places (list): Place names
+            live (bool): Fall back to the online geocoder for unknown places
+        
+        Returns:
+            dict: name -> (lat, lon) for every place that could be resolved
+        """
+        geocoder = (lambda place: ox.geocode(f"{place}, Bangladesh")) if live else None
+        try:
+            return self.get_gazetteer().lookup_many(places, geocoder=geocoder)
+        except Exception as e:
+            print(f"Error resolving places: {e}")
+            return {}
+    
+    def get_spatial_index(self, edges=True, force_rebuild=False):
+        """
+        Load or build the spatial index used to snap points onto the network
+        
+        The index is stored inside the graph cache directory and rebuilt
+        when it belongs to a different road network. The edge tree is only
+        built, and only read from the cache, for callers that snap to edges.
+        
+        Args:
+            edges (bool): Require the edge tree (for nearest-edge snapping)
+            force_rebuild (bool): Rebuild even if a matching index is cached
+        
+        Returns:
+            SpatialIndex: The index, or None on failure
+        """
+        from spatial_index import SpatialIndex, index_path
+        
+        if not self.has_road_network():
+            print("No road network available for snapping")
+            return None
+        
+        fingerprint = self.graph_fingerprint()
+        index_file = index_path(self.graph_cache_dir, self.network_type)
+        index = self.spatial_index
+        if index is None or index.fingerprint != fingerprint or force_rebuild:
+            index = None
+            if os.path.exists(index_file) and not force_rebuild:
+                try:
+                    index = SpatialIndex.load(index_file)
+                    if index.fingerprint != fingerprint:
+                        index = None
+                except Exception as e:
+                    print(f"Error loading spatial index: {e}")
+                    index = None
+        if index is not None and (index.has_edges or not edges):
+            self.spatial_index = index
+            return index
+        
+        try:
+            road_arrays = self.get_road_arrays()
+            if index is None:
+                print(f"Building spatial index for {road_arrays.n_nodes} nodes"
+                      + (f" and {road_arrays.n_edges} edges..." if edges else "..."))
+                index = SpatialIndex.build(road_arrays, edges=edges, fingerprint=fingerprint)
+            else:
+                print(f"Adding {road_arrays.n_edges} edges to the spatial index...")
+                index.add_edges(road_arrays)
+            self.spatial_index = index
+            # The stored fingerprint guards against a cache holding a different network
+            if RoadGraphArrays.exists(self.graph_cache_dir):
+                index.save(index_file)
+                print("Spatial index cached")
+            return index
+        except Exception as e:
+            print(f"Error building spatial index: {e}")
+            return None
+    
+    def snap_points(self, lons, lats, to='nodes', max_distance=None):
+        """
+        Snap many points (e.g. facilities) onto the road network at once
+        
+        Args:
+            lons (array-like): Point longitudes
+            lats (array-like): Point latitudes
+            to (str): 'nodes' for the nearest node, 'edges' for the nearest edge
+            max_distance (float): Leave points further than this (metres) unsnapped
+        
+        Returns:
+            dict: NumPy arrays; for nodes node_ids and distance_m, for edges
+            u, v, key, offset_m (along the edge from u) and distance_m.
+            Unsnapped points get id -1.
+        """
+        index = self.get_spatial_index(edges=(to == 'edges'))
+        if index is None:
+            return None
+        road_arrays = self.get_road_arrays()
+        
+        if to == 'nodes':
+            positions, distances = index.nearest_nodes(lons, lats, max_distance=max_distance)
+            node_ids = np.where(positions >= 0, np.asarray(road_arrays.node_ids)[positions], -1)
+            return {'node_ids': node_ids, 'distance_m': distances}
+        
+        if to != 'edges':
+            raise ValueError(f"Unknown snap target: {to}")
+        edges, offsets, distances = index.nearest_edges(lons, lats, max_distance=max_distance)
+        found = edges >= 0
+        node_ids = np.asarray(road_arrays.node_ids)
+        u = np.full(len(edges), -1, dtype=np.int64)
+        v = np.full(len(edges), -1, dtype=np.int64)
+        key = np.full(len(edges), -1, dtype=np.int64)
+        u[found] = node_ids[road_arrays.edge_sources()[edges[found]]]
+        v[found] = node_ids[np.asarray(road_arrays.indices)[edges[found]]]
+        key[found] = np.asarray(road_arrays.edge_key)[edges[found]]
+        return {'u': u, 'v': v, 'key': key, 'offset_m': offsets, 'distance_m': distances}
+    
+    def extract_region(self, bbox=None, center=None, radius=None, polygon=None, highway=None,
+                       include_links=True):
+        """
+        Cut a regional road graph out of the loaded network
+        
+        Uses the node KD-tree of the spatial index and reads only the edges
+        of the nodes inside the region, so it takes milliseconds once the
+        index is loaded.
+        
+        Args:
+            bbox (tuple): (west, south, east, north) in degrees
+            center (tuple): (lat, lon) of a circle, with radius in metres
+            radius (float): Circle radius in metres
+            polygon (shapely geometry): Polygon in EPSG:4326, e.g. a district boundary
+            highway (iterable): Keep only these highway classes, e.g. ['trunk', 'primary']
+            include_links (bool): Also keep the matching *_link classes
+        
+        Returns:
+            RoadGraphArrays: The regional subgraph, or None
+        """
+        from regions import extract_region
+        
+        index = self.get_spatial_index(edges=False)
+        if index is None:
+            return None
+        return extract_region(self.get_road_arrays(), index, bbox=bbox, center=center, radius=radius,
+                              polygon=polygon, highway=highway, include_links=include_links)
+    
+    def travel_time_matrix(self, places=None, speeds=None, workers=None):
+        """
+        Road distance and travel time between every pair of places
+        
+        All places are snapped to the road network at once and solved with
+        multi-source Dijkstra over the CSR arrays, in parallel across origins.
+        
+        Args:
+            places (list or dict): Place names to geocode, or name -> (lat, lon)
+                (default: self.major_cities)
+            speeds (dict): Highway class -> km/h overrides of routing.DEFAULT_SPEEDS_KPH
+            workers (int): Worker processes (default: CPU count)
+        
+        Returns:
+            dict: names, plus NumPy matrices distance_m (shortest route) and
+            time_s (fastest route), and per-place node_ids and snap_distance_m
+        """
+        from routing import travel_matrix
+        
+        if not self.has_road_network():
+            print("No road network available for routing")
+            return None
+        
+        if places is None:
+            places = self.major_cities
+        if not isinstance(places, dict):
+            places = self.geocode_places(places)
+        names = list(places)
+        lats = [places[name][0] for name in names]
+        lons = [places[name][1] for name in names]
+        
+        print(f"Computing {len(names)}x{len(names)} travel time matrix...")
+        result = travel_matrix(self.get_road_arrays(), lons, lats, speeds=speeds, workers=workers,
+                               index=self.get_spatial_index(edges=False))
+        result['names'] = names
+        return result
+    
+    def facility_locations(self, sources=None):
+        """
+        Coordinates of travel-time sources
+        
+        Args:
+            sources (list or dict): Place names to geocode, or name -> (lat, lon)
+                (default: the 64 district headquarters from the gazetteer)
+        
+        Returns:
+            dict: name -> (lat, lon)
+        """
+        if sources is None:
+            gazetteer = self.get_gazetteer()
+            return {**gazetteer.places('division_hq'), **gazetteer.places('district_hq')}
+        if not isinstance(sources, dict):
+            return self.geocode_places(sources)
+        return sources
+    
+    def compute_isochrones(self, sources=None, minutes=(15, 30, 60, 120), speeds=None, workers=None,
+                           force=False):
+        """
+        Travel-time isochrone polygons around facilities
+        
+        One Dijkstra per source, bounded by the largest threshold, runs in
+        parallel across sources; reached nodes are wrapped in concave hulls.
+        
+        Args:
+            sources (list or dict): See facility_locations (default: district HQs)
+            minutes (iterable): Travel time thresholds in minutes
+            speeds (dict): Highway class -> km/h overrides of routing.DEFAULT_SPEEDS_KPH
+            workers (int): Worker processes (default: CPU count)
+            force (bool): Recompute even if cached
+        
+        Returns:
+            GeoDataFrame: source, minutes, reachable_nodes and geometry, or None
+        """
+        import shapely
+        from accessibility import isochrones
+        from routing import edge_travel_times, weighted_csr
+        
+        if not self.has_road_network():
+            print("No road network available for isochrones")
+            return None
+        
+        places = self.facility_locations(sources)
+        names = list(places)
+        minutes = sorted(minutes)
+        road_arrays = self.get_road_arrays()
+        
+        def compute():
+            positions, _ = self.get_spatial_index(edges=False).nearest_nodes(
+                [places[name][1] for name in names], [places[name][0] for name in names]
+            )
+            matrix = weighted_csr(road_arrays, edge_travel_times(road_arrays, speeds))
+            return isochrones(matrix, road_arrays, positions, minutes, workers=workers)
+        
+        params = {'sources': [[name, *places[name]] for name in names],
+                  'minutes': minutes, 'speeds': speeds or {}}
+        rows = self.compute_metric('isochrones', compute, params, force=force)
+        return gpd.GeoDataFrame({
+            'source': [names[i] for i, _, _, _ in rows],
+            'minutes': [limit for _, limit, _, _ in rows],
+            'reachable_nodes': [count for _, _, count, _ in rows],
+        }, geometry=shapely.from_wkb([wkb for _, _, _, wkb in rows]), crs='EPSG:4326')
+    
+    def accessibility_grid(self, sources=None, cell_size=0.01, speeds=None, walk_speed_kph=5,
+                           force=False):
+        """
+        Raster of travel time to the nearest facility across the road network extent
+        
+        A single multi-source Dijkstra gives every node its time to the
+        nearest source; each cell adds the off-road walk to its nearest node.
+        
+        Args:
+            sources (list or dict): See facility_locations (default: district HQs)
+            cell_size (float): Cell size in degrees (0.01 is about 1 km)
+            speeds (dict): Highway class -> km/h overrides of routing.DEFAULT_SPEEDS_KPH
+            walk_speed_kph (float): Speed from a cell centre to the road
+            force (bool): Recompute even if cached
+        
+        Returns:
+            dict: minutes (2D float32, north up, NaN off the network), bounds
+            (west, south, east, north) and cell_size, or None
+        """
+        from accessibility import accessibility_raster, time_to_nearest
+        from routing import edge_travel_times, weighted_csr
+        
+        if not self.has_road_network():
+            print("No road network available for accessibility analysis")
+            return None
+        
+        places = self.facility_locations(sources)
+        road_arrays = self.get_road_arrays()
+        
+        def compute():
+            index = self.get_spatial_index(edges=False)
+            positions, _ = index.nearest_nodes([lat_lon[1] for lat_lon in places.values()],
+                                               [lat_lon[0] for lat_lon in places.values()])
+            matrix = weighted_csr(road_arrays, edge_travel_times(road_arrays, speeds))
+            node_seconds = time_to_nearest(matrix, positions)
+            x = np.asarray(road_arrays.node_x)
+            y = np.asarray(road_arrays.node_y)
+            bounds = (float(x.min()), float(y.min()), float(x.max()), float(y.max()))
+            return accessibility_raster(node_seconds, index, bounds, cell_size, walk_speed_kph)
+        
+        params = {'sources': [[name, *lat_lon] for name, lat_lon in places.items()],
+                  'cell_size': cell_size, 'speeds': speeds or {}, 'walk_speed_kph': walk_speed_kph}
+        return self.compute_metric('accessibility', compute, params, force=force)
+    
+    def add_accessibility_layers(self, m, isochrones=None, raster=None):
+        """
+        Add isochrone polygons and the accessibility raster to a folium map
+        
+        Args:
+            m (folium.Map): Map to add the layers to
+            isochrones (GeoDataFrame): compute_isochrones output
+            raster (dict): accessibility_grid output
+        """
+        from accessibility import ISOCHRONE_COLORS, raster_rgba
+        
+        if raster is not None:
+            west, south, east, north = raster['bounds']
+            folium.raster_layers.ImageOverlay(
+                image=raster_rgba(raster['minutes']),
+                bounds=[[south, west], [north, east]],
+                mercator_project=True,
+                name="Travel Time to Nearest HQ"
+            ).add_to(m)
+        
+        if isochrones is not None:
+            # Largest first, so the shorter isochrones are drawn on top
+            for limit in sorted(isochrones['minutes'].unique(), reverse=True):
+                color = ISOCHRONE_COLORS.get(int(limit), '#3388ff')
+                group = folium.FeatureGroup(name=f"Isochrones ({limit} min)", show=False)
+                folium.GeoJson(
+                    isochrones[isochrones['minutes'] == limit][['source', 'minutes', 'geometry']],
+                    style_function=lambda feature, color=color: {
+                        'color': color, 'weight': 1, 'fillColor': color, 'fillOpacity': 0.2
+                    },
+                    tooltip=folium.GeoJsonTooltip(fields=['source', 'minutes'],
+                                                  aliases=['From', 'Minutes'])
+                ).add_to(group)
+                group.add_to(m)
+    
+    def vulnerability_analysis(self, scenarios=None, max_links=100, speeds=None, workers=None,
+                               force=False):
+        """
+        Rank road links or flood scenarios by the damage their loss does to the network
+        
+        Bridges and articulation points are found in one linear-time pass.
+        Each scenario is then evaluated incrementally: only the pieces it cuts
+        off are searched, and Dijkstra is only rerun from the major cities
+        whose shortest paths use a removed link.
+        
+        Args:
+            scenarios (dict): name -> removed roads, either a shapely polygon in
+                EPSG:4326 (every link with an end inside) or a list of (u, v) OSM
+                node id pairs (default: one scenario per link for the max_links
+                bridges cutting off most nodes and the max_links other links
+                used by most routes between self.major_cities)
+            max_links (int): Candidates of each kind in the default scenarios
+            speeds (dict): Highway class -> km/h overrides of routing.DEFAULT_SPEEDS_KPH
+            workers (int): Worker processes (default: CPU count)
+            force (bool): Recompute even if cached
+        
+        Returns:
+            DataFrame: One row per scenario, most critical first, with the
+            nodes and district/division HQs cut off, major city pairs
+            disconnected and added travel time; single-link rows also carry
+            u, v, edge, name, highway, length_m and bridge. None on failure.
+        """
+        from routing import edge_travel_times, weighted_csr
+        from vulnerability import (bridges_and_articulation_points, city_path_links,
+                                   evaluate_scenarios, link_codes)
+        
+        if not self.has_road_network():
+            print("No road network available for vulnerability analysis")
+            return None
+        
+        road_arrays = self.get_road_arrays()
+        n = road_arrays.n_nodes
+        index = self.get_spatial_index(edges=False)
+        hqs = self.facility_locations()
+        cities = self.geocode_places(self.major_cities)
+        
+        def compute():
+            indptr, indices = road_arrays.undirected_csr()
+            cuts = bridges_and_articulation_points(indptr, indices)
+            print(f"Found {len(cuts['bridges'])} bridges and "
+                  f"{len(cuts['articulation_points'])} articulation points")
+            hq_nodes, _ = index.nearest_nodes([lat_lon[1] for lat_lon in hqs.values()],
+                                              [lat_lon[0] for lat_lon in hqs.values()])
+            city_nodes, _ = index.nearest_nodes([lat_lon[1] for lat_lon in cities.values()],
+                                                [lat_lon[0] for lat_lon in cities.values()])
+            matrix = weighted_csr(road_arrays, edge_travel_times(road_arrays, speeds))
+            base_times, path_pairs = city_path_links(matrix, city_nodes)
+            
+            bridge_codes = set(link_codes(n, *cuts['bridges'].T).tolist())
+            node_ids = np.asarray(road_arrays.node_ids)
+            named = {}
+            if scenarios is None:
+                for i in np.argsort(-cuts['bridge_cut_nodes'], kind='stable')[:max_links]:
+                    a, b = cuts['bridges'][i]
+                    named[f"bridge {node_ids[a]}-{node_ids[b]}"] = cuts['bridges'][i:i + 1]
+                busiest = sorted((code for code in path_pairs if code not in bridge_codes),
+                                 key=lambda code: -len(path_pairs[code]))[:max_links]
+                for code in busiest:
+                    named[f"link {node_ids[code // n]}-{node_ids[code % n]}"] = np.array([[code // n, code % n]])
+            else:
+                link_sources = np.repeat(np.arange(n), np.diff(indptr))
+                for name, spec in scenarios.items():
+                    if hasattr(spec, 'geom_type'):
+                        inside = np.zeros(n, dtype=bool)
+                        inside[index.nodes_within_polygon(spec)] = True
+                        keep = (inside[link_sources] | inside[indices]) & (link_sources < indices)
+                        named[name] = np.column_stack([link_sources[keep], indices[keep]])
+                    else:
+                        pairs = road_arrays.node_positions(np.asarray(spec, dtype=np.int64).reshape(-1, 2))
+                        named[name] = pairs[(pairs >= 0).all(axis=1)]
+            
+            print(f"Evaluating {len(named)} removal scenarios...")
+            results = evaluate_scenarios(indptr, indices, cuts['labels'], matrix, list(named.values()),
+                                         hq_nodes, city_nodes, base_times, path_pairs, workers=workers)
+            rows = []
+            for (name, links), result in zip(named.items(), results):
+                row = {'scenario': name, **result}
+                if len(links) == 1:
+                    a, b = (int(v) for v in links[0])
+                    row['u'] = int(node_ids[a])
+                    row['v'] = int(node_ids[b])
+                    row['bridge'] = int(link_codes(n, a, b)) in bridge_codes
+                rows.append(row)
+            return {'rows': rows, 'n_bridges': len(cuts['bridges']),
+                    'n_articulation_points': len(cuts['articulation_points'])}
+        
+        params = {'scenarios': {name: str(spec) for name, spec in scenarios.items()} if scenarios else None,
+                  'max_links': max_links, 'cities': list(cities), 'hqs': list(hqs), 'speeds': speeds or {}}
+        result = self.compute_metric('vulnerability', compute, params, force=force)
+        
+        table = pd.DataFrame(result['rows'])
+        if 'u' in table.columns:
+            # Attributes of the directed edge drawn for each single link
+            edges = []
+            for u, v in zip(table['u'], table['v']):
+                edge = -1
+                if not pd.isna(u):
+                    a, b = road_arrays.node_positions([int(u), int(v)])
+                    for source, target in ((a, b), (b, a)):
+                        start, end = road_arrays.indptr[source], road_arrays.indptr[source + 1]
+                        found = np.flatnonzero(np.asarray(road_arrays.indices[start:end]) == target)
+                        if len(found):
+                            edge = int(start + found[0])
+                            break
+                edges.append(edge)
+            edges = np.array(edges, dtype=np.int64)
+            found = edges >= 0
+            table['u'] = table['u'].astype('Int64')
+            table['v'] = table['v'].astype('Int64')
+            table['edge'] = edges
+            table['name'] = None
+            table['highway'] = None
+            table['length_m'] = np.nan
+            table.loc[found, 'name'] = np.asarray(road_arrays.names + [None], dtype=object)[
+                np.asarray(road_arrays.edge_name)[edges[found]]]
+            table.loc[found, 'highway'] = np.asarray(road_arrays.highway_classes, dtype=object)[
+                np.asarray(road_arrays.edge_highway)[edges[found]]]
+            table.loc[found, 'length_m'] = np.asarray(road_arrays.edge_length)[edges[found]]
+        
+        table = table.sort_values(
+            ['hqs_cut_off', 'city_pairs_disconnected', 'added_travel_min', 'nodes_cut_off'],
+            ascending=False, kind='stable'
+        ).reset_index(drop=True)
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        print(f"Network has {result['n_bridges']} bridges and "
+              f"{result['n_articulation_points']} articulation points")
+        return table
+    
+    def add_vulnerability_layer(self, m, table, top=50):
+        """
+        Add the most critical single links of a vulnerability_analysis table to a folium map
+        
+        Args:
+            m (folium.Map): Map to add the layer to
+            table (DataFrame): vulnerability_analysis output
+            top (int): Number of links to draw
+        """
+        if 'edge' not in table.columns:
+            return
+        links = table[table['edge'] >= 0].head(top)
+        if links.empty:
+            return
+        road_arrays = self.get_road_arrays()
+        layer = gpd.GeoDataFrame(
+            links[['rank', 'scenario', 'nodes_cut_off', 'hqs_cut_off', 'city_pairs_disconnected',
+                   'added_travel_min']].assign(added_travel_min=links['added_travel_min'].round(1)),
+            geometry=road_arrays.geometries(links['edge'].astype(int).tolist()),
+            crs='EPSG:4326'
+        )
+        group = folium.FeatureGroup(name="Critical Links")
+        folium.GeoJson(
+            layer,
+            style_function=lambda feature: {
+                'color': '#b30000' if feature['properties']['rank'] <= 10 else '#ff6600',
+                'weight': 6 if feature['properties']['rank'] <= 10 else 4,
+                'opacity': 0.9
+            },
+            tooltip=folium.GeoJsonTooltip(
+                fields=['rank', 'nodes_cut_off', 'hqs_cut_off', 'city_pairs_disconnected', 'added_travel_min'],
+                aliases=['Rank', 'Nodes cut off', 'HQs cut off', 'City pairs disconnected',
+                         'Added travel (min)']
+            )
+        ).add_to(group)
+        group.add_to(m)
+    
+    def build_routing_index(self, weight='time', force_rebuild=False):
+        """
+        Load or build the contraction hierarchy used for point-to-point routes
+        
+        The index is saved in data_cache/routing_index and rebuilt whenever
+        the fingerprint of the road network no longer matches.
+        
+        Args:
+            weight (str): 'time' (free-flow travel time, seconds) or 'length' (metres)
+            force_rebuild (bool): Rebuild even if a matching index is cached
+        
+        Returns:
+            ContractionHierarchy: The routing index, or None on failure
+        """
+        from contraction import ContractionHierarchy
+        from routing import edge_travel_times
+        
+        if not self.has_road_network():
+            print("No road network available for routing")
+            return None
+        
+        fingerprint = self.graph_fingerprint()
+        index = self.routing_indexes.get(weight)
+        if index is not None and index.fingerprint == fingerprint and not force_rebuild:
+            return index
+        
+        index_file = os.path.join(self.routing_index_dir, f"ch_{self.network_type}_{weight}.npz")
+        if os.path.exists(index_file) and not force_rebuild:
+            try:
+                index = ContractionHierarchy.load(index_file)
+                if index.fingerprint == fingerprint:
+                    print(f"Loaded {weight} routing index from cache")
+                    self.routing_indexes[weight] = index
+                    return index
+                print("Cached routing index is for a different road network, rebuilding")
+            except Exception as e:
+                print(f"Error loading routing index: {e}")
+        
+        try:
+            road_arrays = self.get_road_arrays()
+            if weight == 'time':
+                weights = edge_travel_times(road_arrays)
+            elif weight == 'length':
+                weights = np.asarray(road_arrays.edge_length)
+            else:
+                raise ValueError(f"Unknown routing weight: {weight}")
+            
+            print(f"Building {weight} routing index for {road_arrays.n_nodes} nodes...")
+            start = datetime.now()
+            index = ContractionHierarchy.build(
+                road_arrays.n_nodes, road_arrays.edge_sources(), road_arrays.indices,
+                np.maximum(weights, 1e-3), fingerprint=fingerprint, weight=weight
+            )
+            elapsed = (datetime.now() - start).total_seconds()
+            print(f"Routing index built in {elapsed:.1f}s "
+                  f"({len(index.forward[1]) + len(index.backward[1])} edges incl. shortcuts)")
+            
+            os.makedirs(self.routing_index_dir, exist_ok=True)
+            index.save(index_file)
+            self.routing_indexes[weight] = index
+            return index
+        except Exception as e:
+            print(f"Error building routing index: {e}")
+            return None
+    
+    def route(self, origin, destination, weight='time'):
+        """
+        Fastest or shortest route between two points
+        
+        Args:
+            origin: OSM node id, or (lat, lon) snapped to the nearest node
+            destination: OSM node id, or (lat, lon) snapped to the nearest node
+            weight (str): 'time' or 'length' (see build_routing_index)
+        
+        Returns:
+            dict: cost (seconds or metres), node_ids along the route and
+            length_m, or None if there is no route
+        """
+        index = self.build_routing_index(weight)
+        if index is None:
+            return None
+        
+        road_arrays = self.get_road_arrays()
+        positions = []
+        for point in (origin, destination):
+            if isinstance(point, (tuple, list)):
+                position = int(self.get_spatial_index(edges=False).nearest_nodes(point[1], point[0])[0][0])
+            else:
+                position = int(road_arrays.node_positions([point])[0])
+                if position < 0:
+                    print(f"Node {point} is not in the road network")
+                    return None
+            positions.append(position)
+        
+        cost, path = index.path(positions[0], positions[1])
+        if not path:
+            print("No route found")
+            return None
+        
+        path = np.asarray(path, dtype=np.int64)
+        length = 0.0
+        if len(path) > 1:
+            # Cheapest parallel edge by length between consecutive route nodes
+            indices = np.asarray(road_arrays.indices)
+            lengths = np.asarray(road_arrays.edge_length)
+            for u, v in zip(path[:-1], path[1:]):
+                start, end = road_arrays.indptr[u], road_arrays.indptr[u + 1]
+                length += lengths[start:end][indices[start:end] == v].min()
+        return {
+            'cost': cost,
+            'weight': weight,
+            'node_ids': np.asarray(road_arrays.node_ids)[path],
+            'length_m': float(length),
+        }
+    
+    def serve(self, host='127.0.0.1', port=8000, workers=None, network_type=None, pbf_path=None,
+              cache_size=256):
+        """
+        Answer stats, route and regional GeoJSON queries over a local HTTP API
+        
+        The road network and its indexes are loaded once; a pool of worker
+        processes shares the graph arrays and answers the queries, with
+        responses cached in memory (see road_server). Runs until interrupted.
+        
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on
+            workers (int): Worker processes (default: CPU count)
+            network_type (str): Network to serve ('drive', 'walk', 'bike', 'all'; default: current)
+            pbf_path (str): Local .osm.pbf extract to build the road network from if not cached
+            cache_size (int): Responses kept in the response cache
+        """
+        from road_server import RoadServer
+        
+        if not self.download_road_network(network_type=network_type, pbf_path=pbf_path):
+            print("No road network available to serve")
+            return
+        RoadServer(self, workers=workers, cache_size=cache_size).serve_forever(host, port)
+    
+    def generate_report(self, force_analysis=False, workers=None):
         """
         Generate a connectivity analysis report
         
         Args:
             force_analysis (bool): Force analysis even if cache exists
+            workers (int): Worker processes for centrality (default: CPU count)
         """
-        stats = self.analyze_connectivity(force_analysis=force_analysis)
+        stats = self.analyze_connectivity(force_analysis=force_analysis, workers=workers)
         if stats is None:
             return
             
@@ -383,11 +1924,21 @@ class BangladeshRoadMap:
         print(f"Total Road Segments: {stats['total_edges']:,}")
         print(f"Network Connected: {'Yes' if stats['is_connected'] else 'No'}")
         print(f"Number of Components: {stats['number_of_components']}")
+        if 'largest_component_fraction' in stats:
+            print(f"Largest Component: {stats['largest_component_size']:,} nodes "
+                  f"({stats['largest_component_fraction']:.1%})")
         
         if 'avg_degree_centrality' in stats:
             print(f"Average Degree Centrality: {stats['avg_degree_centrality']:.4f}")
         if 'avg_betweenness_centrality' in stats:
             print(f"Average Betweenness Centrality: {stats['avg_betweenness_centrality']:.4f}")
+        if 'betweenness_sources' in stats:
+            if stats.get('betweenness_exact'):
+                print(f"Betweenness: exact over {stats['betweenness_sources']:,} sources")
+            else:
+                print(f"Betweenness: estimated from {stats['betweenness_sources']:,} sampled sources "
+                      f"(per-node 95% intervals of at most +-{stats.get('betweenness_max_ci_halfwidth', float('nan')):.4f}, "
+                      f"max value {stats.get('max_betweenness_centrality', float('nan')):.4f})")
         
         if 'analysis_date' in stats:
             print(f"Analysis Date: {stats['analysis_date']}")
@@ -398,11 +1949,22 @@ class BangladeshRoadMap:
         """
         Clear all cached data
         """
-        cache_files = [self.graph_cache_file, self.districts_cache_file, self.stats_cache_file]
+        cache_files = [
+            self.networks_dir, self.legacy_graph_cache_dir, self.legacy_graph_cache_file,
+            os.path.join(self.cache_dir, "bangladesh_road_ways"),
+            self.districts_cache_file, self.legacy_stats_cache_file, self.results_cache_dir,
+            self.routing_index_dir, self.gazetteer_file, self.boundaries_dir
+        ]
+        if self.gazetteer is not None:
+            self.gazetteer.close()
+            self.gazetteer = None
         for cache_file in cache_files:
             if os.path.exists(cache_file):
                 try:
-                    os.remove(cache_file)
+                    if os.path.isdir(cache_file):
+                        shutil.rmtree(cache_file)
+                    else:
+                        os.remove(cache_file)
                     print(f"Removed cache file: {cache_file}")
                 except Exception as e:
                     print(f"Error removing cache file {cache_file}: {e}")
@@ -414,27 +1976,66 @@ class BangladeshRoadMap:
         """
         print("\n=== CACHE INFORMATION ===")
         cache_files = {
-            'Road Network': self.graph_cache_file,
+            'Road Networks': self.networks_dir,
             'District Boundaries': self.districts_cache_file,
-            'Connectivity Stats': self.stats_cache_file
+            'Admin Boundaries': self.boundaries_dir,
+            'Analysis Results': self.results_cache_dir,
+            'Routing Index': self.routing_index_dir,
+            'Gazetteer': self.gazetteer_file
         }
         
         for name, file_path in cache_files.items():
             if os.path.exists(file_path):
-                size_mb = os.path.getsize(file_path) / (1024 * 1024)
+                size_mb = directory_size(file_path) / (1024 * 1024)
                 mod_time = datetime.fromtimestamp(os.path.getmtime(file_path))
                 print(f"{name}: Cached ({size_mb:.1f} MB, {mod_time.strftime('%Y-%m-%d %H:%M:%S')})")
             else:
                 print(f"{name}: Not cached")
+            if file_path == self.networks_dir:
+                self._print_cached_networks()
         print("========================\n")
     
-    def run_complete_analysis(self, force_download=False, force_analysis=False):
+    def _print_cached_networks(self):
+        """
+        List the cached networks of every data source, read from their metadata only
+        """
+        for source in self.cached_sources():
+            source_dir = os.path.join(self.networks_dir, source)
+            for name in sorted(os.listdir(source_dir)):
+                path = os.path.join(source_dir, name)
+                if name == 'ways' or not RoadGraphArrays.exists(path):
+                    continue
+                with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                    graph_attrs = json.load(f).get('graph_attrs', {})
+                line = f"  {source}/{name}: {', '.join(graph_attrs.get('network_types', [name]))}"
+                if graph_attrs.get('replication_sequence') is not None:
+                    line += f" (OSM replication sequence {graph_attrs['replication_sequence']})"
+                print(line)
+            if os.path.exists(os.path.join(source_dir, 'ways')):
+                print(f"  {source}/ways: way store for change files")
+    
+    def run_complete_analysis(self, force_download=False, force_analysis=False, tiled=False,
+                              pbf_path=None, streaming=None, boundaries_path=None,
+                              accessibility_path=None, vulnerability_path=None, network_type=None,
+                              workers=None):
         """
         Run the complete road connectivity analysis
         
         Args:
             force_download (bool): Force download even if cache exists
             force_analysis (bool): Force analysis even if cache exists
+            tiled (bool): Write roads as vector tiles instead of embedding them in the HTML
+            pbf_path (str): Local .osm.pbf extract to build the road network from
+            streaming (str): 'inline' or 'sidecar' to stream road layers while writing the map
+            boundaries_path (str): Local district boundary file to import for per-district statistics
+            accessibility_path (str): Write the travel time to nearest district HQ raster here
+                (.tif or .npz) and add it and the HQ isochrones to the map
+            vulnerability_path (str): Write the ranked critical link table here (CSV)
+                and add the most critical links to the map
+            network_type (str): Network to analyse ('drive', 'walk', 'bike', 'all'; default: current)
+            workers (int): Worker processes for centrality, travel times and critical links
+                (default: CPU count); above 1, per-tile statistics are written too and
+                the map road layers are built tile by tile across this many processes
         """
         print("Starting Bangladesh Road Connectivity Analysis...")
         
@@ -444,19 +2045,67 @@ class BangladeshRoadMap:
         if not force_download:
             print("Using cached data when available. Use force_download=True to refresh data.\n")
         
-        # Download road network
-        if not self.download_road_network(force_download=force_download):
+        if boundaries_path is not None:
+            self.load_boundaries(boundaries_path, level='district')
+        
+        # Fetch road network, districts and city locations concurrently
+        with self.profiler.stage('acquire'):
+            downloaded = self.acquire_data(network_type=network_type, force_download=force_download,
+                                           pbf_path=pbf_path)
+        if not downloaded:
             print("Failed to download road network. Exiting.")
             return
+
+        # Generate analysis report
+        with self.profiler.stage('report'):
+            self.generate_report(force_analysis=force_analysis, workers=workers)
         
-        # Download districts (optional)
-        self.download_districts(force_download=force_download)
+        # Per-district statistics, once district polygons have been imported
+        if os.path.exists(self.boundary_cache_file('district')):
+            district_stats = self.road_stats_by_area('district')
+            if district_stats is not None:
+                district_stats.to_csv("district_road_stats.csv", index=False)
+                print("\nDensest districts (road km per km²):")
+                densest = district_stats.nlargest(10, 'road_density')
+                print(densest[['name', 'road_km', 'road_density', 'components']].to_string(index=False))
+                print("Per-district statistics saved to 'district_road_stats.csv'")
         
-        # Generate analysis report
-        self.generate_report(force_analysis=force_analysis)
+        # Per-tile statistics across the worker pool
+        if workers is not None and workers > 1:
+            with self.profiler.stage('tiles', workers=workers):
+                tile_stats = self.analyze_tiles(workers=workers)
+            if tile_stats is not None:
+                tile_stats.to_csv("tile_road_stats.csv", index=False)
+                print("Per-tile statistics saved to 'tile_road_stats.csv'")
+        
+        isochrones = raster = None
+        if accessibility_path is not None:
+            with self.profiler.stage('accessibility'):
+                isochrones = self.compute_isochrones(workers=workers)
+                raster = self.accessibility_grid()
+            try:
+                from accessibility import save_raster
+                save_raster(raster, accessibility_path)
+                print(f"Accessibility raster saved to {accessibility_path}")
+            except Exception as e:
+                print(f"Error saving accessibility raster: {e}")
+        
+        vulnerability = None
+        if vulnerability_path is not None:
+            with self.profiler.stage('vulnerability'):
+                vulnerability = self.vulnerability_analysis(workers=workers)
+            if vulnerability is not None:
+                vulnerability.to_csv(vulnerability_path, index=False)
+                print("\nMost critical links:")
+                print(vulnerability[['rank', 'name', 'highway', 'bridge', 'nodes_cut_off', 'hqs_cut_off',
+                                     'added_travel_min']].head(10).to_string(index=False))
+                print(f"Critical link table saved to '{vulnerability_path}'")
         
         # Create interactive map
-        map_obj = self.create_interactive_map()
+        with self.profiler.stage('map'):
+            map_obj = self.create_interactive_map(tiled=tiled, streaming=streaming, workers=workers,
+                                                  isochrones=isochrones, accessibility=raster,
+                                                  vulnerability=vulnerability)
         
         print("\nAnalysis complete!")
         print("Check 'bangladesh_road_map.html' for the interactive map.")
@@ -482,7 +2131,47 @@ def main():
                        help='Show cache information and exit')
     parser.add_argument('--network-type', default='drive', 
                        choices=['drive', 'walk', 'bike', 'all'],
-                       help='Type of network to download (default: drive)')
+                       help='Type of network to analyse; all types share one cached download (default: drive)')
+    parser.add_argument('--pbf', metavar='PATH',
+                       help='Build the road network from a local .osm.pbf extract instead of Overpass')
+    parser.add_argument('--apply-changes', metavar='DIR',
+                       help='Apply the OSM change files (.osc/.osc.gz) in DIR to the cached road network and exit')
+    parser.add_argument('--boundaries', metavar='PATH',
+                       help='Import district polygons from a local boundary file for per-district statistics')
+    parser.add_argument('--accessibility', nargs='?', const='bangladesh_accessibility.npz', metavar='PATH',
+                       help='Add district HQ isochrones and a travel time raster to the map and save the '
+                            'raster to PATH (.tif needs rasterio; default: bangladesh_accessibility.npz)')
+    parser.add_argument('--export-parquet', metavar='DIR',
+                       help='Export nodes and edges as partitioned GeoParquet to DIR and exit')
+    parser.add_argument('--vulnerability', nargs='?', const='critical_links.csv', metavar='CSV',
+                       help='Rank bridges and busy links by the damage their loss does, write the table to CSV '
+                            '(default: critical_links.csv) and add the most critical links to the map')
+    parser.add_argument('--serve', nargs='?', const=8000, type=int, metavar='PORT',
+                       help='Serve stats, routes and regional GeoJSON over a local HTTP API on PORT '
+                            '(default: 8000) until interrupted')
+    parser.add_argument('--host', default='127.0.0.1',
+                       help='Interface the --serve API listens on (default: 127.0.0.1)')
+    parser.add_argument('--workers', type=int, metavar='N',
+                       help='Worker processes for centrality, travel times, critical links and --serve '
+                            'queries (default: CPU count); above 1, also writes per-tile statistics and '
+                            'builds the map road layers tile by tile')
+    parser.add_argument('--partition-by', default='highway', choices=['highway', 'district'],
+                       help='Partition key of the GeoParquet export (default: highway)')
+    parser.add_argument('--tiled', action='store_true',
+                       help='Write roads as zoom-dependent vector tiles loaded lazily by the map')
+    parser.add_argument('--stream', choices=['inline', 'sidecar'],
+                       help='Stream road layers into the HTML (inline) or sidecar GeoJSON files '
+                            'instead of building them in memory')
+    parser.add_argument('--profile', metavar='PATH',
+                       help='Write per-stage timing and memory spans to PATH')
+    parser.add_argument('--profile-format', default='jsonl', choices=['jsonl', 'chrome'],
+                       help='Span output format: JSON lines or Chrome trace (default: jsonl)')
+    parser.add_argument('--trace-memory', action='store_true',
+                       help='Record peak Python allocations per stage with tracemalloc (slower)')
+    parser.add_argument('--profile-stage', metavar='NAME',
+                       help='Run one stage (e.g. compute:betweenness) under a function-level profiler')
+    parser.add_argument('--profile-tool', default='cprofile', choices=['cprofile', 'pyinstrument'],
+                       help='Function-level profiler for --profile-stage (default: cprofile)')
     
     args = parser.parse_args()
     
@@ -498,11 +2187,47 @@ def main():
         analyzer.get_cache_info()
         return
     
+    if args.apply_changes:
+        analyzer.select_network(args.network_type, network_source(args.pbf) if args.pbf else None)
+        analyzer.apply_osm_changes(args.apply_changes)
+        return
+    
+    if args.serve:
+        analyzer.serve(host=args.host, port=args.serve, workers=args.workers,
+                       network_type=args.network_type, pbf_path=args.pbf)
+        return
+    
+    if args.export_parquet:
+        if args.boundaries:
+            analyzer.load_boundaries(args.boundaries, level='district')
+        if analyzer.download_road_network(network_type=args.network_type, pbf_path=args.pbf):
+            analyzer.export_parquet(args.export_parquet, by=args.partition_by)
+        return
+    
+    if args.profile:
+        analyzer.profiler = Profiler(
+            args.profile, fmt=args.profile_format, trace_memory=args.trace_memory,
+            profile_stage=args.profile_stage, profile_tool=args.profile_tool
+        )
+    analyzer.profiler.start()
+    
     # Run complete analysis
-    analyzer.run_complete_analysis(
-        force_download=args.force_download,
-        force_analysis=args.force_analysis
-    )
+    try:
+        with analyzer.profiler.stage('run_complete_analysis'):
+            analyzer.run_complete_analysis(
+                force_download=args.force_download,
+                force_analysis=args.force_analysis,
+                tiled=args.tiled,
+                pbf_path=args.pbf,
+                streaming=args.stream,
+                boundaries_path=args.boundaries,
+                accessibility_path=args.accessibility,
+                vulnerability_path=args.vulnerability,
+                network_type=args.network_type,
+                workers=args.workers
+            )
+    finally:
+        analyzer.profiler.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Routing Benchmark
+Compares contraction hierarchy point-to-point queries with nx.shortest_path.
+
+Runs offline on the bundled sample extract by default, on a synthetic
+street grid with --synthetic, or on the cached national graph with --cache.
+Routes use free-flow travel time like the analyzer, or length with
+--weight length. Every query is checked against the NetworkX route cost
+before timings are reported.
+
+Usage:
+    python benchmarks/benchmark_routing.py
+    python benchmarks/benchmark_routing.py --synthetic 150 --queries 100
+    python benchmarks/benchmark_routing.py --cache data_cache/networks/overpass/base --queries 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contraction import ContractionHierarchy
+from road_graph_store import RoadGraphArrays
+from routing import edge_travel_times
+
+SAMPLE_PBF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "sample_data", "synthetic_dhaka_grid.osm.pbf")
+
+
+def load_road_arrays(cache_path=None, pbf_path=SAMPLE_PBF, network_type='drive'):
+    """
+    Road arrays from the graph cache, or ingested from a PBF extract
+
+    A cached base graph (data_cache/networks/<source>/base) holds every
+    network type; the network_type view of it is returned.
+    """
+    if cache_path:
+        road_arrays = RoadGraphArrays.load(cache_path)
+        if road_arrays.edge_networks is not None:
+            road_arrays = road_arrays.network_view(network_type)
+        return road_arrays
+    from pbf_ingest import ingest_pbf
+
+    return ingest_pbf(pbf_path)
+
+
+def run_benchmark(road_arrays, n_queries=200, seed=0, weight='time'):
+    """
+    Time index build, CH queries and nx.shortest_path on random node pairs
+
+    Args:
+        weight (str): 'time' (free-flow travel time, seconds) or 'length' (metres)
+
+    Returns:
+        dict: Timings in seconds and the largest route cost mismatch
+    """
+    if weight == 'time':
+        costs = edge_travel_times(road_arrays)
+    elif weight == 'length':
+        costs = np.asarray(road_arrays.edge_length)
+    else:
+        raise ValueError(f"Unknown routing weight: {weight}")
+    costs = np.maximum(costs, 1e-3)
+
+    start = time.perf_counter()
+    index = ContractionHierarchy.build(
+        road_arrays.n_nodes, road_arrays.edge_sources(), road_arrays.indices, costs
+    )
+    build_s = time.perf_counter() - start
+
+    G = road_arrays.to_networkx()
+    node_ids = np.asarray(road_arrays.node_ids)
+    src = road_arrays.edge_sources()
+    for i, cost in enumerate(costs.tolist()):
+        G[node_ids[src[i]]][node_ids[road_arrays.indices[i]]][int(road_arrays.edge_key[i])]['cost'] = cost
+    rng = np.random.default_rng(seed)
+    pairs = rng.integers(0, road_arrays.n_nodes, size=(n_queries, 2)).tolist()
+
+    # Each method runs in its own loop so that one does not evict the other's caches
+    start = time.perf_counter()
+    for source, target in pairs:
+        index.distance(source, target)
+    distance_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    route_costs = [index.path(source, target)[0] for source, target in pairs]
+    ch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    paths = []
+    for source, target in pairs:
+        try:
+            paths.append(nx.shortest_path(G, node_ids[source], node_ids[target], weight='cost'))
+        except nx.NetworkXNoPath:
+            paths.append(None)
+    nx_s = time.perf_counter() - start
+
+    max_error = 0.0
+    routed = 0
+    for (source, target), cost, path in zip(pairs, route_costs, paths):
+        if path is None:
+            if cost != float('inf'):
+                raise AssertionError(f"CH found a route where NetworkX did not: {source} -> {target}")
+            continue
+        nx_cost = sum(min(d['cost'] for d in G[u][v].values()) for u, v in zip(path[:-1], path[1:]))
+        max_error = max(max_error, abs(cost - nx_cost))
+        routed += 1
+
+    return {
+        'nodes': road_arrays.n_nodes,
+        'edges': road_arrays.n_edges,
+        'shortcut_edges': len(index.forward[1]) + len(index.backward[1]) - road_arrays.n_edges,
+        'queries': n_queries,
+        'routed': routed,
+        'build_s': build_s,
+        'ch_distance_ms': 1000 * distance_s / n_queries,
+        'ch_query_ms': 1000 * ch_s / n_queries,
+        'nx_query_ms': 1000 * nx_s / n_queries,
+        'max_error': max_error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark contraction hierarchy routing")
+    parser.add_argument('--cache', help='Columnar graph cache directory (default: sample PBF)')
+    parser.add_argument('--pbf', default=SAMPLE_PBF, help='PBF extract to ingest')
+    parser.add_argument('--synthetic', type=int, metavar='GRID_SIZE',
+                        help='Route on a synthetic GRID_SIZE x GRID_SIZE street grid instead')
+    parser.add_argument('--network-type', default='drive',
+                        help='Network type to route on when --cache is a base graph (default: drive)')
+    parser.add_argument('--weight', choices=['time', 'length'], default='time',
+                        help='Edge cost to route on (default: time)')
+    parser.add_argument('--queries', type=int, default=200, help='Random queries to run')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from synthetic_graphs import synthetic_road_arrays
+
+        road_arrays = synthetic_road_arrays(args.synthetic)
+    else:
+        road_arrays = load_road_arrays(args.cache, args.pbf, args.network_type)
+    result = run_benchmark(road_arrays, args.queries, weight=args.weight)
+    print(f"Graph: {result['nodes']} nodes, {result['edges']} edges "
+          f"(+{result['shortcut_edges']} shortcuts)")
+    print(f"Index build: {result['build_s']:.2f}s")
+    print(f"CH distance: {result['ch_distance_ms']:.3f} ms")
+    print(f"CH path: {result['ch_query_ms']:.3f} ms")
+    print(f"nx.shortest_path: {result['nx_query_ms']:.3f} ms")
+    print(f"Speedup: {result['nx_query_ms'] / result['ch_query_ms']:.1f}x "
+          f"({result['routed']}/{result['queries']} routed, max error {result['max_error']:.2e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup Check
+Asserts that the lightweight CLI commands stay fast and never load the geospatial stack.
+
+Each command runs in a fresh interpreter inside a scratch directory. The
+check fails (exit status 1) if any heavy module ends up in sys.modules or
+the median wall time over several runs exceeds the budget. Suitable for CI
+and for cron health checks of the deployment itself.
+
+Usage:
+    python benchmarks/check_startup.py
+    python benchmarks/check_startup.py --budget 0.3 --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = [
+    'osmnx', 'folium', 'branca', 'geopandas', 'pandas', 'networkx',
+    'shapely', 'pyproj', 'scipy', 'matplotlib', 'sklearn', 'osmium',
+]
+LIGHT_COMMANDS = [['--cache-info'], ['--clear-cache']]
+DEFAULT_BUDGET_S = 0.5
+
+# Runs main() like the CLI would, then reports which heavy modules were imported
+PROBE = """
+import json, sys
+sys.path.insert(0, {repo!r})
+sys.argv = ['bangladesh_road_map.py'] + {args!r}
+import bangladesh_road_map
+bangladesh_road_map.main()
+heavy = sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r}))
+print('STARTUP_MODULES ' + json.dumps(heavy))
+"""
+
+
+def heavy_imports(args, workdir):
+    """
+    Heavy top-level packages imported while running the CLI with args
+    """
+    probe = PROBE.format(repo=REPO_DIR, args=args, heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, '-c', probe], cwd=workdir,
+                          capture_output=True, text=True, check=True)
+    line = next(l for l in proc.stdout.splitlines() if l.startswith('STARTUP_MODULES '))
+    return json.loads(line[len('STARTUP_MODULES '):])
+
+
+def wall_time(args, workdir, runs):
+    """
+    Median wall time of running the script with args, in seconds
+    """
+    script = os.path.join(REPO_DIR, 'bangladesh_road_map.py')
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script] + args, cwd=workdir,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI startup time and imports")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_S,
+                        help=f'Maximum median wall time in seconds (default: {DEFAULT_BUDGET_S})')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per command')
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix='bd_startup_') as workdir:
+        for command in LIGHT_COMMANDS:
+            label = ' '.join(command)
+            heavy = heavy_imports(command, workdir)
+            median = wall_time(command, workdir, args.runs)
+            ok = not heavy and median <= args.budget
+            failures += not ok
+            print(f"{label:<14} {median * 1000:6.0f} ms (budget {args.budget * 1000:.0f} ms)  "
+                  f"heavy imports: {', '.join(heavy) or 'none'}  {'OK' if ok else 'FAIL'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark Suite
+Times each stage of the analysis pipeline on sample and synthetic road graphs.
+
+Every (graph, stage) pair runs in a fresh Python process inside a scratch
+directory, so peak RSS is measured per stage and no state leaks between
+runs. Stages of one graph share the scratch directory's data_cache, just
+like consecutive runs of bangladesh_road_map.py. Everything runs offline:
+the sample graph is ingested from the bundled PBF extract, synthetic grids
+are generated, and city markers come from the gazetteer.
+
+Results (wall time, CPU time, peak RSS and output size) are written as
+JSON and can be compared against a stored baseline; regressions beyond the
+tolerance are flagged and make the script exit with status 1.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --graphs synthetic-large --stages analyze,route
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --tolerance 0.3
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+SAMPLE_PBF = os.path.join(REPO_DIR, "sample_data", "synthetic_dhaka_grid.osm.pbf")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+# Graph name -> synthetic grid size (None: the bundled sample extract)
+GRAPHS = {
+    'sample': None,
+    'synthetic-small': 30,
+    'synthetic-medium': 100,
+    'synthetic-large': 250,
+}
+DEFAULT_GRAPHS = ['sample', 'synthetic-small', 'synthetic-medium']
+STAGES = ['acquire', 'analyze', 'map', 'stream', 'tiles', 'route', 'region']
+
+# Regressions are only flagged above these absolute differences, to ignore noise
+MIN_WALL_DIFF_S = 0.1
+MIN_RSS_DIFF_MB = 10
+COMPARED_METRICS = [('wall_s', MIN_WALL_DIFF_S), ('peak_rss_mb', MIN_RSS_DIFF_MB),
+                    ('output_bytes', 0)]
+
+
+def path_size(path):
+    """
+    Size of a file, or of all files below a directory, in bytes (0 if missing)
+    """
+    if not os.path.exists(path):
+        return 0
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path) for name in files
+    )
+
+
+def max_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def stage_acquire(analyzer, graph, workers):
+    if GRAPHS[graph] is None:
+        analyzer.download_road_network(pbf_path=SAMPLE_PBF)
+    else:
+        analyzer.save_graph_to_cache()
+        analyzer.load_cached_graph()
+    return [analyzer.graph_cache_dir], {}
+
+
+def stage_analyze(analyzer, graph, workers):
+    analyzer.analyze_connectivity(force_analysis=True, workers=workers)
+    return [analyzer.results_cache_dir], {}
+
+
+def stage_map(analyzer, graph, workers):
+    analyzer.create_interactive_map(save_path="benchmark_map.html", workers=workers)
+    return ["benchmark_map.html"], {}
+
+
+def stage_stream(analyzer, graph, workers):
+    analyzer.create_interactive_map(save_path="benchmark_stream_map.html", streaming='inline')
+    return ["benchmark_stream_map.html"], {}
+
+
+def stage_tiles(analyzer, graph, workers):
+    analyzer.create_interactive_map(save_path="benchmark_tiled_map.html", tiled=True, workers=workers)
+    return ["benchmark_tiled_map.html", "benchmark_tiled_map_tiles"], {}
+
+
+def stage_route(analyzer, graph, workers, n_queries=100):
+    import numpy as np
+
+    analyzer.build_routing_index('time')
+    node_ids = np.asarray(analyzer.get_road_arrays().node_ids)
+    pairs = np.random.default_rng(0).integers(0, len(node_ids), size=(n_queries, 2))
+    start = time.perf_counter()
+    for source, target in pairs:
+        analyzer.route(int(node_ids[source]), int(node_ids[target]))
+    query_ms = 1000 * (time.perf_counter() - start) / n_queries
+    return [analyzer.routing_index_dir], {'route_query_ms': query_ms}
+
+
+def stage_region(analyzer, graph, workers, n_queries=100):
+    import numpy as np
+
+    analyzer.get_spatial_index(edges=False)
+    road_arrays = analyzer.get_road_arrays()
+    x = np.asarray(road_arrays.node_x)
+    y = np.asarray(road_arrays.node_y)
+    # Circles around random nodes with a radius of a tenth of the network extent
+    radius = 11132 * max(np.ptp(x), np.ptp(y)) / 10
+    centers = np.random.default_rng(0).integers(0, len(x), size=n_queries)
+    start = time.perf_counter()
+    for node in centers:
+        analyzer.extract_region(center=(y[node], x[node]), radius=radius, highway=['primary', 'secondary'])
+    query_ms = 1000 * (time.perf_counter() - start) / n_queries
+    return [], {'region_query_ms': query_ms}
+
+
+STAGE_FUNCTIONS = {
+    'acquire': stage_acquire,
+    'analyze': stage_analyze,
+    'map': stage_map,
+    'stream': stage_stream,
+    'tiles': stage_tiles,
+    'route': stage_route,
+    'region': stage_region,
+}
+
+
+def run_stage(graph, stage, workers=None):
+    """
+    Run one stage in the current process (the child side of run_suite)
+
+    The graph is prepared outside the timed region: synthetic arrays are
+    generated for 'acquire', every other stage loads the cached graph.
+    """
+    from bangladesh_road_map import BangladeshRoadMap
+
+    analyzer = BangladeshRoadMap()
+    if stage == 'acquire':
+        if GRAPHS[graph] is not None:
+            from synthetic_graphs import synthetic_road_arrays
+
+            analyzer.road_arrays = synthetic_road_arrays(GRAPHS[graph])
+    elif not analyzer.load_cached_graph():
+        raise RuntimeError("No cached graph; run the acquire stage first")
+
+    setup_rss = max_rss_mb()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    outputs, extra = STAGE_FUNCTIONS[stage](analyzer, graph, workers)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    road_arrays = analyzer.get_road_arrays()
+    result = {
+        'graph': graph,
+        'stage': stage,
+        'nodes': int(road_arrays.n_nodes),
+        'edges': int(road_arrays.n_edges),
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'setup_rss_mb': setup_rss,
+        'peak_rss_mb': max_rss_mb(),
+        'peak_child_rss_mb': max_rss_mb(resource.RUSAGE_CHILDREN),
+        'output_bytes': sum(path_size(path) for path in outputs),
+    }
+    result.update(extra)
+    return result
+
+
+def run_suite(graphs, stages, workers=None, keep_workdir=False):
+    """
+    Run every stage of every graph, each in a fresh subprocess
+
+    Returns:
+        list: One result dict per (graph, stage); failed runs carry an 'error'
+    """
+    results = []
+    for graph in graphs:
+        workdir = tempfile.mkdtemp(prefix=f"bd_benchmark_{graph}_")
+        try:
+            for stage in stages:
+                command = [sys.executable, os.path.abspath(__file__), '--child', graph, stage]
+                if workers:
+                    command += ['--workers', str(workers)]
+                print(f"Running {graph} / {stage}...", flush=True)
+                proc = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+                lines = [l for l in proc.stdout.splitlines() if l.startswith(RESULT_PREFIX)]
+                if proc.returncode != 0 or not lines:
+                    tail = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+                    print(f"  failed: {' | '.join(tail)}")
+                    results.append({'graph': graph, 'stage': stage, 'error': '\n'.join(tail)})
+                    continue
+                result = json.loads(lines[-1][len(RESULT_PREFIX):])
+                print(f"  {result['wall_s']:.2f}s wall, {result['peak_rss_mb']:.0f} MB peak RSS, "
+                      f"{result['output_bytes'] / 1024:.0f} KB output")
+                results.append(result)
+        finally:
+            if keep_workdir:
+                print(f"Kept scratch directory {workdir}")
+            else:
+                shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25):
+    """
+    Flag metrics that grew by more than the tolerance since the baseline
+
+    Returns:
+        list: (graph, stage, metric, baseline value, new value) regressions
+    """
+    previous = {(r['graph'], r['stage']): r for r in baseline.get('results', []) if 'error' not in r}
+    regressions = []
+    print(f"\n{'graph':<18} {'stage':<8} {'metric':<13} {'baseline':>10} {'current':>10} {'change':>8}")
+    for result in results:
+        before = previous.get((result['graph'], result['stage']))
+        if before is None or 'error' in result:
+            continue
+        for metric, min_diff in COMPARED_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            regressed = change > tolerance and new - old > min_diff
+            flag = '  REGRESSION' if regressed else ''
+            print(f"{result['graph']:<18} {result['stage']:<8} {metric:<13} "
+                  f"{old:>10.2f} {new:>10.2f} {change:>+7.0%}{flag}")
+            if regressed:
+                regressions.append((result['graph'], result['stage'], metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the road analysis pipeline offline")
+    parser.add_argument('--graphs', default=','.join(DEFAULT_GRAPHS),
+                        help=f"Comma-separated graphs from: {', '.join(GRAPHS)}")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"Comma-separated stages from: {', '.join(STAGES)}")
+    parser.add_argument('--workers', type=int, help='Worker processes for parallel stages')
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write results')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline results to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative growth per metric')
+    parser.add_argument('--keep-workdir', action='store_true', help='Keep the scratch directories')
+    parser.add_argument('--child', nargs=2, metavar=('GRAPH', 'STAGE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_stage(*args.child, workers=args.workers)
+        print(RESULT_PREFIX + json.dumps(result), flush=True)
+        return 0
+
+    graphs = [g for g in args.graphs.split(',') if g]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = [g for g in graphs if g not in GRAPHS] + [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown graph or stage: {', '.join(unknown)}")
+    # Later stages read the cache the acquire stage writes
+    if 'acquire' not in stages:
+        stages = ['acquire'] + stages
+
+    results = run_suite(graphs, stages, workers=args.workers, keep_workdir=args.keep_workdir)
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            return 1
+        print("\nNo regressions against the baseline")
+    else:
+        print("No baseline found; run with --save-baseline to create one")
+    return 1 if any('error' in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Administrative Boundaries
+District and upazila polygons from a local boundary file, and road statistics per area.
+
+Boundary files (GeoJSON, shapefile, GeoPackage, ...) such as the HDX/OCHA
+or GADM administrative levels for Bangladesh are normalised to a name
+column plus the parent division/district and cached as GeoParquet, which
+loads in a fraction of the time of the original file.
+
+Edges are assigned to areas by their midpoint with one bulk STRtree query
+over all polygons, so the join stays vectorised at national scale. Road
+statistics are then plain bincounts over the area and highway class codes.
+"""
+
+import numpy as np
+
+LEVELS = ['district', 'upazila']
+
+# Candidate name columns of common Bangladesh boundary datasets, by level
+NAME_COLUMNS = {
+    'division': ['ADM1_EN', 'NAME_1', 'DIVISION', 'division', 'Division'],
+    'district': ['ADM2_EN', 'NAME_2', 'DISTRICT', 'district', 'District', 'shapeName', 'name'],
+    'upazila': ['ADM3_EN', 'NAME_3', 'UPAZILA', 'upazila', 'Upazila', 'shapeName', 'name'],
+}
+PARENT_LEVELS = {
+    'district': ['division'],
+    'upazila': ['division', 'district'],
+}
+
+# Equal-area CRS for polygon areas
+AREA_CRS = "EPSG:6933"
+
+
+def _first_column(columns, candidates):
+    return next((c for c in candidates if c in columns), None)
+
+
+def load_boundary_file(path, level='district', name_column=None, layer=None):
+    """
+    Read administrative polygons from a local file
+
+    Args:
+        path (str): Any file geopandas can read
+        level (str): 'district' or 'upazila'
+        name_column (str): Column with the area names (default: detected)
+        layer (str): Layer to read from multi-layer files such as GeoPackages
+
+    Returns:
+        GeoDataFrame: name, parent division (and district for upazilas) and
+        geometry columns in EPSG:4326
+    """
+    import geopandas as gpd
+    import shapely
+
+    if level not in LEVELS:
+        raise ValueError(f"Unknown boundary level {level!r}; expected one of {', '.join(LEVELS)}")
+    gdf = gpd.read_file(path, layer=layer) if layer else gpd.read_file(path)
+    gdf = gdf.set_crs(4326) if gdf.crs is None else gdf.to_crs(4326)
+
+    name_column = name_column or _first_column(gdf.columns, NAME_COLUMNS[level])
+    if name_column is None:
+        raise ValueError(f"No {level} name column found in {path}; pass name_column")
+    columns = {'name': gdf[name_column].astype(str).values}
+    for parent in PARENT_LEVELS[level]:
+        column = _first_column(gdf.columns, [c for c in NAME_COLUMNS[parent] if c != name_column])
+        if column is not None:
+            columns[parent] = gdf[column].astype(str).values
+
+    geometry = gdf.geometry.values
+    invalid = ~shapely.is_valid(geometry)
+    if invalid.any():
+        geometry = geometry.copy()
+        geometry[invalid] = shapely.make_valid(geometry[invalid])
+    return gpd.GeoDataFrame(columns, geometry=geometry, crs=4326)
+
+
+def assign_points(x, y, polygons):
+    """
+    Index of the polygon containing each point, from one bulk STRtree query
+
+    Points outside every polygon (e.g. on a coastline the polygons simplify
+    away) are assigned to the nearest polygon.
+
+    Args:
+        x, y (array-like): Point longitudes and latitudes
+        polygons (array-like): Shapely polygons in the same CRS
+
+    Returns:
+        ndarray: Polygon index per point
+    """
+    import shapely
+    from shapely.strtree import STRtree
+
+    polygons = np.asarray(polygons)
+    points = shapely.points(np.asarray(x), np.asarray(y))
+    assigned = np.full(len(points), -1, dtype=np.int64)
+    # Querying a tree of the points with the polygons prepares each polygon once
+    polygon_idx, point_idx = STRtree(points).query(polygons, predicate='intersects')
+    assigned[point_idx] = polygon_idx
+
+    outside = np.flatnonzero(assigned < 0)
+    if len(outside):
+        nearest_point, nearest_polygon = STRtree(polygons).query_nearest(points[outside], all_matches=False)
+        assigned[outside[nearest_point]] = nearest_polygon
+    return assigned
+
+
+def edge_areas(road_arrays, polygons):
+    """
+    Area index of every edge, by the midpoint between its end nodes
+    """
+    x = np.asarray(road_arrays.node_x)
+    y = np.asarray(road_arrays.node_y)
+    src = road_arrays.edge_sources()
+    dst = np.asarray(road_arrays.indices)
+    return assign_points((x[src] + x[dst]) / 2, (y[src] + y[dst]) / 2, polygons)
+
+
+def road_stats_by_area(road_arrays, areas_gdf, chunk_size=1000000):
+    """
+    Road length by class, road density and connectivity of every area
+
+    Two-way streets are counted once. Components are those of the roads
+    inside each area on their own, so a district split by a river without
+    bridges in its own territory reports two.
+
+    Args:
+        road_arrays (RoadGraphArrays): Road network
+        areas_gdf (GeoDataFrame): Area polygons in EPSG:4326 with a name column
+        chunk_size (int): Edges deduplicated at once
+
+    Returns:
+        DataFrame: One row per area with area_km2, nodes, road_segments,
+        road_km, road_density (km per km²), components and <class>_km columns
+    """
+    import pandas as pd
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    from map_stream import drawn_edge_mask
+
+    n_areas = len(areas_gdf)
+    n_nodes = road_arrays.n_nodes
+    n_edges = road_arrays.n_edges
+    classes = road_arrays.highway_classes
+    edge_area = edge_areas(road_arrays, areas_gdf.geometry.values)
+
+    drawn = np.concatenate([
+        drawn_edge_mask(road_arrays, start, min(start + chunk_size, n_edges))
+        for start in range(0, n_edges, chunk_size)
+    ]) if n_edges else np.zeros(0, dtype=bool)
+    area = edge_area[drawn]
+    highway = np.asarray(road_arrays.edge_highway)[drawn]
+    length = np.nan_to_num(np.asarray(road_arrays.edge_length)[drawn])
+    class_km = np.bincount(
+        area * len(classes) + highway, weights=length, minlength=n_areas * len(classes)
+    ).reshape(n_areas, len(classes)) / 1000
+
+    # One graph item per (area, node) pair, so components never leave an area
+    src = road_arrays.edge_sources()
+    dst = np.asarray(road_arrays.indices)
+    keys = np.concatenate([edge_area * n_nodes + src, edge_area * n_nodes + dst])
+    items, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+    graph = coo_matrix(
+        (np.ones(n_edges, dtype=np.int8), (inverse[:n_edges], inverse[n_edges:])),
+        shape=(len(items), len(items))
+    )
+    n_components, labels = connected_components(graph, directed=False)
+    item_area = items // max(n_nodes, 1)
+    component_area = np.zeros(n_components, dtype=np.int64)
+    component_area[labels] = item_area
+
+    area_km2 = areas_gdf.geometry.to_crs(AREA_CRS).area.values / 1e6
+    road_km = class_km.sum(axis=1)
+    stats = pd.DataFrame({
+        column: areas_gdf[column].values
+        for column in ['name', 'division', 'district'] if column in areas_gdf.columns
+    })
+    stats['area_km2'] = area_km2
+    stats['nodes'] = np.bincount(item_area, minlength=n_areas)
+    stats['road_segments'] = np.bincount(area, minlength=n_areas)
+    stats['road_km'] = road_km
+    stats['road_density'] = np.divide(road_km, area_km2, out=np.zeros(n_areas), where=area_km2 > 0)
+    stats['components'] = np.bincount(component_area, minlength=n_areas)
+    for code, highway_type in enumerate(classes):
+        if class_km[:, code].any():
+            stats[f"{highway_type}_km"] = class_km[:, code]
+    return stats
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Road Network Connectivity
+Array-based connected component labelling over the cached edge arrays.
+
+Components are found with scipy.sparse.csgraph.connected_components over a
+sparse matrix of the edge pairs. Edge direction is ignored, matching
+nx.connected_components on the undirected road graph.
+
+Degree and component results can also be updated incrementally from the
+result for a previous version of the graph: only the components touched by
+removed edges or nodes are relabelled, and degrees are patched with the
+added and removed edges.
+"""
+
+import numpy as np
+
+
+def component_ids(n_items, sources, targets):
+    """
+    Component of every item after joining each (source, target) pair
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    graph = coo_matrix(
+        (np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n_items, n_items)
+    )
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def labels_by_size(roots):
+    """
+    Renumber component ids so that components are ordered from largest to smallest
+    """
+    _, labels, sizes = np.unique(roots, return_inverse=True, return_counts=True)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.argsort(-sizes, kind='stable')] = np.arange(len(sizes))
+    return rank[labels.ravel()]
+
+
+def component_labels(n_nodes, sources, targets):
+    """
+    Label every node with its connected component
+
+    Args:
+        n_nodes (int): Number of nodes
+        sources (ndarray): Edge source node positions
+        targets (ndarray): Edge target node positions
+
+    Returns:
+        ndarray: Component label per node; label 0 is the largest component
+    """
+    return labels_by_size(component_ids(n_nodes, sources, targets))
+
+
+def component_summary(labels):
+    """
+    Component count and size distribution from a label array
+
+    Returns:
+        dict: number_of_components, is_connected, largest_component_size,
+        largest_component_fraction and component_size_distribution
+        (component size -> number of components of that size)
+    """
+    sizes = np.bincount(labels) if len(labels) else np.zeros(0, dtype=np.int64)
+    size_values, size_counts = np.unique(sizes, return_counts=True)
+    largest = int(sizes.max()) if len(sizes) else 0
+    return {
+        'number_of_components': int(len(sizes)),
+        'is_connected': len(sizes) == 1,
+        'largest_component_size': largest,
+        'largest_component_fraction': largest / len(labels) if len(labels) else 0.0,
+        'component_size_distribution': {
+            int(s): int(c) for s, c in zip(size_values, size_counts)
+        },
+    }
+
+
+def undirected_pairs(node_ids, sources, targets):
+    """
+    Unique (smaller id, larger id) node id pairs of the undirected graph
+
+    Pairs are deduplicated as one int64 code per pair of node positions
+    (see vulnerability.link_codes), which is much faster than a row-wise
+    np.unique; they come out ordered by those codes.
+
+    Args:
+        node_ids (ndarray): Node ids by position
+        sources (ndarray): Edge source node positions
+        targets (ndarray): Edge target node positions
+
+    Returns:
+        ndarray: (m, 2) int64 array of node id pairs, self-loops dropped
+    """
+    node_ids = np.asarray(node_ids)
+    n_nodes = np.int64(len(node_ids))
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    keep = sources != targets
+    codes = np.unique(np.minimum(sources, targets)[keep] * n_nodes + np.maximum(sources, targets)[keep])
+    a = node_ids[codes // max(n_nodes, 1)].astype(np.int64)
+    b = node_ids[codes % max(n_nodes, 1)].astype(np.int64)
+    return np.column_stack([np.minimum(a, b), np.maximum(a, b)])
+
+
+def _positions(node_ids, ids):
+    """
+    Positions of ids in an unsorted node id array, -1 where missing
+    """
+    node_ids = np.asarray(node_ids)
+    ids = np.asarray(ids)
+    if len(node_ids) == 0:
+        return np.full(ids.shape, -1, dtype=np.int64)
+    order = np.argsort(node_ids, kind='stable')
+    found = order[np.minimum(np.searchsorted(node_ids, ids, sorter=order), len(node_ids) - 1)]
+    return np.where(node_ids[found] == ids, found, -1)
+
+
+def diff_pairs(old_pairs, new_pairs):
+    """
+    Edge pairs added and removed between two versions of the graph
+
+    Returns:
+        tuple: (added, removed) arrays of node id pairs
+    """
+    all_ids = np.union1d(old_pairs.ravel(), new_pairs.ravel())
+    width = np.int64(len(all_ids))
+
+    def codes(pairs):
+        return np.searchsorted(all_ids, pairs[:, 0]) * width + np.searchsorted(all_ids, pairs[:, 1])
+
+    old_codes = codes(old_pairs)
+    new_codes = codes(new_pairs)
+    added = new_pairs[~np.isin(new_codes, old_codes)]
+    removed = old_pairs[~np.isin(old_codes, new_codes)]
+    return added, removed
+
+
+def degree_state(node_ids, pairs):
+    """
+    Undirected degree of every node
+
+    Returns:
+        dict: node_ids and degree arrays
+    """
+    node_ids = np.asarray(node_ids)
+    degree = np.bincount(_positions(node_ids, pairs.ravel()), minlength=len(node_ids))
+    return {'node_ids': node_ids.copy(), 'degree': degree}
+
+
+def update_degree_state(previous, previous_pairs, node_ids, pairs):
+    """
+    Patch a previous degree_state with the edges added and removed since
+
+    Only the endpoints of changed edges are touched.
+    """
+    node_ids = np.asarray(node_ids)
+    added, removed = diff_pairs(previous_pairs, pairs)
+
+    degree = np.zeros(len(node_ids), dtype=np.int64)
+    old_positions = _positions(previous['node_ids'], node_ids)
+    carried = old_positions >= 0
+    degree[carried] = previous['degree'][old_positions[carried]]
+
+    np.add.at(degree, _positions(node_ids, added.ravel()), 1)
+    removed_positions = _positions(node_ids, removed.ravel())
+    np.subtract.at(degree, removed_positions[removed_positions >= 0], 1)
+    return {'node_ids': node_ids.copy(), 'degree': degree}
+
+
+def component_state(node_ids, pairs):
+    """
+    Connected component label of every node
+
+    Returns:
+        dict: node_ids and labels arrays
+    """
+    node_ids = np.asarray(node_ids)
+    labels = component_labels(
+        len(node_ids), _positions(node_ids, pairs[:, 0]), _positions(node_ids, pairs[:, 1])
+    )
+    return {'node_ids': node_ids.copy(), 'labels': labels}
+
+
+def update_component_state(previous, previous_pairs, node_ids, pairs):
+    """
+    Relabel components after a graph update without a full recompute
+
+    Components of the previous graph that lost no edges or nodes are still
+    connected, so each is collapsed to a single item. Only the
+    nodes of damaged components, new nodes and added edges are labelled again.
+    """
+    node_ids = np.asarray(node_ids)
+    old_ids = previous['node_ids']
+    old_labels = previous['labels']
+    added, removed = diff_pairs(previous_pairs, pairs)
+
+    n_old_components = int(old_labels.max()) + 1 if len(old_labels) else 0
+    damaged = np.zeros(n_old_components, dtype=bool)
+    removed_positions = _positions(old_ids, removed.ravel())
+    damaged[old_labels[removed_positions[removed_positions >= 0]]] = True
+    dropped_nodes = _positions(node_ids, old_ids) < 0
+    damaged[old_labels[dropped_nodes]] = True
+
+    # Items: one per intact old component, then one per node needing relabelling
+    old_positions = _positions(old_ids, node_ids)
+    intact = old_positions >= 0
+    intact[intact] = ~damaged[old_labels[old_positions[intact]]]
+    item = np.empty(len(node_ids), dtype=np.int64)
+    item[intact] = old_labels[old_positions[intact]]
+    loose = np.flatnonzero(~intact)
+    item[loose] = n_old_components + np.arange(len(loose))
+
+    u = _positions(node_ids, pairs[:, 0])
+    v = _positions(node_ids, pairs[:, 1])
+    touched = ~intact[u] | ~intact[v]
+    added_u = _positions(node_ids, added[:, 0])
+    added_v = _positions(node_ids, added[:, 1])
+    roots = component_ids(
+        n_old_components + len(loose),
+        np.concatenate([item[u[touched]], item[added_u]]),
+        np.concatenate([item[v[touched]], item[added_v]])
+    )
+    return {'node_ids': node_ids.copy(), 'labels': labels_by_size(roots[item])}
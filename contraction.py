@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Contraction Hierarchy Routing Index
+Preprocesses the directed road graph for fast point-to-point queries.
+
+Nodes are contracted in order of importance (edge difference plus the
+number of already contracted neighbours, re-evaluated lazily when a node
+reaches the top of the queue). Contracting a node adds a shortcut between
+two neighbours whenever a hop-limited witness search finds no path at most
+as cheap that avoids the node. The graph left to contract is held in
+CSR-style edge arrays with free slots for shortcuts, so the witness
+searches never touch per-node dicts. A query is a bidirectional Dijkstra
+that only relaxes edges towards higher-ranked nodes and stalls nodes that
+are reached more cheaply from above, which on road networks settles a
+few hundred nodes instead of the whole graph. Full paths are recovered by
+unpacking shortcuts through their middle node.
+
+The index is stored as two CSR "upward" graphs (forward and backward) plus
+the node ranks in a single .npz file next to the graph cache.
+"""
+
+import heapq
+
+import numpy as np
+
+INF = float('inf')
+
+# Hops a witness search may take from the source. A missed witness only
+# costs a redundant shortcut, but detours along faster roads often take
+# more than a handful of hops, and every redundant shortcut makes later
+# witness searches and queries slower
+WITNESS_HOPS = 20
+# Extra edge slots per node, filled by shortcuts before a node's edges are moved
+EDGE_SLACK = 2
+
+
+def _pack(adjacency):
+    """
+    CSR arrays from a list of [(target, weight, middle), ...] per node
+    """
+    counts = [len(edges) for edges in adjacency]
+    indptr = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    flat = [edge for edges in adjacency for edge in edges]
+    indices = np.array([e[0] for e in flat], dtype=np.int64)
+    weights = np.array([e[1] for e in flat], dtype=np.float64)
+    middle = np.array([e[2] for e in flat], dtype=np.int64)
+    return indptr, indices, weights, middle
+
+
+class _DynamicCSR:
+    """
+    CSR adjacency of the graph left to contract, with free slots for shortcuts
+
+    Node u's edges are targets[first[u]:first[u] + degree[u]]. A node whose
+    slots run out has its edges moved to the end of the arrays with twice
+    the capacity, and removed edges are swapped with the node's last edge.
+    The arrays are Python lists, which are faster to index one element at a
+    time than NumPy arrays.
+    """
+
+    def __init__(self, n_nodes, sources, targets, weights):
+        degree = np.bincount(sources, minlength=n_nodes)
+        capacity = degree + EDGE_SLACK
+        first = np.zeros(n_nodes, dtype=np.int64)
+        np.cumsum(capacity[:-1], out=first[1:])
+        # Edges are sorted by source: slot = node start + rank among its edges
+        slot = first[sources] + np.arange(len(sources)) - np.repeat(np.cumsum(degree) - degree, degree)
+        size = int(capacity.sum())
+        flat_targets = np.full(size, -1, dtype=np.int64)
+        flat_weights = np.zeros(size)
+        flat_targets[slot] = targets
+        flat_weights[slot] = weights
+        self.first = first.tolist()
+        self.degree = degree.tolist()
+        self.capacity = capacity.tolist()
+        self.targets = flat_targets.tolist()
+        self.weights = flat_weights.tolist()
+        self.middle = [-1] * size
+
+    def edges(self, u):
+        """
+        (target, weight, middle node) of every edge of u
+        """
+        start = self.first[u]
+        stop = start + self.degree[u]
+        return list(zip(self.targets[start:stop], self.weights[start:stop], self.middle[start:stop]))
+
+    def find(self, u, v):
+        start = self.first[u]
+        targets = self.targets
+        for i in range(start, start + self.degree[u]):
+            if targets[i] == v:
+                return i
+        return -1
+
+    def add(self, u, v, weight, middle):
+        """
+        Insert the edge u -> v, or lower its weight if it is cheaper than the existing one
+        """
+        i = self.find(u, v)
+        if i >= 0:
+            if weight < self.weights[i]:
+                self.weights[i] = weight
+                self.middle[i] = middle
+            return
+        if self.degree[u] == self.capacity[u]:
+            start, count = self.first[u], self.degree[u]
+            capacity = 2 * count
+            self.first[u] = len(self.targets)
+            self.capacity[u] = capacity
+            self.targets.extend(self.targets[start:start + count] + [-1] * (capacity - count))
+            self.weights.extend(self.weights[start:start + count] + [0.0] * (capacity - count))
+            self.middle.extend(self.middle[start:start + count] + [-1] * (capacity - count))
+        i = self.first[u] + self.degree[u]
+        self.targets[i] = v
+        self.weights[i] = weight
+        self.middle[i] = middle
+        self.degree[u] += 1
+
+    def remove(self, u, v):
+        i = self.find(u, v)
+        if i < 0:
+            return
+        last = self.first[u] + self.degree[u] - 1
+        self.targets[i] = self.targets[last]
+        self.weights[i] = self.weights[last]
+        self.middle[i] = self.middle[last]
+        self.degree[u] -= 1
+
+
+class ContractionHierarchy:
+    def __init__(self, rank, forward, backward, fingerprint=None, weight=None):
+        """
+        Args:
+            rank (ndarray): Contraction order of every node
+            forward (tuple): (indptr, indices, weights, middle) of upward out-edges
+            backward (tuple): (indptr, indices, weights, middle) of upward in-edges
+            fingerprint (str): Fingerprint of the graph the index was built for
+            weight (str): Name of the edge weight the index was built for
+        """
+        self.rank = rank
+        self.forward = forward
+        self.backward = backward
+        self.fingerprint = fingerprint
+        self.weight = weight
+
+        # Tuples of (node, weight) per node make the per-query inner loop
+        # several times faster than indexing the CSR arrays
+        self._up = (self._adjacency(forward), self._adjacency(backward))
+        self._middle = {}
+        for (indptr, indices, _, middle), reverse in ((forward, False), (backward, True)):
+            sources = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+            shortcut = middle >= 0
+            for a, b, m in zip(sources[shortcut].tolist(), indices[shortcut].tolist(),
+                               middle[shortcut].tolist()):
+                self._middle[(b, a) if reverse else (a, b)] = m
+
+    @staticmethod
+    def _adjacency(graph):
+        indptr, indices, weights = (a.tolist() for a in graph[:3])
+        return [tuple(zip(indices[start:stop], weights[start:stop]))
+                for start, stop in zip(indptr[:-1], indptr[1:])]
+
+    @classmethod
+    def build(cls, n_nodes, sources, targets, weights, witness_hops=WITNESS_HOPS, fingerprint=None,
+              weight=None):
+        """
+        Contract a directed graph given as edge arrays
+
+        Args:
+            n_nodes (int): Number of nodes
+            sources (ndarray): Edge source node positions
+            targets (ndarray): Edge target node positions
+            weights (ndarray): Non-negative edge costs
+            witness_hops (int): Edges a witness path may have; lower is faster
+                to build but adds more (harmless) shortcuts
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        # Cheapest of parallel edges, no self-loops, sorted by source
+        order = np.lexsort((weights, targets, sources))
+        sources, targets, weights = sources[order], targets[order], weights[order]
+        keep = sources != targets
+        keep[1:] &= (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        sources, targets, weights = sources[keep], targets[keep], weights[keep]
+        out_graph = _DynamicCSR(n_nodes, sources, targets, weights)
+        by_target = np.argsort(targets, kind='stable')
+        in_graph = _DynamicCSR(n_nodes, targets[by_target], sources[by_target], weights[by_target])
+
+        out_first, out_degree = out_graph.first, out_graph.degree
+        out_targets, out_weights = out_graph.targets, out_graph.weights
+        in_degree = in_graph.degree
+
+        dist = [INF] * n_nodes
+        hop_count = [0] * n_nodes
+
+        def witness_search(source, skip, goals, max_cost):
+            """
+            Cost labels of a Dijkstra search from source avoiding skip, bounded
+            by max_cost and witness_hops edges, stopped once all goals are settled
+
+            Returns:
+                list: Nodes whose labels are set in dist (to read and reset)
+            """
+            dist[source] = 0.0
+            hop_count[source] = 0
+            touched = [source]
+            heap = [(0.0, source)]
+            remaining = len(goals)
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                if d > max_cost:
+                    break
+                if u in goals:
+                    remaining -= 1
+                    if not remaining:
+                        break
+                next_hops = hop_count[u] + 1
+                if next_hops > witness_hops:
+                    continue
+                start = out_first[u]
+                for i in range(start, start + out_degree[u]):
+                    v = out_targets[i]
+                    nd = d + out_weights[i]
+                    if nd < dist[v] and v != skip:
+                        if dist[v] == INF:
+                            touched.append(v)
+                        dist[v] = nd
+                        hop_count[v] = next_hops
+                        heapq.heappush(heap, (nd, v))
+            return touched
+
+        def shortcuts(v):
+            """
+            Shortcuts (u, x, cost) needed to contract v
+            """
+            incoming = in_graph.edges(v)
+            outgoing = out_graph.edges(v)
+            needed = []
+            if not outgoing:
+                return needed
+            max_out = max(w for _, w, _ in outgoing)
+            for u, w_in, _ in incoming:
+                goals = {x for x, _, _ in outgoing if x != u}
+                if not goals:
+                    continue
+                touched = witness_search(u, v, goals, w_in + max_out)
+                needed.extend((u, x, w_in + w_out) for x, w_out, _ in outgoing
+                              if x != u and dist[x] > w_in + w_out)
+                for x in touched:
+                    dist[x] = INF
+            return needed
+
+        contracted_neighbours = [0] * n_nodes
+
+        def evaluate(v):
+            """
+            (priority, shortcuts) of contracting v next: edge difference plus
+            contracted neighbours, which spreads contraction over the graph
+            """
+            added = shortcuts(v)
+            return len(added) - in_degree[v] - out_degree[v] + contracted_neighbours[v], added
+
+        current_priority = [evaluate(v)[0] for v in range(n_nodes)]
+        heap = [(p, v) for v, p in enumerate(current_priority)]
+        heapq.heapify(heap)
+        rank = np.zeros(n_nodes, dtype=np.int64)
+        forward = [None] * n_nodes
+        backward = [None] * n_nodes
+        order = 0
+        done = [False] * n_nodes
+        while heap:
+            p, v = heapq.heappop(heap)
+            if done[v] or p != current_priority[v]:
+                continue
+            # Lazy update: re-evaluate and defer if the node is no longer the cheapest
+            current, added = evaluate(v)
+            if heap and current > heap[0][0]:
+                current_priority[v] = current
+                heapq.heappush(heap, (current, v))
+                continue
+            done[v] = True
+
+            # Every edge left at v leads to a node contracted later
+            forward[v] = out_graph.edges(v)
+            backward[v] = in_graph.edges(v)
+            rank[v] = order
+            order += 1
+            for u, _, _ in backward[v]:
+                out_graph.remove(u, v)
+            for x, _, _ in forward[v]:
+                in_graph.remove(x, v)
+            for u, x, cost in added:
+                out_graph.add(u, x, cost, v)
+                in_graph.add(x, u, cost, v)
+            for u in {u for u, _, _ in backward[v]} | {x for x, _, _ in forward[v]}:
+                contracted_neighbours[u] += 1
+
+        return cls(rank, _pack(forward), _pack(backward), fingerprint, weight)
+
+    def save(self, path):
+        """
+        Write the index to an .npz file
+        """
+        names = ('indptr', 'indices', 'weights', 'middle')
+        arrays = {f"forward_{n}": a for n, a in zip(names, self.forward)}
+        arrays.update({f"backward_{n}": a for n, a in zip(names, self.backward)})
+        np.savez(path, rank=self.rank, fingerprint=np.array(self.fingerprint or ''),
+                 weight=np.array(self.weight or ''), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save()
+        """
+        names = ('indptr', 'indices', 'weights', 'middle')
+        with np.load(path) as data:
+            return cls(
+                data['rank'],
+                tuple(data[f"forward_{n}"] for n in names),
+                tuple(data[f"backward_{n}"] for n in names),
+                str(data['fingerprint']) or None,
+                str(data['weight']) or None,
+            )
+
+    def _search(self, source, target):
+        if source == target:
+            return 0.0, source, {source: -1}, {target: -1}
+        dist_forward, dist_backward = {source: 0.0}, {target: 0.0}
+        pred_forward, pred_backward = {source: -1}, {target: -1}
+        heap_forward, heap_backward = [(0.0, source)], [(0.0, target)]
+        up_forward, up_backward = self._up
+        heappop, heappush = heapq.heappop, heapq.heappush
+        best, meeting = INF, -1
+
+        while heap_forward or heap_backward:
+            top_forward = heap_forward[0][0] if heap_forward else INF
+            top_backward = heap_backward[0][0] if heap_backward else INF
+            if top_forward <= top_backward:
+                if top_forward >= best:
+                    break
+                heap, dist, pred, other_dist = heap_forward, dist_forward, pred_forward, dist_backward
+                up, down = up_forward, up_backward
+            else:
+                if top_backward >= best:
+                    break
+                heap, dist, pred, other_dist = heap_backward, dist_backward, pred_backward, dist_forward
+                up, down = up_backward, up_forward
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            other = other_dist.get(u)
+            if other is not None and d + other < best:
+                best, meeting = d + other, u
+            # Stall-on-demand: skip u if a higher-ranked node reaches it more cheaply
+            for x, w in down[u]:
+                if dist.get(x, INF) + w < d:
+                    break
+            else:
+                for v, w in up[u]:
+                    nd = d + w
+                    if nd < dist.get(v, INF):
+                        dist[v] = nd
+                        pred[v] = u
+                        heappush(heap, (nd, v))
+        return best, meeting, pred_forward, pred_backward
+
+    def distance(self, source, target):
+        """
+        Cost of the cheapest path between two node positions (inf if unreachable)
+        """
+        return self._search(source, target)[0]
+
+    def _unpack(self, a, b):
+        path = []
+        stack = [(a, b)]
+        while stack:
+            u, v = stack.pop()
+            m = self._middle.get((u, v))
+            if m is None:
+                path.append(v)
+            else:
+                stack.append((m, v))
+                stack.append((u, m))
+        return path
+
+    def path(self, source, target):
+        """
+        Cheapest path between two node positions
+
+        Returns:
+            tuple: (cost, list of node positions), or (inf, []) if unreachable
+        """
+        cost, meeting, pred_forward, pred_backward = self._search(source, target)
+        if meeting < 0:
+            return INF, []
+        up = [meeting]
+        while pred_forward[up[-1]] >= 0:
+            up.append(pred_forward[up[-1]])
+        down = [meeting]
+        while pred_backward[down[-1]] >= 0:
+            down.append(pred_backward[down[-1]])
+        hops = up[::-1] + down[1:]
+
+        nodes = [hops[0]]
+        for a, b in zip(hops[:-1], hops[1:]):
+            nodes.extend(self._unpack(a, b))
+        return cost, nodes
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Offline Gazetteer
+Local SQLite store of Bangladeshi place names and coordinates.
+
+The database is seeded on first use from data/bangladesh_places.csv (the
+eight divisional and 64 district headquarters, with common alternative
+spellings such as Chittagong/Chattogram). More places, e.g. upazila
+centres, can be imported from CSV or any vector file GeoPandas reads.
+
+Lookups normalise names (case, punctuation, a trailing ", Bangladesh") and
+resolve a whole batch with one indexed query. Names still missing can be
+matched fuzzily against every known name, then passed to a live geocoder;
+whatever the geocoder finds is written through to the database so the
+next run stays offline.
+"""
+
+import csv
+import difflib
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+DEFAULT_SEED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "data", "bangladesh_places.csv")
+
+# Preferred place when several share a name (lower wins)
+KIND_RANK = {
+    'division_hq': 0,
+    'district_hq': 1,
+    'city': 2,
+    'upazila': 3,
+    'place': 4,
+    'geocoded': 5,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS places (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    district TEXT,
+    division TEXT,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    source TEXT,
+    updated TEXT
+);
+CREATE TABLE IF NOT EXISTS place_names (
+    key TEXT NOT NULL,
+    place_id INTEGER NOT NULL REFERENCES places(id),
+    rank INTEGER NOT NULL,
+    UNIQUE (key, place_id)
+);
+CREATE INDEX IF NOT EXISTS place_names_key ON place_names (key, rank);
+"""
+
+
+def normalize_name(name):
+    """
+    Lookup key of a place name: lower case, ASCII letters/digits and single spaces
+    """
+    key = str(name).lower().strip()
+    key = re.sub(r",?\s*bangladesh$", "", key)
+    key = key.replace("'", "")
+    key = re.sub(r"[^a-z0-9]+", " ", key)
+    return key.strip()
+
+
+class Gazetteer:
+    def __init__(self, db_path, seed_file=DEFAULT_SEED_FILE):
+        """
+        Args:
+            db_path (str): SQLite database file (created if missing)
+            seed_file (str): CSV imported when the database is empty
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self._keys = None
+        if seed_file and self.count() == 0 and os.path.exists(seed_file):
+            added = self.import_places(seed_file, source='seed')
+            print(f"Seeded gazetteer with {added} places")
+
+    def count(self):
+        """
+        Number of places in the gazetteer
+        """
+        return self.conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+
+    def places(self, kind=None):
+        """
+        Stored places, optionally only those of one kind (e.g. 'district_hq')
+
+        Returns:
+            dict: name -> (lat, lon), in insertion order
+        """
+        query = "SELECT name, lat, lon FROM places"
+        params = ()
+        if kind is not None:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        return {name: (lat, lon) for name, lat, lon in self.conn.execute(query + " ORDER BY id", params)}
+
+    def close(self):
+        self.conn.close()
+
+    def add_places(self, places, source='user'):
+        """
+        Add many places in one transaction
+
+        Args:
+            places (iterable): dicts with name, lat, lon and optionally kind,
+                district, division and alt_names (list or '|'-separated string)
+            source (str): Where the places came from
+
+        Returns:
+            int: Number of places added
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        added = 0
+        with self.conn:
+            for place in places:
+                kind = place.get('kind') or 'place'
+                cursor = self.conn.execute(
+                    "INSERT INTO places (name, kind, district, division, lat, lon, source, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (place['name'], kind, place.get('district') or None,
+                     place.get('division') or None, float(place['lat']), float(place['lon']),
+                     source, now)
+                )
+                alt_names = place.get('alt_names') or []
+                if isinstance(alt_names, str):
+                    alt_names = [n for n in alt_names.split('|') if n]
+                keys = {normalize_name(n) for n in [place['name'], *alt_names]}
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO place_names (key, place_id, rank) VALUES (?, ?, ?)",
+                    [(key, cursor.lastrowid, KIND_RANK.get(kind, len(KIND_RANK))) for key in keys if key]
+                )
+                added += 1
+        self._keys = None
+        return added
+
+    def add_place(self, name, lat, lon, kind='place', district=None, division=None,
+                  alt_names=(), source='user'):
+        """
+        Add a single place (see add_places)
+        """
+        return self.add_places([{
+            'name': name, 'lat': lat, 'lon': lon, 'kind': kind,
+            'district': district, 'division': division, 'alt_names': list(alt_names),
+        }], source=source)
+
+    def import_places(self, path, kind=None, name_column='name', source=None):
+        """
+        Import places from a CSV file or a vector file (GeoJSON, GeoPackage, shapefile)
+
+        CSV files need name, lat and lon columns; vector files use the point
+        (or polygon centroid) of each feature.
+
+        Args:
+            path (str): File to import
+            kind (str): Kind for every imported place (default: the file's kind column)
+            name_column (str): Column holding the place name
+            source (str): Source recorded for the places (default: the file name)
+
+        Returns:
+            int: Number of places added
+        """
+        source = source or os.path.basename(path)
+        if path.lower().endswith('.csv'):
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            for row in rows:
+                row['name'] = row[name_column]
+                if kind:
+                    row['kind'] = kind
+            return self.add_places(rows, source=source)
+
+        import geopandas as gpd
+
+        gdf = gpd.read_file(path).to_crs(epsg=4326)
+        points = gdf.geometry.representative_point()
+        rows = []
+        for (_, row), point in zip(gdf.iterrows(), points):
+            rows.append({
+                'name': row[name_column], 'lat': point.y, 'lon': point.x,
+                'kind': kind or row.get('kind'), 'district': row.get('district'),
+                'division': row.get('division'),
+            })
+        return self.add_places(rows, source=source)
+
+    def _exact(self, keys):
+        found = {}
+        keys = list(keys)
+        # Stay under SQLite's bound parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                "SELECT n.key, p.lat, p.lon FROM place_names n JOIN places p ON p.id = n.place_id "
+                f"WHERE n.key IN ({','.join('?' * len(chunk))}) ORDER BY n.rank DESC, p.id DESC",
+                chunk
+            ).fetchall()
+            # Rows are ordered worst first, so the preferred place is written last
+            for key, lat, lon in rows:
+                found[key] = (lat, lon)
+        return found
+
+    def _fuzzy_key(self, key, cutoff):
+        if self._keys is None:
+            self._keys = [row[0] for row in self.conn.execute("SELECT DISTINCT key FROM place_names")]
+        matches = difflib.get_close_matches(key, self._keys, n=1, cutoff=cutoff)
+        return matches[0] if matches else None
+
+    def lookup_many(self, names, geocoder=None, fuzzy=True, cutoff=0.8):
+        """
+        Resolve many place names at once
+
+        Args:
+            names (iterable): Place names
+            geocoder (callable): Optional live geocoder, name -> (lat, lon);
+                only called for names the gazetteer cannot resolve, and its
+                results are written through to the database
+            fuzzy (bool): Match misspelt names against known names
+            cutoff (float): Minimum difflib similarity for a fuzzy match
+
+        Returns:
+            dict: name -> (lat, lon) for every name that could be resolved
+        """
+        names = list(dict.fromkeys(names))
+        keys = {name: normalize_name(name) for name in names}
+        found = self._exact(set(keys.values()))
+
+        missing = [name for name in names if keys[name] not in found]
+        if fuzzy and missing:
+            matched = {name: self._fuzzy_key(keys[name], cutoff) for name in missing}
+            resolved = self._exact({key for key in matched.values() if key})
+            for name, key in matched.items():
+                if key in resolved:
+                    found[keys[name]] = resolved[key]
+            missing = [name for name in missing if keys[name] not in found]
+
+        if geocoder is not None and missing:
+            geocoded = []
+            for name in missing:
+                try:
+                    lat, lon = geocoder(name)
+                except Exception as e:
+                    print(f"Could not geocode {name}: {e}")
+                    continue
+                found[keys[name]] = (lat, lon)
+                geocoded.append({'name': name, 'lat': lat, 'lon': lon, 'kind': 'geocoded'})
+            if geocoded:
+                self.add_places(geocoded, source='geocoder')
+            missing = [name for name in missing if keys[name] not in found]
+
+        if missing:
+            print(f"Places not found in gazetteer: {', '.join(missing)}")
+        return {name: found[keys[name]] for name in names if keys[name] in found}
+
+    def lookup(self, name, geocoder=None, fuzzy=True):
+        """
+        Coordinates of a single place name, or None
+        """
+        return self.lookup_many([name], geocoder=geocoder, fuzzy=fuzzy).get(name)
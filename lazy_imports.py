@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports
+Module proxies that defer importing heavy dependencies until first use.
+
+The geospatial stack (osmnx, geopandas, pandas, folium, shapely) takes over
+a second to import. Commands that only look at the cache directory never
+touch it, so bangladesh_road_map.py binds these names to LazyModule proxies:
+the real module is imported the first time one of its attributes is used.
+The proxy stays bound to the name, so later accesses still pass through its
+__getattr__ (one extra lookup per access) before reaching the module.
+"""
+
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access
+    """
+
+    def __init__(self, name, on_import=None):
+        """
+        Args:
+            name (str): Module to import, e.g. 'folium.plugins'
+            on_import (callable): Called with the module right after it is imported
+        """
+        self.__dict__['_name'] = name
+        self.__dict__['_on_import'] = on_import
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self._name)
+            self.__dict__['_module'] = module
+            if self._on_import is not None:
+                self._on_import(module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Streaming Map Writer
+Writes the road map HTML without holding the road layers in memory.
+
+Folium only renders the page shell (base layers, cities, controls and one
+empty feature group per highway class). Road features are generated from
+the memory-mapped graph arrays a chunk of edges at a time, encoded with
+shapely.to_geojson and appended to one GeoJSON file per highway class. The
+page then either embeds those files in <script> blocks (inline: a single
+self-contained HTML file) or fetches them (sidecar: served next to the map
+over HTTP). Memory depends on the chunk size, not on the size of the network.
+
+Two-way streets are drawn once, like normalize_road_edges: an edge is
+skipped when an earlier edge (in CSR order) joins the same two nodes with
+the same highway class.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Popup and tooltip text built in the browser, matching build_road_layers
+LAYER_SCRIPT = """(function() {{
+    function esc(s) {{
+        return String(s).replace(/[&<>"]/g, function(c) {{
+            return {{'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}}[c];
+        }});
+    }}
+    var layer = L.geoJson(null, {{
+        style: function() {{ return {style}; }},
+        onEachFeature: function(feature, l) {{
+            var p = feature.properties;
+            l.bindPopup('<b>Road Information</b><br>Type: ' + esc(p.highway)
+                + '<br>Length: ' + (p.length === null ? 'N/A' : p.length) + 'm<br>Name: '
+                + esc(p.name === null ? 'Unnamed' : p.name), {{maxWidth: 200}});
+            l.bindTooltip({tooltip});
+        }}
+    }}).addTo({group});
+"""
+
+
+def _expand_ranges(starts, counts):
+    """
+    Row of every element and flat positions of the ranges [start, start + count)
+    """
+    rows = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, np.repeat(starts, counts) + offsets
+
+
+def drawn_edge_mask(road_arrays, start, stop):
+    """
+    Which edges in [start, stop) are drawn (one per two-way street)
+    """
+    indptr = np.asarray(road_arrays.indptr)
+    indices = road_arrays.indices
+    highway = road_arrays.edge_highway
+    edges = np.arange(start, stop)
+    u = np.searchsorted(indptr, edges, side='right') - 1
+    v = np.asarray(indices[start:stop])
+    h = np.asarray(highway[start:stop])
+    drop = np.zeros(len(edges), dtype=bool)
+
+    # Parallel edges earlier in the same node's range
+    rows, candidates = _expand_ranges(indptr[u], edges - indptr[u])
+    hit = (np.asarray(indices[candidates]) == v[rows]) & (np.asarray(highway[candidates]) == h[rows])
+    drop[rows[hit]] = True
+
+    # The reverse direction, stored earlier when the target node comes first
+    later = np.flatnonzero(v < u)
+    rows, candidates = _expand_ranges(indptr[v[later]], np.diff(indptr)[v[later]])
+    hit = ((np.asarray(indices[candidates]) == u[later][rows])
+           & (np.asarray(highway[candidates]) == h[later][rows]))
+    drop[later[rows[hit]]] = True
+    return ~drop
+
+
+def iter_road_features(road_arrays, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield (highway class, GeoJSON feature strings) per class and chunk of edges
+    """
+    import shapely
+
+    names = road_arrays.names
+    for start in range(0, road_arrays.n_edges, chunk_size):
+        stop = min(start + chunk_size, road_arrays.n_edges)
+        keep = np.flatnonzero(drawn_edge_mask(road_arrays, start, stop))
+        if not len(keep):
+            continue
+
+        # Decode only this chunk's geometries, read from the (possibly shared) WKB buffer
+        geometries = shapely.to_geojson(shapely.from_wkb(road_arrays.geometries_wkb(start + keep)))
+
+        highway = np.asarray(road_arrays.edge_highway[start:stop])[keep]
+        name_codes = np.asarray(road_arrays.edge_name[start:stop])[keep].tolist()
+        lengths = np.asarray(road_arrays.edge_length[start:stop])[keep].tolist()
+        for code in np.unique(highway).tolist():
+            highway_type = road_arrays.highway_classes[code]
+            features = []
+            for i in np.flatnonzero(highway == code).tolist():
+                properties = json.dumps({
+                    'highway': highway_type,
+                    'name': names[name_codes[i]] if name_codes[i] < len(names) else None,
+                    'length': None if np.isnan(lengths[i]) else int(round(lengths[i])),
+                }).replace('</', '<\\/')
+                features.append(f'{{"type":"Feature","geometry":{geometries[i]},"properties":{properties}}}')
+            yield highway_type, features
+
+
+def write_road_geojson(road_arrays, out_dir, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream every highway class into its own GeoJSON FeatureCollection file
+
+    Returns:
+        dict: highway class -> (file path, feature count), sorted by class
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    files, counts = {}, {}
+    try:
+        for highway_type, features in iter_road_features(road_arrays, chunk_size):
+            f = files.get(highway_type)
+            if f is None:
+                path = os.path.join(out_dir, f"{highway_type}.geojson")
+                f = files[highway_type] = open(path, 'w', encoding='utf-8')
+                f.write('{"type":"FeatureCollection","features":[\n')
+            elif features:
+                f.write(',\n')
+            f.write(',\n'.join(features))
+            counts[highway_type] = counts.get(highway_type, 0) + len(features)
+    finally:
+        for f in files.values():
+            f.write('\n]}\n')
+            f.close()
+    return {h: (os.path.join(out_dir, f"{h}.geojson"), counts[h]) for h in sorted(counts)}
+
+
+def highway_classes_present(road_arrays, chunk_size=1000000):
+    """
+    Highway classes used by at least one edge, counted chunk by chunk
+    """
+    counts = np.zeros(len(road_arrays.highway_classes), dtype=np.int64)
+    for start in range(0, road_arrays.n_edges, chunk_size):
+        counts += np.bincount(np.asarray(road_arrays.edge_highway[start:start + chunk_size]),
+                              minlength=len(counts))
+    return [h for h, count in zip(road_arrays.highway_classes, counts) if count]
+
+
+def write_streaming_map(m, road_arrays, save_path, groups, style_for, sidecar=False,
+                        chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Save a folium map, streaming the road features into (or next to) the page
+
+    Args:
+        m (folium.Map): Map shell holding one empty FeatureGroup per class
+        road_arrays (RoadGraphArrays): Road network
+        save_path (str): HTML file to write
+        groups (dict): highway class -> folium.FeatureGroup receiving its roads
+        style_for (callable): highway class -> Leaflet path style dict
+        sidecar (bool): Write <map>_layers/<class>.geojson files fetched by the
+            page instead of embedding the features
+        chunk_size (int): Edges processed at once
+
+    Returns:
+        dict: highway class -> feature count
+    """
+    shell = m.get_root().render()
+    head, tail = shell.rsplit('</html>', 1)
+
+    if sidecar:
+        layers_dir = os.path.splitext(save_path)[0] + "_layers"
+        if os.path.exists(layers_dir):
+            shutil.rmtree(layers_dir)
+    else:
+        layers_dir = tempfile.mkdtemp(prefix='road_layers_', dir=os.path.dirname(os.path.abspath(save_path)))
+
+    try:
+        layer_files = write_road_geojson(road_arrays, layers_dir, chunk_size)
+        page_dir = os.path.dirname(os.path.abspath(save_path))
+        with open(save_path, 'w', encoding='utf-8') as out:
+            out.write(head)
+            for highway_type, (path, _) in layer_files.items():
+                group = groups.get(highway_type)
+                if group is None:
+                    continue
+                out.write('<script>\n')
+                out.write(LAYER_SCRIPT.format(
+                    style=json.dumps(style_for(highway_type)),
+                    tooltip=json.dumps(f"{highway_type.title()} Road"),
+                    group=group.get_name(),
+                ))
+                if sidecar:
+                    url = os.path.relpath(path, page_dir).replace(os.sep, '/')
+                    out.write(f"    fetch({json.dumps(url)}).then(function(r) {{ return r.json(); }})"
+                              f".then(function(data) {{ layer.addData(data); }});\n")
+                else:
+                    out.write('    layer.addData(')
+                    with open(path, encoding='utf-8') as f:
+                        shutil.copyfileobj(f, out)
+                    out.write(');\n')
+                out.write('})();\n</script>\n')
+            out.write('</html>' + tail)
+    finally:
+        if not sidecar:
+            shutil.rmtree(layers_dir, ignore_errors=True)
+    return {h: count for h, (_, count) in layer_files.items()}
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Vector Tile Writer
+Pre-generates zoom-dependent level-of-detail road tiles for the interactive map.
+
+For every zoom level the road geometries are:
+- filtered to the highway classes visible at that zoom
+- simplified with a topology-preserving tolerance of about one screen pixel
+- clipped to each Web Mercator tile and encoded as Mapbox Vector Tiles
+
+The result is a static z/x/y.pbf directory that Leaflet.VectorGrid loads lazily,
+so the browser only fetches the tiles and detail it is currently showing.
+"""
+
+import json
+import os
+
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+WEB_MERCATOR_HALF_WORLD = 20037508.342789244
+TILE_SIZE = 256
+TILE_EXTENT = 4096
+
+
+def to_web_mercator(geometries):
+    """
+    Project lon/lat geometries to Web Mercator (EPSG:3857)
+    """
+    def project(coords):
+        x = np.radians(coords[:, 0]) * 6378137.0
+        lat = np.clip(coords[:, 1], -85.05112878, 85.05112878)
+        y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * 6378137.0
+        return np.column_stack([x, y])
+
+    return shapely.transform(geometries, project)
+
+
+def simplify_tolerance(zoom, pixels=1.0):
+    """
+    Simplification tolerance in Web Mercator metres for a zoom level
+    """
+    return 2 * WEB_MERCATOR_HALF_WORLD / (TILE_SIZE * 2 ** zoom) * pixels
+
+
+def tile_bounds(zoom, x, y):
+    """
+    Web Mercator bounds (minx, miny, maxx, maxy) of tile z/x/y
+    """
+    size = 2 * WEB_MERCATOR_HALF_WORLD / 2 ** zoom
+    minx = -WEB_MERCATOR_HALF_WORLD + x * size
+    maxy = WEB_MERCATOR_HALF_WORLD - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tiles_covering(bounds, zoom):
+    """
+    Yield (x, y) of every tile at a zoom level that intersects Web Mercator bounds
+    """
+    size = 2 * WEB_MERCATOR_HALF_WORLD / 2 ** zoom
+    n = 2 ** zoom
+    x0 = max(int((bounds[0] + WEB_MERCATOR_HALF_WORLD) // size), 0)
+    x1 = min(int((bounds[2] + WEB_MERCATOR_HALF_WORLD) // size), n - 1)
+    y0 = max(int((WEB_MERCATOR_HALF_WORLD - bounds[3]) // size), 0)
+    y1 = min(int((WEB_MERCATOR_HALF_WORLD - bounds[1]) // size), n - 1)
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield x, y
+
+
+def write_vector_tiles(roads, out_dir, class_min_zoom, min_zoom=5, max_zoom=14, buffer_pixels=8):
+    """
+    Write a z/x/y.pbf vector tile pyramid of the road network
+
+    Args:
+        roads (GeoDataFrame): Edges in EPSG:4326 with highway, name and length columns
+        out_dir (str): Directory to write the tiles to
+        class_min_zoom (callable): Maps a highway type to the first zoom it is shown at
+        min_zoom (int): Lowest zoom level to generate
+        max_zoom (int): Highest zoom level to generate
+        buffer_pixels (int): Tile edge buffer, avoids clipped lines ending at tile seams
+
+    Returns:
+        dict: Tile pyramid metadata (zoom range, bounds, layers, tile and byte counts)
+    """
+    import mapbox_vector_tile
+
+    highway = roads['highway'].to_numpy()
+    names = roads['name'].fillna('').astype(str).to_numpy()
+    # Missing lengths are left out of the feature properties
+    lengths = np.round(roads['length'].to_numpy(dtype=float))
+    has_length = ~np.isnan(lengths)
+    lengths = np.where(has_length, lengths, 0).astype(np.int64)
+
+    def properties(i):
+        if has_length[i]:
+            return {'name': names[i], 'length': int(lengths[i])}
+        return {'name': names[i]}
+    merc = to_web_mercator(roads.geometry.values)
+    first_zoom = np.array([class_min_zoom(h) for h in highway])
+
+    tile_count = 0
+    total_bytes = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        visible = np.flatnonzero(first_zoom <= zoom)
+        if len(visible) == 0:
+            continue
+        geoms = shapely.simplify(merc[visible], simplify_tolerance(zoom), preserve_topology=True)
+        tree = STRtree(geoms)
+        buffer = simplify_tolerance(zoom, buffer_pixels)
+
+        for x, y in tiles_covering(shapely.total_bounds(geoms), zoom):
+            bounds = tile_bounds(zoom, x, y)
+            padded = (bounds[0] - buffer, bounds[1] - buffer, bounds[2] + buffer, bounds[3] + buffer)
+            hits = tree.query(shapely.box(*padded))
+            if len(hits) == 0:
+                continue
+            clipped = shapely.clip_by_rect(geoms[hits], *padded)
+            keep = ~shapely.is_empty(clipped)
+            hits, clipped = hits[keep], clipped[keep]
+            if len(hits) == 0:
+                continue
+
+            edge_idx = visible[hits]
+            layers = []
+            for road_class in np.unique(highway[edge_idx]):
+                in_class = highway[edge_idx] == road_class
+                layers.append({
+                    'name': road_class,
+                    'features': [
+                        {'geometry': geom, 'properties': properties(i)}
+                        for geom, i in zip(clipped[in_class], edge_idx[in_class])
+                    ],
+                })
+
+            tile = mapbox_vector_tile.encode(
+                layers,
+                default_options={'quantize_bounds': bounds, 'extents': TILE_EXTENT}
+            )
+            tile_dir = os.path.join(out_dir, str(zoom), str(x))
+            os.makedirs(tile_dir, exist_ok=True)
+            with open(os.path.join(tile_dir, f"{y}.pbf"), 'wb') as f:
+                f.write(tile)
+            tile_count += 1
+            total_bytes += len(tile)
+
+        print(f"  zoom {zoom}: {len(visible)} segments, {tile_count} tiles written so far")
+
+    metadata = {
+        'format': 'pbf',
+        'min_zoom': min_zoom,
+        'max_zoom': max_zoom,
+        'bounds': [float(b) for b in shapely.total_bounds(roads.geometry.values)],
+        'layers': sorted(set(highway.tolist())),
+        'tile_count': tile_count,
+        'total_bytes': total_bytes,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
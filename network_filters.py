@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+OSM Network Type Filters
+Tag rules deciding which OSM ways belong to each network type.
+
+The rules mirror the Overpass filters OSMnx uses for graph_from_place, so a
+graph built from a local extract matches the downloaded one: a way is kept
+if it has a highway tag and none of the excluded tag values match.
+
+Every type's network is contained in the 'all' network, so a single 'all'
+graph whose edges carry a bit mask of the types using them can serve every
+network type (see RoadGraphArrays.network_view).
+"""
+
+import re
+
+import numpy as np
+
+NETWORK_TYPES = ['drive', 'walk', 'bike', 'all']
+
+# tag -> regex of values that exclude the way (same as OSMnx's ["tag"!~"regex"]),
+# copied from osmnx._overpass._get_network_filter of OSMnx 2.1.1 with
+# settings.default_access = '["access"!~"private"]'
+NETWORK_FILTERS = {
+    'drive': {
+        'area': 'yes',
+        'access': 'private',
+        'highway': ('abandoned|bridleway|bus_guideway|construction|corridor|cycleway|'
+                    'elevator|escalator|footway|no|path|pedestrian|planned|platform|'
+                    'proposed|raceway|razed|rest_area|service|services|steps|track'),
+        'motor_vehicle': 'no',
+        'motorcar': 'no',
+        'service': 'alley|driveway|emergency_access|parking|parking_aisle|private',
+    },
+    'walk': {
+        'area': 'yes',
+        'access': 'private',
+        'highway': ('abandoned|bus_guideway|construction|cycleway|motor|no|planned|'
+                    'platform|proposed|raceway|razed|rest_area|services'),
+        'foot': 'no',
+        'service': 'private',
+        'sidewalk': 'separate',
+        'sidewalk:both': 'separate',
+        'sidewalk:left': 'separate',
+        'sidewalk:right': 'separate',
+    },
+    'bike': {
+        'area': 'yes',
+        'access': 'private',
+        'highway': ('abandoned|bus_guideway|construction|corridor|elevator|escalator|'
+                    'footway|motor|no|planned|platform|proposed|raceway|razed|'
+                    'rest_area|services|steps'),
+        'bicycle': 'no',
+        'service': 'private',
+    },
+    'all': {
+        'area': 'yes',
+        'highway': ('abandoned|construction|no|planned|platform|proposed|raceway|'
+                    'razed|rest_area|services'),
+    },
+}
+
+FILTER_TAGS = sorted({tag for rules in NETWORK_FILTERS.values() for tag in rules})
+
+# Network types whose edges are always traversable in both directions
+BIDIRECTIONAL_NETWORK_TYPES = ['walk']
+
+ONEWAY_VALUES = {'yes', 'true', '1', '-1', 'reverse', 'T', 'F'}
+REVERSED_VALUES = {'-1', 'reverse', 'T'}
+
+# Bits of the network types that respect one-way restrictions
+ONEWAY_NETWORK_BITS = sum(
+    1 << i for i, network_type in enumerate(NETWORK_TYPES) if network_type not in BIDIRECTIONAL_NETWORK_TYPES
+)
+
+_COMPILED = {
+    network_type: [(tag, re.compile(pattern)) for tag, pattern in rules.items()]
+    for network_type, rules in NETWORK_FILTERS.items()
+}
+
+
+def way_matches(tags, network_type):
+    """
+    Check whether a way with the given tags belongs to a network type
+
+    Args:
+        tags (Mapping): OSM tags of the way
+        network_type (str): One of NETWORK_TYPES
+    """
+    if 'highway' not in tags:
+        return False
+    for tag, pattern in _COMPILED[network_type]:
+        value = tags.get(tag)
+        if value is not None and pattern.search(value):
+            return False
+    return True
+
+
+def way_direction(tags, network_type):
+    """
+    Travel direction of a way: 1 forward only, -1 reverse only, 0 both ways
+    """
+    if network_type in BIDIRECTIONAL_NETWORK_TYPES:
+        return 0
+    oneway = tags.get('oneway')
+    if oneway in ONEWAY_VALUES:
+        return -1 if oneway in REVERSED_VALUES else 1
+    if tags.get('junction') == 'roundabout':
+        return 1
+    return 0
+
+
+def network_bits(tags):
+    """
+    Bit mask of the network types a way belongs to (bit i for NETWORK_TYPES[i])
+    """
+    return sum(1 << i for i, network_type in enumerate(NETWORK_TYPES) if way_matches(tags, network_type))
+
+
+def edge_network_bits(way_bits, direction, forward):
+    """
+    Network types travelling the edges of ways in one direction
+
+    Args:
+        way_bits (ndarray): network_bits of each way
+        direction (ndarray): way_direction of each way for a one-way respecting type
+        forward (bool): Edges run along the way (True) or against it
+
+    Returns:
+        ndarray: uint8 bit mask per way
+    """
+    way_bits = np.asarray(way_bits, dtype=np.uint8)
+    allowed = np.asarray(direction) >= 0 if forward else np.asarray(direction) <= 0
+    return np.where(allowed, way_bits, way_bits & np.uint8(~ONEWAY_NETWORK_BITS & 0xFF)).astype(np.uint8)
+
+
+def add_network_bits(G):
+    """
+    Record the network types using each edge of an OSMnx 'all' graph
+
+    Every edge gets a 'networks' bit mask. OSMnx leaves the reverse direction
+    of one-way roads out of an 'all' graph, so those edges get a reversed
+    copy for the bidirectional types (walking). The edges must carry the
+    FILTER_TAGS, i.e. the graph is downloaded with them in useful_tags_way.
+
+    Args:
+        G (MultiDiGraph): Graph to update in place
+    """
+    import shapely
+
+    reverse_edges = []
+    for u, v, data in G.edges(data=True):
+        tags = {}
+        for tag in ['highway'] + FILTER_TAGS:
+            value = data.get(tag)
+            if isinstance(value, list):
+                value = value[0] if value else None
+            if value is not None:
+                tags[tag] = str(value)
+        bits = network_bits(tags)
+        data['networks'] = bits
+        if data.get('oneway') and bits & ~ONEWAY_NETWORK_BITS:
+            reverse = dict(data, networks=bits & ~ONEWAY_NETWORK_BITS, reversed=not data.get('reversed', False))
+            if 'geometry' in data:
+                reverse['geometry'] = shapely.reverse(data['geometry'])
+            reverse_edges.append((v, u, reverse))
+    G.add_edges_from(reverse_edges)
+    G.graph['network_types'] = NETWORK_TYPES
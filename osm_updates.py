@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+OSM Change Files
+Applies OSM replication diffs (.osc / .osc.gz) to the cached road graph.
+
+A graph ingested from a PBF extract keeps its selected ways in a way store
+(see pbf_ingest) next to the graph cache. Change files are read with
+pyosmium; the newest version of every node and way wins. Only the ways a
+diff touches are split again: the changed ways themselves and the ways
+sharing a node with them or with a moved or deleted node. Their old edges
+are dropped from the cached graph, the rebuilt edges are joined to the
+remaining ones, and the replication sequence number of the last file is
+recorded, so the next run only reads newer files.
+
+Change files are picked up from a local directory, either in the
+replication layout (000/004/123.osc.gz with 123.state.txt next to it) or
+as flat files named after their sequence number.
+"""
+
+import os
+import re
+
+import numpy as np
+
+from network_filters import way_matches
+from pbf_ingest import _WayBuffer, build_road_arrays
+from road_graph_store import RoadGraphArrays
+
+CHANGE_SUFFIXES = ('.osc', '.osc.gz', '.osc.bz2')
+
+
+def _strip_suffix(path):
+    for suffix in CHANGE_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return None
+
+
+def read_state(path):
+    """
+    key=value pairs of a replication state.txt file, with escaped colons restored
+    """
+    state = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                state[key.strip()] = value.strip().replace('\\:', ':')
+    return state
+
+
+def find_change_files(directory, after=None):
+    """
+    Change files below a directory, oldest first
+
+    The sequence number comes from the state.txt file next to a change
+    file, or else from the digits of its path relative to the directory
+    (000/004/123.osc.gz and 4123.osc.gz are both sequence 4123).
+
+    Args:
+        directory (str): Directory to search
+        after (int): Skip files up to and including this sequence number
+
+    Returns:
+        list: (sequence number, path, timestamp or None) tuples
+    """
+    found = []
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            stem = _strip_suffix(path)
+            if stem is None:
+                continue
+            timestamp = None
+            state_file = stem + '.state.txt'
+            state = read_state(state_file) if os.path.exists(state_file) else {}
+            if 'sequenceNumber' in state:
+                sequence = int(state['sequenceNumber'])
+                timestamp = state.get('timestamp')
+            else:
+                digits = re.sub(r'\D', '', os.path.relpath(stem, directory))
+                if not digits:
+                    print(f"Skipping change file without a sequence number: {path}")
+                    continue
+                sequence = int(digits)
+            if after is None or sequence > after:
+                found.append((sequence, path, timestamp))
+    return sorted(found)
+
+
+def read_changes(paths):
+    """
+    Final state of every node and way touched by a series of change files
+
+    Args:
+        paths (list): Change files, oldest first
+
+    Returns:
+        tuple: (nodes, ways) dicts; nodes map id -> (lon, lat), ways map
+        id -> (node refs, tags), and deleted objects map to None
+    """
+    import osmium
+
+    nodes, ways = {}, {}
+    for path in paths:
+        for obj in osmium.FileProcessor(path, osmium.osm.NODE | osmium.osm.WAY):
+            if obj.is_node():
+                if obj.deleted or not obj.location.valid():
+                    nodes[obj.id] = None
+                else:
+                    nodes[obj.id] = (obj.location.lon, obj.location.lat)
+            elif obj.is_way():
+                if obj.deleted:
+                    ways[obj.id] = None
+                else:
+                    ways[obj.id] = ([node.ref for node in obj.nodes], {tag.k: tag.v for tag in obj.tags})
+    return nodes, ways
+
+
+def _locations(ids, known_ids, known_lon, known_lat, nodes):
+    """
+    Coordinates of node ids from the change files or the way store, NaN where unknown or deleted
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    lon = np.full(len(ids), np.nan)
+    lat = np.full(len(ids), np.nan)
+    if len(known_ids):
+        found = np.minimum(np.searchsorted(known_ids, ids), len(known_ids) - 1)
+        hit = known_ids[found] == ids
+        lon[hit] = known_lon[found[hit]]
+        lat[hit] = known_lat[found[hit]]
+    for i, node_id in enumerate(ids.tolist()):
+        if node_id in nodes:
+            lon[i], lat[i] = nodes[node_id] or (np.nan, np.nan)
+    return lon, lat
+
+
+def apply_changes(road_arrays, ways_buffer, nodes, ways):
+    """
+    Patch a road graph and its way store with changed nodes and ways
+
+    Args:
+        road_arrays (RoadGraphArrays): Graph built from the selected ways of the store
+        ways_buffer (_WayBuffer): Way store of the graph
+        nodes, ways: read_changes output
+
+    Returns:
+        tuple: (patched RoadGraphArrays, updated way store, summary dict)
+    """
+    columns = ways_buffer.columns()
+    refs = columns['refs']
+    lengths = np.diff(columns['offsets'])
+    way_of = np.repeat(np.arange(len(lengths)), lengths)
+
+    # Moved nodes take their new location, deleted nodes leave their ways
+    moved_ids = np.array(sorted(k for k, v in nodes.items() if v is not None), dtype=np.int64)
+    deleted_ids = np.array(sorted(k for k, v in nodes.items() if v is None), dtype=np.int64)
+    lon, lat = columns['lon'].copy(), columns['lat'].copy()
+    moved = np.isin(refs, moved_ids)
+    if moved.any():
+        moved_lon, moved_lat = np.array([nodes[k] for k in moved_ids.tolist()]).T
+        position = np.searchsorted(moved_ids, refs[moved])
+        lon[moved] = moved_lon[position]
+        lat[moved] = moved_lat[position]
+    store = _WayBuffer.from_columns(dict(columns, lon=lon, lat=lat),
+                                    ways_buffer.highway_codes, ways_buffer.name_codes)
+
+    # New versions of the changed highway ways, with locations of unchanged
+    # nodes taken from the way store
+    new_ways = sorted((way_id, change) for way_id, change in ways.items()
+                      if change is not None and 'highway' in change[1])
+    needed = np.unique(np.fromiter((ref for _, (way_refs, _) in new_ways for ref in way_refs), dtype=np.int64))
+    hit = np.isin(refs, needed)
+    known_ids, first = np.unique(refs[hit], return_index=True)
+    known_lon, known_lat = lon[hit][first], lat[hit][first]
+    added = _WayBuffer()
+    added.highway_codes = dict(store.highway_codes)
+    added.name_codes = dict(store.name_codes)
+    unlocated = 0
+    for way_id, (way_refs, tags) in new_ways:
+        way_lon, way_lat = _locations(way_refs, known_ids, known_lon, known_lat, nodes)
+        known = ~np.isnan(way_lon)
+        selected = way_matches(tags, 'all')
+        if known.sum() >= 2:
+            added.add(way_id, np.asarray(way_refs, dtype=np.int64)[known].tolist(),
+                      way_lon[known].tolist(), way_lat[known].tolist(), tags, selected)
+        if selected:
+            unlocated += int((~known).sum())
+
+    # Ways to split again: changed ways and every way sharing a touched node
+    changed = np.isin(columns['way_ids'], np.fromiter(ways, dtype=np.int64, count=len(ways)))
+    touched = np.unique(np.concatenate([
+        refs[np.repeat(changed, lengths)], np.frombuffer(added.refs, dtype=np.int64), moved_ids, deleted_ids
+    ]))
+    affected = np.zeros(len(lengths), dtype=bool)
+    affected[way_of[np.isin(refs, touched)]] = True
+    affected |= changed
+    rebuilt = _WayBuffer.concat([
+        store.select(affected & ~changed, ref_mask=~np.isin(refs, deleted_ids)), added
+    ])
+    updated = _WayBuffer.concat([store.select(~affected), rebuilt])
+    rebuilt = rebuilt.select(rebuilt.columns()['selected'])
+
+    # Nodes of the rebuilt ways that other selected ways also use stay graph nodes
+    rebuilt_refs = np.unique(rebuilt.columns()['refs'])
+    updated_columns = updated.columns()
+    all_refs = updated_columns['refs'][np.repeat(updated_columns['selected'], np.diff(updated_columns['offsets']))]
+    hits = all_refs[np.isin(all_refs, rebuilt_refs)]
+    shared = rebuilt_refs[np.bincount(np.searchsorted(rebuilt_refs, hits), minlength=len(rebuilt_refs)) > 1]
+
+    stale = np.isin(np.asarray(road_arrays.edge_osmid), columns['way_ids'][affected])
+    parts = [road_arrays.edge_subgraph(~stale)]
+    if len(rebuilt.way_ids):
+        parts.append(build_road_arrays(rebuilt, node_refs=shared))
+    patched = RoadGraphArrays.concat(parts)
+    if unlocated:
+        print(f"Warning: {unlocated} nodes of changed ways have no known location and were left out; "
+              "ingest a fresh extract to restore them")
+    summary = {
+        'ways_in_files': len(ways),
+        'nodes_in_files': len(nodes),
+        'ways_rebuilt': len(rebuilt.way_ids),
+        'edges_removed': int(stale.sum()),
+        'edges_added': int(patched.n_edges - road_arrays.n_edges + stale.sum()),
+        'unlocated_nodes': unlocated,
+    }
+    return patched, updated, summary
+
+
+def apply_change_files(road_arrays, ways_path, directory):
+    """
+    Apply the change files of a directory newer than the recorded replication state
+
+    Args:
+        road_arrays (RoadGraphArrays): Cached 'all' road network with its network types
+        ways_path (str): Way store written when the network was ingested
+        directory (str): Directory holding the change files
+
+    Returns:
+        tuple: (patched RoadGraphArrays, updated way store, its metadata,
+        summary dict), or None when there is no newer change file
+    """
+    ways_buffer, attrs = _WayBuffer.load(ways_path)
+    if attrs.get('fingerprint') != road_arrays.fingerprint():
+        raise ValueError("The way store does not match the cached road network; "
+                         "ingest the PBF extract again before applying changes")
+    files = find_change_files(directory, after=attrs.get('replication_sequence'))
+    if not files:
+        return None
+    print(f"Reading {len(files)} change files (sequence {files[0][0]} to {files[-1][0]})...")
+    nodes, ways = read_changes([path for _, path, _ in files])
+    patched, updated, summary = apply_changes(road_arrays, ways_buffer, nodes, ways)
+
+    sequence, _, timestamp = files[-1]
+    state = {'replication_sequence': sequence}
+    if timestamp is not None:
+        state['replication_timestamp'] = timestamp
+    patched.graph_attrs.pop('replication_timestamp', None)
+    patched.graph_attrs.update(state)
+    attrs = {key: value for key, value in attrs.items() if key != 'replication_timestamp'}
+    attrs.update(state, fingerprint=patched.fingerprint())
+    summary.update(state, files=len(files))
+    return patched, updated, attrs, summary
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Road Network Partitioning
+Splits the national road graph into tiles and processes them in parallel.
+
+Nodes are assigned to tiles either by district polygon or by a regular
+lon/lat grid. Every edge is owned by exactly one tile (the tile of its
+endpoint with the smaller OSM id, so both directions of a two-way street
+land in the same tile); nodes with edges into another tile are boundary
+nodes. Per-tile work runs in a ProcessPoolExecutor on tile subgraphs and
+the partial results are stitched back together - for connected components
+through the nodes that tiles share.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from boundaries import assign_points
+from connectivity import component_ids, component_labels, labels_by_size
+
+
+class RoadPartition:
+    """
+    Assignment of nodes and edges of a RoadGraphArrays to named tiles
+    """
+
+    def __init__(self, road_arrays, node_tile, tile_names):
+        self.node_tile = np.asarray(node_tile, dtype=np.int64)
+        self.tile_names = list(tile_names)
+
+        src = road_arrays.edge_sources()
+        dst = np.asarray(road_arrays.indices)
+        node_ids = np.asarray(road_arrays.node_ids)
+        owner = np.where(node_ids[src] <= node_ids[dst], src, dst)
+        self.edge_tile = self.node_tile[owner]
+
+        crossing = self.node_tile[src] != self.node_tile[dst]
+        self.boundary_nodes = np.unique(np.concatenate([src[crossing], dst[crossing]]))
+        self.n_cut_edges = int(crossing.sum())
+
+    @property
+    def n_tiles(self):
+        return len(self.tile_names)
+
+    def tile_edges(self, tile):
+        """
+        Edge indices owned by a tile
+        """
+        return np.flatnonzero(self.edge_tile == tile)
+
+    def boundary_counts(self):
+        """
+        Number of boundary nodes per tile
+        """
+        return np.bincount(self.node_tile[self.boundary_nodes], minlength=self.n_tiles)
+
+
+def grid_partition(road_arrays, cell_size=0.5):
+    """
+    Partition nodes into a regular lon/lat grid
+
+    Args:
+        road_arrays (RoadGraphArrays): Road network
+        cell_size (float): Grid cell size in degrees
+    """
+    x = np.asarray(road_arrays.node_x)
+    y = np.asarray(road_arrays.node_y)
+    col = np.floor((x - x.min()) / cell_size).astype(np.int64)
+    row = np.floor((y - y.min()) / cell_size).astype(np.int64)
+    cells, node_tile = np.unique(row * (col.max() + 1) + col, return_inverse=True)
+    n_cols = col.max() + 1
+    tile_names = [f"r{cell // n_cols}_c{cell % n_cols}" for cell in cells.tolist()]
+    return RoadPartition(road_arrays, node_tile.ravel(), tile_names)
+
+
+def district_partition(road_arrays, districts_gdf, name_column=None):
+    """
+    Partition nodes by the district polygon that contains them
+
+    Nodes outside every polygon (e.g. on a coastline simplified away) are
+    assigned to the nearest district.
+
+    Args:
+        road_arrays (RoadGraphArrays): Road network
+        districts_gdf (GeoDataFrame): District polygons in EPSG:4326
+        name_column (str): Column with district names (default: first of
+            name, NAME_2, ADM2_EN, district that exists, else the row index)
+    """
+    if name_column is None:
+        name_column = next(
+            (c for c in ('name', 'NAME_2', 'ADM2_EN', 'district') if c in districts_gdf.columns), None
+        )
+    names = (districts_gdf[name_column].astype(str).tolist() if name_column
+             else [str(i) for i in districts_gdf.index])
+
+    node_tile = assign_points(road_arrays.node_x, road_arrays.node_y, districts_gdf.geometry.values)
+    return RoadPartition(road_arrays, node_tile, names)
+
+
+def process_tiles(road_arrays, partition, func, workers=None, **kwargs):
+    """
+    Run a function on every non-empty tile subgraph across a process pool
+
+    Args:
+        road_arrays (RoadGraphArrays): Road network
+        partition (RoadPartition): Tile assignment
+        func (callable): Top-level function taking a tile RoadGraphArrays
+        workers (int): Worker processes (default: CPU count, 1 runs in-process)
+        **kwargs: Extra keyword arguments passed to func
+
+    Returns:
+        list: (tile index, edge indices, result) for each non-empty tile
+    """
+    func = partial(func, **kwargs) if kwargs else func
+    tiles = [(tile, partition.tile_edges(tile)) for tile in range(partition.n_tiles)]
+    tiles = [(tile, edges) for tile, edges in tiles if len(edges)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tiles) <= 1:
+        return [(tile, edges, func(road_arrays.edge_subgraph(edges))) for tile, edges in tiles]
+
+    # Subgraphs are cut in the parent, so workers only receive their own tile
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (tile, edges, pool.submit(func, road_arrays.edge_subgraph(edges)))
+            for tile, edges in tiles
+        ]
+        return [(tile, edges, future.result()) for tile, edges, future in futures]
+
+
+def tile_statistics(tile):
+    """
+    Node, edge, road length and local component figures of one tile
+    """
+    labels = component_labels(tile.n_nodes, tile.edge_sources(), tile.indices)
+    road_km = np.bincount(
+        tile.edge_highway, weights=tile.edge_length, minlength=len(tile.highway_classes)
+    ) / 1000
+    return {
+        'node_ids': np.asarray(tile.node_ids),
+        'labels': labels,
+        'nodes': tile.n_nodes,
+        'edges': tile.n_edges,
+        'road_km': {h: float(km) for h, km in zip(tile.highway_classes, road_km) if km > 0},
+    }
+
+
+def stitch_components(road_arrays, tile_results):
+    """
+    Global component labels from per-tile component labels
+
+    Local components of different tiles are merged wherever the tiles share
+    a node, i.e. along the cut edges between them.
+
+    Args:
+        road_arrays (RoadGraphArrays): Road network
+        tile_results (list): process_tiles output of tile_statistics
+
+    Returns:
+        ndarray: Component label per node; label 0 is the largest component
+    """
+    node_ids = np.asarray(road_arrays.node_ids)
+    order = np.argsort(node_ids, kind='stable')
+
+    item_nodes, item_ids = [], []
+    n_items = 0
+    for _, _, result in tile_results:
+        item_nodes.append(order[np.searchsorted(node_ids, result['node_ids'], sorter=order)])
+        item_ids.append(n_items + result['labels'])
+        n_items += int(result['labels'].max()) + 1 if len(result['labels']) else 0
+    item_nodes = np.concatenate(item_nodes) if item_nodes else np.zeros(0, dtype=np.int64)
+    item_ids = np.concatenate(item_ids) if item_ids else np.zeros(0, dtype=np.int64)
+
+    # Nodes without edges belong to no tile; give each its own item
+    node_item = np.full(len(node_ids), -1, dtype=np.int64)
+    node_item[item_nodes] = item_ids
+    isolated = np.flatnonzero(node_item < 0)
+    node_item[isolated] = n_items + np.arange(len(isolated))
+
+    # A node seen in several tiles joins the local components containing it
+    by_node = np.argsort(item_nodes, kind='stable')
+    shared = item_nodes[by_node[1:]] == item_nodes[by_node[:-1]]
+    roots = component_ids(
+        n_items + len(isolated), item_ids[by_node[:-1]][shared], item_ids[by_node[1:]][shared]
+    )
+    return labels_by_size(roots[node_item])
+
+
+def default_cell_size(road_arrays, target_tiles):
+    """
+    Grid cell size giving roughly target_tiles non-empty cells over the network extent
+    """
+    width = float(np.ptp(road_arrays.node_x)) or 1.0
+    height = float(np.ptp(road_arrays.node_y)) or 1.0
+    return math.sqrt(width * height / max(target_tiles, 1))
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Offline PBF Ingestion
+Builds the columnar road graph straight from a local .osm.pbf extract.
+
+The extract is streamed once with pyosmium. The ways of the 'all' network
+are kept as flat arrays of node references and coordinates; node
+locations live in a configurable osmium index, so a disk-backed index
+keeps memory bounded for the national extract. The ways are then split at
+intersections and way ends with vectorized NumPy code and written as
+RoadGraphArrays, without ever building a NetworkX graph. Every edge
+records the network types travelling it (edge_networks), so the drive,
+walk and bike networks are views of the one graph.
+
+Unlike OSMnx simplification, ways are not merged across way ends, so a
+road made of several OSM ways keeps a node where the ways meet.
+
+The highway ways can be kept next to the graph cache as a way store, so
+OSM change files can later be applied without re-reading the extract (see
+osm_updates). The store also holds the highway ways outside the 'all'
+network, flagged as not selected, so a way that is reclassified into the
+network finds the locations of its unchanged nodes.
+"""
+
+import json
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+from network_filters import NETWORK_TYPES, edge_network_bits, network_bits, way_direction, way_matches
+from road_graph_store import RoadGraphArrays
+
+EARTH_RADIUS_M = 6371009
+
+WAY_COLUMNS = {
+    'refs': np.int64, 'lon': np.float64, 'lat': np.float64, 'offsets': np.int64,
+    'way_ids': np.int64, 'direction': np.int8, 'highway': np.int64, 'name': np.int64,
+    'networks': np.uint8, 'selected': np.bool_,
+}
+
+
+def great_circle_distance(lon1, lat1, lon2, lat2):
+    """
+    Vectorized haversine distance in metres
+    """
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    h = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+class _WayBuffer:
+    """
+    Append-only columnar buffer of highway ways
+    """
+
+    def __init__(self):
+        self.refs = array('q')
+        self.lon = array('d')
+        self.lat = array('d')
+        self.offsets = array('q', [0])
+        self.way_ids = array('q')
+        self.direction = array('b')
+        self.highway = array('q')
+        self.name = array('q')
+        self.networks = array('B')
+        self.selected = array('B')
+        self.highway_codes = {}
+        self.name_codes = {}
+
+    def add(self, way_id, node_refs, lons, lats, tags, selected=True):
+        self.refs.extend(node_refs)
+        self.lon.extend(lons)
+        self.lat.extend(lats)
+        self.offsets.append(len(self.refs))
+        self.way_ids.append(way_id)
+        # One-way direction as the one-way respecting network types see it
+        self.direction.append(way_direction(tags, 'all'))
+        highway = tags.get('highway')
+        self.highway.append(self.highway_codes.setdefault(highway, len(self.highway_codes)))
+        name = tags.get('name')
+        self.name.append(-1 if name is None else self.name_codes.setdefault(name, len(self.name_codes)))
+        self.networks.append(network_bits(tags))
+        self.selected.append(selected)
+
+    def columns(self):
+        """
+        Way data as NumPy arrays, without copying
+        """
+        return {column: np.frombuffer(getattr(self, column), dtype=dtype)
+                for column, dtype in WAY_COLUMNS.items()}
+
+    @classmethod
+    def from_columns(cls, columns, highway_codes, name_codes):
+        """
+        Read-only buffer over existing way arrays (add() is not available)
+        """
+        buffer = cls()
+        for column, dtype in WAY_COLUMNS.items():
+            setattr(buffer, column, np.ascontiguousarray(columns[column], dtype=dtype))
+        buffer.highway_codes = highway_codes
+        buffer.name_codes = name_codes
+        return buffer
+
+    def select(self, way_mask, ref_mask=None):
+        """
+        Buffer holding the selected ways, optionally without some node references
+
+        Args:
+            way_mask (ndarray): Boolean mask over ways
+            ref_mask (ndarray): Boolean mask over node references to keep;
+                ways left with fewer than two references are dropped
+        """
+        columns = self.columns()
+        lengths = np.diff(columns['offsets'])
+        keep = np.repeat(way_mask, lengths)
+        if ref_mask is not None:
+            keep &= ref_mask
+            way_of = np.repeat(np.arange(len(lengths)), lengths)
+            lengths = np.bincount(way_of[keep], minlength=len(lengths))
+            way_mask = way_mask & (lengths >= 2)
+            keep &= np.repeat(way_mask, np.diff(columns['offsets']))
+        selected = {column: columns[column][keep] for column in ('refs', 'lon', 'lat')}
+        selected['offsets'] = np.concatenate([[0], np.cumsum(lengths[way_mask])])
+        for column in ('way_ids', 'direction', 'highway', 'name', 'networks', 'selected'):
+            selected[column] = columns[column][way_mask]
+        return _WayBuffer.from_columns(selected, self.highway_codes, self.name_codes)
+
+    @classmethod
+    def concat(cls, buffers):
+        """
+        Buffer holding the ways of several buffers; the last one must know every code
+        """
+        parts = [buffer.columns() for buffer in buffers]
+        columns = {column: np.concatenate([part[column] for part in parts])
+                   for column in WAY_COLUMNS if column != 'offsets'}
+        lengths = np.concatenate([np.diff(part['offsets']) for part in parts])
+        columns['offsets'] = np.concatenate([[0], np.cumsum(lengths)])
+        return cls.from_columns(columns, buffers[-1].highway_codes, buffers[-1].name_codes)
+
+    def save(self, path, attrs=None):
+        """
+        Write the way store to a directory, replacing it atomically
+
+        Args:
+            path (str): Way store directory
+            attrs (dict): JSON-serialisable metadata (network type, replication state)
+        """
+        tmp_path = path + '.tmp'
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        for column, values in self.columns().items():
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values)
+        meta = {
+            'highway_values': sorted(self.highway_codes, key=self.highway_codes.get),
+            'name_values': sorted(self.name_codes, key=self.name_codes.get),
+            'attrs': attrs or {},
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a way store written by save()
+
+        Returns:
+            tuple: (buffer, attrs)
+        """
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        columns = {column: np.load(os.path.join(path, f"{column}.npy")) for column in WAY_COLUMNS}
+        buffer = cls.from_columns(
+            columns,
+            {value: code for code, value in enumerate(meta['highway_values'])},
+            {value: code for code, value in enumerate(meta['name_values'])},
+        )
+        return buffer, meta['attrs']
+
+
+def read_ways(pbf_path, network_type='all', location_storage='flex_mem', keep_unselected=False):
+    """
+    Stream the highway ways of a PBF extract that belong to a network type
+
+    Args:
+        pbf_path (str): Path to the .osm.pbf extract
+        network_type (str): Type of network ('drive', 'walk', 'bike', 'all')
+        location_storage (str): osmium node location index, e.g.
+            'sparse_file_array,/tmp/bd_nodes.idx' to keep locations on disk
+        keep_unselected (bool): Also buffer the other highway ways, flagged
+            as not selected
+    """
+    import osmium
+
+    buffer = _WayBuffer()
+    processor = (
+        osmium.FileProcessor(pbf_path, osmium.osm.NODE | osmium.osm.WAY)
+        .with_locations(location_storage)
+        .with_filter(osmium.filter.KeyFilter('highway'))
+    )
+    for obj in processor:
+        if not obj.is_way():
+            continue
+        tags = {tag.k: tag.v for tag in obj.tags}
+        selected = way_matches(tags, network_type)
+        if not selected and not keep_unselected:
+            continue
+        refs, lons, lats = [], [], []
+        for node in obj.nodes:
+            if node.location.valid():
+                refs.append(node.ref)
+                lons.append(node.lon)
+                lats.append(node.lat)
+        if len(refs) >= 2:
+            buffer.add(obj.id, refs, lons, lats, tags, selected)
+    return buffer
+
+
+def replication_state(pbf_path):
+    """
+    Replication sequence number and timestamp from the header of an extract
+
+    Returns:
+        dict: replication_sequence and replication_timestamp, when the
+        extract records them (e.g. Geofabrik extracts)
+    """
+    import osmium
+
+    try:
+        header = osmium.io.Reader(pbf_path, osmium.osm.osm_entity_bits.NOTHING).header()
+        sequence = header.get('osmosis_replication_sequence_number')
+        timestamp = header.get('osmosis_replication_timestamp')
+    except Exception as e:
+        print(f"Error reading replication state of {pbf_path}: {e}")
+        return {}
+    state = {}
+    if sequence:
+        state['replication_sequence'] = int(sequence)
+    if timestamp:
+        state['replication_timestamp'] = timestamp
+    return state
+
+
+def build_road_arrays(buffer, node_refs=None):
+    """
+    Split buffered ways into graph edges and pack them as RoadGraphArrays
+
+    Both directions of a way become edges unless no network type travels
+    one of them; edge_networks records which types use each edge.
+
+    Args:
+        buffer (_WayBuffer): Ways to split (all of them, selected or not)
+        node_refs (ndarray): Node references that are graph nodes anyway,
+            e.g. because ways outside the buffer share them
+    """
+    import shapely
+
+    refs = np.frombuffer(buffer.refs, dtype=np.int64)
+    lon = np.frombuffer(buffer.lon, dtype=np.float64)
+    lat = np.frombuffer(buffer.lat, dtype=np.float64)
+    offsets = np.frombuffer(buffer.offsets, dtype=np.int64)
+    n_ways = len(offsets) - 1
+    way_of = np.repeat(np.arange(n_ways), np.diff(offsets))
+
+    # Graph nodes: way ends and any node referenced more than once
+    _, inverse, counts = np.unique(refs, return_inverse=True, return_counts=True)
+    is_node = counts[inverse.ravel()] > 1
+    is_node[offsets[:-1]] = True
+    is_node[offsets[1:] - 1] = True
+    if node_refs is not None:
+        is_node |= np.isin(refs, node_refs)
+
+    # Segments run between consecutive graph nodes of the same way
+    positions = np.flatnonzero(is_node)
+    same_way = way_of[positions[:-1]] == way_of[positions[1:]]
+    start = positions[:-1][same_way]
+    end = positions[1:][same_way]
+    seg_way = way_of[start]
+
+    step = great_circle_distance(lon[:-1], lat[:-1], lon[1:], lat[1:])
+    cumulative = np.concatenate([[0.0], np.cumsum(step)])
+    seg_length = cumulative[end] - cumulative[start]
+
+    n_points = end - start + 1
+    point_start = np.concatenate([[0], np.cumsum(n_points)[:-1]])
+    point_pos = (np.arange(n_points.sum())
+                 - np.repeat(point_start, n_points) + np.repeat(start, n_points))
+    geometries = shapely.linestrings(
+        np.column_stack([lon[point_pos], lat[point_pos]]),
+        indices=np.repeat(np.arange(len(start)), n_points)
+    )
+
+    # Expand segments into the directed edges some network type travels
+    way_direction_codes = np.frombuffer(buffer.direction, dtype=np.int8)
+    way_bits = np.frombuffer(buffer.networks, dtype=np.uint8)
+    forward_bits = edge_network_bits(way_bits, way_direction_codes, True)[seg_way]
+    backward_bits = edge_network_bits(way_bits, way_direction_codes, False)[seg_way]
+    forward = forward_bits != 0
+    backward = backward_bits != 0
+    edge_bits = np.concatenate([forward_bits[forward], backward_bits[backward]])
+    u_ref = np.concatenate([refs[start][forward], refs[end][backward]])
+    v_ref = np.concatenate([refs[end][forward], refs[start][backward]])
+    edge_seg = np.concatenate([np.flatnonzero(forward), np.flatnonzero(backward)])
+    edge_geom = np.concatenate([geometries[forward], shapely.reverse(geometries[backward])])
+
+    node_ids, first = np.unique(refs[positions], return_index=True)
+    u = np.searchsorted(node_ids, u_ref)
+    v = np.searchsorted(node_ids, v_ref)
+    order = np.lexsort((v, u))
+    u, v, edge_seg, edge_geom, edge_bits = u[order], v[order], edge_seg[order], edge_geom[order], edge_bits[order]
+
+    # Parallel edges between the same node pair get increasing keys
+    new_pair = np.ones(len(u), dtype=bool)
+    new_pair[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+    group_start = np.maximum.accumulate(np.where(new_pair, np.arange(len(u)), 0))
+    edge_key = np.arange(len(u)) - group_start
+
+    indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(u, minlength=len(node_ids)), out=indptr[1:])
+
+    # Sorted lookup tables, remapped from first-seen codes
+    highway_classes = sorted(buffer.highway_codes, key=str)
+    highway_remap = np.empty(len(highway_classes), dtype=np.int16)
+    for code, value in enumerate(highway_classes):
+        highway_remap[buffer.highway_codes[value]] = code
+    names = sorted(buffer.name_codes)
+    name_remap = np.empty(len(names) + 1, dtype=np.int32)
+    for code, value in enumerate(names):
+        name_remap[buffer.name_codes[value]] = code
+    name_remap[-1] = len(names)
+
+    edge_way = seg_way[edge_seg]
+    wkb = shapely.to_wkb(edge_geom)
+    geometry_offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in wkb], out=geometry_offsets[1:])
+
+    arrays = {
+        'node_ids': node_ids,
+        'node_x': lon[positions][first],
+        'node_y': lat[positions][first],
+        'indptr': indptr,
+        'indices': v.astype(np.int64),
+        'edge_key': edge_key.astype(np.int32),
+        'edge_length': seg_length[edge_seg],
+        'edge_highway': highway_remap[np.frombuffer(buffer.highway, dtype=np.int64)[edge_way]],
+        'edge_name': name_remap[np.frombuffer(buffer.name, dtype=np.int64)[edge_way]],
+        'edge_osmid': np.frombuffer(buffer.way_ids, dtype=np.int64)[edge_way],
+        'edge_oneway': np.frombuffer(buffer.direction, dtype=np.int8)[edge_way] != 0,
+        'edge_geometry_offsets': geometry_offsets,
+        'edge_geometry_wkb': np.frombuffer(b''.join(wkb), dtype=np.uint8),
+        'edge_networks': edge_bits,
+    }
+    return RoadGraphArrays(arrays, highway_classes, names,
+                           {'crs': 'epsg:4326', 'simplified': True, 'network_types': NETWORK_TYPES})
+
+
+def ingest_pbf(pbf_path, network_type='drive', location_storage='flex_mem', ways_path=None):
+    """
+    Build the road graph arrays from a local PBF extract
+
+    The 'all' network is read once; the network of each type is a view of it.
+
+    Args:
+        pbf_path (str): Path to the .osm.pbf extract
+        network_type (str): Type of network ('drive', 'walk', 'bike', 'all'),
+            or None for the 'all' graph with the network types of every edge
+        location_storage (str): osmium node location index (see read_ways)
+        ways_path (str): Also write the way store here, so OSM change files
+            can be applied to the graph later
+
+    Returns:
+        RoadGraphArrays: The road network, ready to be saved to the graph cache
+    """
+    buffer = read_ways(pbf_path, 'all', location_storage, keep_unselected=ways_path is not None)
+    selected = buffer.columns()['selected']
+    network = buffer if selected.all() else buffer.select(selected)
+    print(f"Read {len(network.way_ids)} highway ways ({len(network.refs)} node references)")
+    road_arrays = build_road_arrays(network)
+    state = replication_state(pbf_path)
+    road_arrays.graph_attrs.update(state)
+    if ways_path is not None:
+        buffer.save(ways_path, dict(state, fingerprint=road_arrays.fingerprint()))
+    if network_type is None:
+        return road_arrays
+    return road_arrays.network_view(network_type)
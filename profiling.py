@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Stage Profiling
+Structured timing and memory spans for the analysis pipeline.
+
+Code marks stages with `with profiler.stage('name'):`. A disabled profiler
+makes that a no-op, so the spans stay in place permanently. When enabled,
+every span records wall and CPU time, resident memory before and after,
+the process peak RSS, the change in live Python objects and, with
+tracemalloc, the peak of Python allocations inside the span (nested spans
+are accounted so a child never hides its parent's peak).
+
+Spans are written as JSON lines (one object per finished span) or as a
+Chrome trace (load it in chrome://tracing or https://ui.perfetto.dev). A
+single named stage can additionally run under cProfile or pyinstrument.
+"""
+
+import gc
+import json
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+FORMATS = ['jsonl', 'chrome']
+TOOLS = ['cprofile', 'pyinstrument']
+
+
+def current_rss_mb():
+    """
+    Resident set size of this process in MB (0 where /proc is unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Profiler:
+    def __init__(self, output=None, fmt='jsonl', trace_memory=False, count_objects=True,
+                 profile_stage=None, profile_tool='cprofile'):
+        """
+        Args:
+            output (str): File to write spans to; None disables profiling
+            fmt (str): 'jsonl' or 'chrome'
+            trace_memory (bool): Track peak Python allocations per span with
+                tracemalloc (accurate, but slows the run down noticeably)
+            count_objects (bool): Record the change in live objects per span
+            profile_stage (str): Run the span with this name under profile_tool
+            profile_tool (str): 'cprofile' (.prof file) or 'pyinstrument' (.html file)
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown profile format: {fmt}")
+        if profile_tool not in TOOLS:
+            raise ValueError(f"Unknown profiling tool: {profile_tool}")
+        self.output = output
+        self.fmt = fmt
+        self.trace_memory = trace_memory
+        self.count_objects = count_objects
+        self.profile_stage = profile_stage
+        self.profile_tool = profile_tool
+        self.spans = []
+        self._stack = []
+        self._origin = time.perf_counter()
+        self._file = None
+
+    @property
+    def enabled(self):
+        return self.output is not None
+
+    def start(self):
+        """
+        Open the output and start tracemalloc if requested
+        """
+        if not self.enabled:
+            return
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.fmt == 'jsonl':
+            self._file = open(self.output, 'w', encoding='utf-8')
+        self._origin = time.perf_counter()
+
+    def close(self):
+        """
+        Flush all spans (the Chrome trace is written here) and stop tracing
+        """
+        if not self.enabled:
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.fmt == 'chrome':
+            self.write_chrome_trace(self.output)
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        print(f"Profile with {len(self.spans)} spans written to {self.output}")
+
+    @contextmanager
+    def stage(self, name, **attrs):
+        """
+        Record a span around the enclosed block
+
+        Args:
+            name (str): Stage name
+            **attrs: Extra JSON-serialisable attributes stored with the span
+        """
+        if not self.enabled:
+            yield
+            return
+
+        # Counting objects allocates a list of them all, so do it outside the traced window
+        objects_start = len(gc.get_objects()) if self.count_objects else None
+        frame = {'name': name, 'peak_seen': 0}
+        if self.trace_memory and tracemalloc.is_tracing():
+            # Resetting the peak would lose the parent's, so carry it over
+            if self._stack:
+                parent = self._stack[-1]
+                parent['peak_seen'] = max(parent['peak_seen'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            frame['traced_start'] = tracemalloc.get_traced_memory()[0]
+        self._stack.append(frame)
+
+        rss_start = current_rss_mb()
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        tool = self._start_tool() if name == self.profile_stage else None
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if tool is not None:
+                self._stop_tool(tool, name)
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            self._stack.pop()
+            py_peak = None
+            if 'traced_start' in frame and tracemalloc.is_tracing():
+                peak = max(frame['peak_seen'], tracemalloc.get_traced_memory()[1])
+                py_peak = (peak - frame['traced_start']) / (1024 * 1024)
+                if self._stack:
+                    self._stack[-1]['peak_seen'] = max(self._stack[-1]['peak_seen'], peak)
+            span = {
+                'name': name,
+                'parent': self._stack[-1]['name'] if self._stack else None,
+                'depth': len(self._stack),
+                'start_s': start - self._origin,
+                'wall_s': wall,
+                'cpu_s': cpu,
+                'rss_start_mb': rss_start,
+                'rss_end_mb': current_rss_mb(),
+                'peak_rss_mb': peak_rss_mb(),
+                'thread': threading.get_ident(),
+            }
+            if py_peak is not None:
+                span['py_peak_mb'] = py_peak
+            if objects_start is not None:
+                span['objects_delta'] = len(gc.get_objects()) - objects_start
+            if attrs:
+                span['attrs'] = attrs
+            if error:
+                span['error'] = error
+            self._record(span)
+
+    def _record(self, span):
+        self.spans.append(span)
+        if self._file is not None:
+            self._file.write(json.dumps(span) + '\n')
+            self._file.flush()
+
+    def _start_tool(self):
+        if self.profile_tool == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler as InstrumentProfiler
+            except ImportError:
+                print("pyinstrument is not installed; falling back to cProfile")
+                self.profile_tool = 'cprofile'
+            else:
+                tool = InstrumentProfiler()
+                tool.start()
+                return tool
+        import cProfile
+
+        tool = cProfile.Profile()
+        tool.enable()
+        return tool
+
+    def _stop_tool(self, tool, name):
+        base = f"{os.path.splitext(self.output)[0]}.{name.replace(':', '_')}"
+        if self.profile_tool == 'pyinstrument':
+            tool.stop()
+            with open(base + '.html', 'w', encoding='utf-8') as f:
+                f.write(tool.output_html())
+            print(f"pyinstrument report for {name} written to {base}.html")
+            return
+        import pstats
+
+        tool.disable()
+        tool.dump_stats(base + '.prof')
+        print(f"cProfile stats for {name} written to {base}.prof; top functions:")
+        pstats.Stats(tool).sort_stats('cumulative').print_stats(15)
+
+    def write_chrome_trace(self, path):
+        """
+        Write all spans as complete ('X') events of the Chrome trace format
+        """
+        pid = os.getpid()
+        events = [{
+            'name': span['name'],
+            'cat': 'stage',
+            'ph': 'X',
+            'ts': span['start_s'] * 1e6,
+            'dur': span['wall_s'] * 1e6,
+            'pid': pid,
+            'tid': span['thread'],
+            'args': {k: v for k, v in span.items() if k not in ('name', 'start_s', 'wall_s', 'thread')},
+        } for span in self.spans]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
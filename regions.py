@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Regional Extraction
+Cut bbox, radius or polygon subgraphs out of the cached national road network.
+
+Nodes inside the region come from the KD-tree of the spatial index, and
+only the outgoing CSR ranges of those nodes are read from the memory-mapped
+arrays, so the cost follows the size of the region rather than of the
+network: a 50 km city region comes out of the national cache in
+milliseconds. Highway classes are filtered with a boolean lookup table
+over the integer class codes instead of matching strings.
+"""
+
+import numpy as np
+
+MAJOR_ROAD_CLASSES = ['motorway', 'trunk', 'primary']
+
+
+def highway_lookup(highway_classes, classes, include_links=True):
+    """
+    Boolean table over highway class codes, True for the wanted classes
+
+    Args:
+        highway_classes (list): Class labels indexed by code (RoadGraphArrays.highway_classes)
+        classes (iterable): Wanted classes, e.g. ['trunk', 'primary']
+        include_links (bool): Also keep the matching *_link classes
+    """
+    wanted = set(classes)
+    if include_links:
+        wanted |= {f"{highway}_link" for highway in wanted}
+    return np.array([highway in wanted for highway in highway_classes], dtype=bool)
+
+
+def highway_mask(road_arrays, classes, include_links=True):
+    """
+    Edge mask of the wanted highway classes over the whole network
+    """
+    lookup = highway_lookup(road_arrays.highway_classes, classes, include_links)
+    return lookup[np.asarray(road_arrays.edge_highway)]
+
+
+def outgoing_edges(road_arrays, nodes):
+    """
+    Positions of all edges leaving the given nodes, in CSR order for sorted nodes
+    """
+    nodes = np.asarray(nodes, dtype=np.int64)
+    indptr = np.asarray(road_arrays.indptr)
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    offsets = np.zeros(len(nodes), dtype=np.int64)
+    np.cumsum(counts[:-1], out=offsets[1:])
+    return np.repeat(starts - offsets, counts) + np.arange(counts.sum(), dtype=np.int64)
+
+
+def region_nodes(index, bbox=None, center=None, radius=None, polygon=None):
+    """
+    Positions of the nodes inside a region, given as exactly one of a box, circle or polygon
+
+    Args:
+        index (SpatialIndex): Node index of the network
+        bbox (tuple): (west, south, east, north) in degrees
+        center (tuple): (lat, lon) of a circle, with radius
+        radius (float): Circle radius in metres
+        polygon (shapely geometry): Polygon or MultiPolygon in EPSG:4326
+    """
+    given = [bbox is not None, center is not None, polygon is not None]
+    if sum(given) != 1:
+        raise ValueError("Give exactly one of bbox, center (with radius) or polygon")
+    if bbox is not None:
+        return index.nodes_within_bounds(*bbox)
+    if center is not None:
+        if radius is None:
+            raise ValueError("A center needs a radius in metres")
+        lat, lon = center
+        return index.nodes_within_radius(lon, lat, radius)
+    return index.nodes_within_polygon(polygon)
+
+
+def extract_region(road_arrays, index, bbox=None, center=None, radius=None, polygon=None,
+                   highway=None, include_links=True):
+    """
+    Road graph of the edges with both ends inside a region
+
+    Args:
+        road_arrays (RoadGraphArrays): Road network
+        index (SpatialIndex): Node index of the network
+        bbox, center, radius, polygon: Region (see region_nodes)
+        highway (iterable): Keep only these highway classes (default: all)
+        include_links (bool): Also keep the *_link classes of highway
+
+    Returns:
+        RoadGraphArrays: The regional subgraph, with arrays copied into memory
+    """
+    nodes = region_nodes(index, bbox, center, radius, polygon)
+    edges = outgoing_edges(road_arrays, nodes)
+    inside = np.zeros(road_arrays.n_nodes, dtype=bool)
+    inside[nodes] = True
+    keep = inside[np.asarray(road_arrays.indices)[edges]]
+    if highway is not None:
+        lookup = highway_lookup(road_arrays.highway_classes, highway, include_links)
+        keep &= lookup[np.asarray(road_arrays.edge_highway)[edges]]
+    return road_arrays.edge_subgraph(edges[keep])
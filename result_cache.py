@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Result Cache
+Stores analysis results under a hash of the graph, the metric and its parameters.
+
+Each entry lives at <cache_dir>/<metric>/<key>.pkl, where the key is derived
+from the graph fingerprint (a hash of the graph arrays), the metric name and
+its parameters. A result is therefore only reused for exactly the graph and
+settings it was computed from; a re-downloaded or differently filtered
+network simply misses the cache instead of returning stale numbers.
+
+The most recent entry for each metric, parameter set and scope (such as the
+data source and network type) is also tracked, so metrics that support it
+can be updated incrementally from the previous version of the same network.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+
+class ResultCache:
+    def __init__(self, cache_dir, keep_per_metric=5):
+        """
+        Args:
+            cache_dir (str): Directory holding the cached results
+            keep_per_metric (int): Entries kept per metric before the oldest are pruned
+        """
+        self.cache_dir = cache_dir
+        self.keep_per_metric = keep_per_metric
+
+    @staticmethod
+    def _params_hash(params):
+        encoded = json.dumps(params or {}, sort_keys=True, default=str)
+        return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:12]
+
+    def make_key(self, fingerprint, metric, params=None):
+        """
+        Cache key for a metric computed with the given parameters on a graph
+        """
+        encoded = json.dumps([fingerprint, metric, params or {}], sort_keys=True, default=str)
+        return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, metric, key):
+        return os.path.join(self.cache_dir, metric, f"{key}.pkl")
+
+    def _latest_path(self, metric, params, scope):
+        pointer = dict(params or {}, _scope=scope) if scope else params
+        return os.path.join(self.cache_dir, metric, f"latest-{self._params_hash(pointer)}.json")
+
+    def get(self, metric, key):
+        """
+        Cached value for a key, or None on a miss
+        """
+        path = self._entry_path(metric, key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Error loading cached {metric}: {e}")
+            return None
+
+    def put(self, metric, key, value, params=None, fingerprint=None, scope=None):
+        """
+        Store a value and mark it as the latest result for its metric, parameters and scope
+
+        Args:
+            scope (dict): What else the latest pointer is kept apart by, e.g.
+                {'data_source': ..., 'network_type': ...}
+        """
+        metric_dir = os.path.join(self.cache_dir, metric)
+        os.makedirs(metric_dir, exist_ok=True)
+        try:
+            tmp_path = self._entry_path(metric, key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f)
+            os.replace(tmp_path, self._entry_path(metric, key))
+            with open(self._latest_path(metric, params, scope), 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'fingerprint': fingerprint}, f)
+            self._prune(metric_dir)
+        except Exception as e:
+            print(f"Error saving {metric} to result cache: {e}")
+
+    def latest(self, metric, params=None, scope=None):
+        """
+        Most recently stored (fingerprint, value) for a metric, parameters and scope, or None
+        """
+        path = self._latest_path(metric, params, scope)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            pointer = json.load(f)
+        value = self.get(metric, pointer['key'])
+        if value is None:
+            return None
+        return pointer.get('fingerprint'), value
+
+    def _prune(self, metric_dir):
+        entries = sorted(
+            (os.path.join(metric_dir, name) for name in os.listdir(metric_dir) if name.endswith('.pkl')),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        for path in entries[self.keep_per_metric:]:
+            os.remove(path)
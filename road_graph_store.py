@@ -0,0 +1,769 @@
+#!/usr/bin/env python3
+"""
+Columnar Road Graph Store
+A compact, memory-mapped on-disk format for the Bangladesh road network.
+
+The graph is stored as a directory of NumPy arrays:
+- CSR adjacency (indptr / indices) over the directed edges
+- Node OSM ids and coordinates
+- Edge attributes (length, highway class code, name id, osmid, oneway)
+- Edge geometries as concatenated WKB bytes with an offsets array
+- A small meta.json with the highway class and street name lookup tables
+- Optionally, the network types (drive, walk, bike, all) using each edge as a
+  bit mask, so one superset graph serves every type through network_view()
+
+Loading only maps the arrays into memory, so it takes well under a second
+even for the national network. A NetworkX graph is only built when a caller
+asks for one through to_networkx().
+
+A loaded graph can be handed to other processes without copying it per
+process (see share() and from_shared()): arrays still mapped from the cache
+files are mapped again by path, derived arrays are copied once into shared
+memory.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+ARRAY_NAMES = [
+    'node_ids', 'node_x', 'node_y',
+    'indptr', 'indices',
+    'edge_key', 'edge_length', 'edge_highway', 'edge_name',
+    'edge_osmid', 'edge_oneway',
+    'edge_geometry_offsets', 'edge_geometry_wkb',
+]
+
+# Arrays only some graphs carry (None when missing)
+OPTIONAL_ARRAY_NAMES = ['edge_networks']
+
+# Columns a view reads from the graph it was derived from on first use
+NODE_COLUMNS = ['node_ids', 'node_x', 'node_y']
+EDGE_COLUMNS = ['edge_key', 'edge_length', 'edge_highway', 'edge_name', 'edge_osmid', 'edge_oneway'] \
+    + OPTIONAL_ARRAY_NAMES
+
+# Edges decoded at once when reading geometries in bulk
+GEOMETRY_CHUNK_SIZE = 1000000
+
+
+def _gather_wkb(offsets, wkb, edges):
+    """
+    Offsets and concatenated WKB bytes of the selected edges, in the given order
+    """
+    starts = np.asarray(offsets)[edges]
+    lengths = np.asarray(offsets)[edges + 1] - starts
+    new_offsets = np.zeros(len(edges) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    byte_index = np.repeat(starts - new_offsets[:-1], lengths)
+    byte_index += np.arange(len(byte_index))
+    return new_offsets, np.asarray(wkb)[byte_index]
+
+
+def _is_file_mapping(array):
+    """
+    Whether an array is a whole memory-mapped .npy payload, so it can be mapped again by path
+    """
+    return (isinstance(array, np.memmap) and array.base is getattr(array, '_mmap', None)
+            and array.filename is not None)
+
+
+def share_arrays(arrays):
+    """
+    Describe arrays so that other processes can use them without a copy each
+
+    Arrays memory-mapped from files are referred to by path and offset;
+    any other array is copied once into a shared memory block.
+
+    Args:
+        arrays (dict): Arrays by name
+
+    Returns:
+        tuple: (spec dict to pass to attach_arrays, list of the SharedMemory
+        blocks created, which the caller closes and unlinks when done)
+    """
+    from multiprocessing import shared_memory
+
+    spec, blocks = {}, []
+    for name, array in arrays.items():
+        if _is_file_mapping(array):
+            spec[name] = ('file', array.filename, array.offset, array.dtype.str, array.shape)
+            continue
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        spec[name] = ('shm', block.name, 0, array.dtype.str, array.shape)
+        blocks.append(block)
+    return spec, blocks
+
+
+def attach_arrays(spec):
+    """
+    Read-only arrays from a share_arrays spec
+
+    Returns:
+        tuple: (arrays dict, list of the attached SharedMemory blocks, to be
+        kept alive while the arrays are in use)
+    """
+    from multiprocessing import shared_memory
+
+    arrays, blocks = {}, []
+    for name, (kind, location, offset, dtype, shape) in spec.items():
+        if kind == 'file':
+            array = np.memmap(location, dtype=dtype, mode='r', offset=offset, shape=shape)
+        else:
+            block = shared_memory.SharedMemory(name=location)
+            blocks.append(block)
+            array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            array.flags.writeable = False
+        arrays[name] = array
+    return arrays, blocks
+
+
+def _first(value, default=None):
+    """
+    Return the first element of an OSMnx list attribute, or the value itself
+    """
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else default
+    if value is None:
+        return default
+    return value
+
+
+class RoadGraphArrays:
+    """
+    Road network held as flat NumPy arrays in CSR order.
+
+    Edge arrays are aligned with the CSR layout: the outgoing edges of node i
+    are the positions indptr[i]:indptr[i + 1] of every edge_* array.
+
+    A view (see network_view) only builds its own CSR arrays. Its node and
+    edge columns are gathered from the graph it was derived from the first
+    time they are used, and its geometries are read from that graph; they
+    are only copied when edge_geometry_offsets or edge_geometry_wkb is
+    accessed directly, so bulk readers go through geometry_arrays(),
+    geometries_wkb() or geometries() instead.
+    """
+
+    def __init__(self, arrays, highway_classes, names, graph_attrs=None, geometry_source=None,
+                 column_source=None):
+        """
+        Args:
+            arrays (dict): Arrays by name (see ARRAY_NAMES and OPTIONAL_ARRAY_NAMES)
+            highway_classes (list): Highway class labels indexed by code
+            names (list): Street names indexed by code
+            graph_attrs (dict): Graph attributes such as crs
+            geometry_source (tuple): (offsets, wkb, edge index) of the graph
+                whose geometries are shared, instead of the geometry arrays
+            column_source (tuple): (graph, node index, edge index) to read the
+                node and edge columns missing from arrays from; an index of
+                None means the same positions
+        """
+        self._geometry_source = geometry_source
+        self._column_source = column_source
+        self._edge_geometry_offsets = None
+        self._edge_geometry_wkb = None
+        for name in ARRAY_NAMES:
+            if geometry_source is not None and name.startswith('edge_geometry'):
+                continue
+            if column_source is not None and name not in arrays and name in NODE_COLUMNS + EDGE_COLUMNS:
+                continue
+            setattr(self, name, arrays[name])
+        for name in OPTIONAL_ARRAY_NAMES:
+            if column_source is None or name in arrays:
+                setattr(self, name, arrays.get(name))
+        self.highway_classes = list(highway_classes)
+        self.names = list(names)
+        self.graph_attrs = dict(graph_attrs or {})
+        self._node_order = None
+
+    def __getattr__(self, name):
+        # Only called for missing attributes: the columns a view has not read yet
+        if self.__dict__.get('_column_source') is None or name not in NODE_COLUMNS + EDGE_COLUMNS:
+            raise AttributeError(name)
+        value = self._column(name)
+        setattr(self, name, value)
+        return value
+
+    def _column(self, name, index=None):
+        """
+        A node or edge column, or its values at some positions, without
+        keeping a copy of a column this view has not read yet
+        """
+        if name in self.__dict__:
+            values = self.__dict__[name]
+            return values if index is None or values is None else np.asarray(values)[index]
+        graph, node_index, edge_index = self._column_source
+        positions = node_index if name in NODE_COLUMNS else edge_index
+        if positions is None:
+            positions = index
+        elif index is not None:
+            positions = positions[index]
+        return graph._column(name, positions)
+
+    @property
+    def edge_geometry_offsets(self):
+        self._own_geometries()
+        return self._edge_geometry_offsets
+
+    @edge_geometry_offsets.setter
+    def edge_geometry_offsets(self, value):
+        self._edge_geometry_offsets = value
+
+    @property
+    def edge_geometry_wkb(self):
+        self._own_geometries()
+        return self._edge_geometry_wkb
+
+    @edge_geometry_wkb.setter
+    def edge_geometry_wkb(self, value):
+        self._edge_geometry_wkb = value
+
+    def _own_geometries(self):
+        """
+        Copy shared geometries into arrays of this graph
+        """
+        if self._geometry_source is not None:
+            offsets, wkb, edges = self._geometry_source
+            self._edge_geometry_offsets, self._edge_geometry_wkb = _gather_wkb(offsets, wkb, edges)
+            self._geometry_source = None
+
+    def geometry_arrays(self, edges):
+        """
+        (offsets, wkb, edge positions) to read the geometries of some edges
+        from, without copying geometries this graph shares with another
+        """
+        if self._geometry_source is not None:
+            offsets, wkb, source_edges = self._geometry_source
+            return offsets, wkb, source_edges[edges]
+        return self._edge_geometry_offsets, self._edge_geometry_wkb, edges
+
+    @property
+    def n_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def n_edges(self):
+        return len(self.indices)
+
+    def edge_sources(self):
+        """
+        Source node index of every edge (the COO row array of the CSR matrix)
+        """
+        return np.repeat(
+            np.arange(self.n_nodes, dtype=self.indices.dtype),
+            np.diff(self.indptr)
+        )
+
+    def node_positions(self, ids):
+        """
+        Positions of OSM node ids in the node arrays, -1 where missing
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.n_nodes == 0:
+            return np.full(ids.shape, -1, dtype=np.int64)
+        if self._node_order is None:
+            self._node_order = np.argsort(self.node_ids, kind='stable')
+        node_ids = np.asarray(self.node_ids)
+        found = self._node_order[
+            np.minimum(np.searchsorted(node_ids, ids, sorter=self._node_order), self.n_nodes - 1)
+        ]
+        return np.where(node_ids[found] == ids, found, -1)
+
+    def undirected_csr(self):
+        """
+        CSR adjacency of the simple undirected graph (no self-loops or parallel edges)
+
+        Returns:
+            tuple: (indptr, indices) arrays over node positions
+        """
+        n = self.n_nodes
+        src = self.edge_sources().astype(np.int64)
+        dst = np.asarray(self.indices, dtype=np.int64)
+        keep = src != dst
+        keys = np.unique(np.concatenate([src[keep] * n + dst[keep], dst[keep] * n + src[keep]]))
+        rows = keys // n
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return indptr, keys % n
+
+    def highway_labels(self):
+        """
+        Highway class string of every edge
+        """
+        return np.asarray(self.highway_classes, dtype=object)[self.edge_highway]
+
+    def name_labels(self, default=None):
+        """
+        Street name of every edge, with default for unnamed edges
+        """
+        lookup = np.asarray(self.names + [default], dtype=object)
+        return lookup[self.edge_name]
+
+    def geometry_wkb(self, edge_index):
+        """
+        WKB bytes of a single edge geometry
+        """
+        offsets, wkb, edge_index = self.geometry_arrays(edge_index)
+        return wkb[offsets[edge_index]:offsets[edge_index + 1]].tobytes()
+
+    def geometries_wkb(self, edge_indices):
+        """
+        WKB bytes of some edge geometries, reading only their part of the geometry buffer
+        """
+        offsets, wkb = _gather_wkb(*self.geometry_arrays(np.asarray(edge_indices, dtype=np.int64)))
+        buffer = wkb.tobytes()
+        return [buffer[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    def geometries(self, edge_indices=None, chunk_size=GEOMETRY_CHUNK_SIZE):
+        """
+        Decode edge geometries into a shapely array
+
+        Args:
+            edge_indices (array-like): Edges to decode (default: all edges)
+            chunk_size (int): Edges whose WKB is held in memory at once
+        """
+        import shapely
+
+        if edge_indices is None:
+            edge_indices = np.arange(self.n_edges)
+        edge_indices = np.asarray(edge_indices, dtype=np.int64)
+        parts = [shapely.from_wkb(self.geometries_wkb(edge_indices[start:start + chunk_size]))
+                 for start in range(0, len(edge_indices), chunk_size)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=object)
+
+    def to_geodataframe(self):
+        """
+        Edges as a GeoDataFrame with u, v, key, osmid, highway, name, length and geometry
+        """
+        import geopandas as gpd
+
+        src = self.edge_sources()
+        return gpd.GeoDataFrame(
+            {
+                'u': self.node_ids[src],
+                'v': self.node_ids[self.indices],
+                'key': np.asarray(self.edge_key),
+                'osmid': np.asarray(self.edge_osmid),
+                'highway': self.highway_labels(),
+                'name': self.name_labels(),
+                'length': np.asarray(self.edge_length),
+            },
+            geometry=self.geometries(),
+            crs=self.graph_attrs.get('crs', 'epsg:4326')
+        )
+
+    def edge_subgraph(self, edge_mask, share_geometry=None, lazy=False):
+        """
+        Road graph made of the selected edges and the nodes they touch
+
+        Args:
+            edge_mask (ndarray): Boolean mask (or index array) over edges
+            share_geometry (bool): Read geometries from this graph instead of
+                copying them (default: only if this graph shares them already)
+            lazy (bool): Only build the CSR arrays; node and edge columns are
+                read from this graph on first use and geometries are shared
+
+        Returns:
+            RoadGraphArrays: The subgraph, with arrays copied into memory unless lazy
+        """
+        edges = np.flatnonzero(edge_mask) if np.asarray(edge_mask).dtype == bool else np.asarray(edge_mask)
+        # Look up the sources of the selected edges only, so small subgraphs stay cheap
+        src = (np.searchsorted(np.asarray(self.indptr), edges, side='right') - 1).astype(self.indices.dtype)
+        dst = np.asarray(self.indices)[edges]
+        # A mask over all nodes is cheaper than sorting the endpoints
+        used = np.zeros(self.n_nodes, dtype=bool)
+        used[src] = True
+        used[dst] = True
+        nodes = np.flatnonzero(used)
+        remap = np.full(self.n_nodes, -1, dtype=np.int64)
+        remap[nodes] = np.arange(len(nodes))
+
+        # Group edges by new source position (already the case for boolean masks)
+        order = np.argsort(remap[src], kind='stable')
+        edges, src, dst = edges[order], src[order], dst[order]
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(remap[src], minlength=len(nodes)), out=indptr[1:])
+        arrays = {'indptr': indptr, 'indices': remap[dst].astype(self.indices.dtype)}
+
+        if lazy:
+            # Keep every node and edge: the columns of this graph serve as they are
+            if len(nodes) == self.n_nodes and len(edges) == self.n_edges:
+                arrays = {'indptr': self.indptr, 'indices': self.indices}
+                nodes = edges = None
+            return RoadGraphArrays(arrays, self.highway_classes, self.names, self.graph_attrs,
+                                   geometry_source=self.geometry_arrays(
+                                       np.arange(self.n_edges) if edges is None else edges),
+                                   column_source=(self, nodes, edges))
+
+        for name in NODE_COLUMNS:
+            arrays[name] = self._column(name, nodes)
+        for name in EDGE_COLUMNS:
+            values = self._column(name, edges)
+            if values is not None:
+                arrays[name] = values
+        if share_geometry is None:
+            share_geometry = self._geometry_source is not None
+        if share_geometry:
+            return RoadGraphArrays(arrays, self.highway_classes, self.names, self.graph_attrs,
+                                   geometry_source=self.geometry_arrays(edges))
+        arrays['edge_geometry_offsets'], arrays['edge_geometry_wkb'] = _gather_wkb(
+            *self.geometry_arrays(edges)
+        )
+        return RoadGraphArrays(arrays, self.highway_classes, self.names, self.graph_attrs)
+
+    def network_view(self, network_type):
+        """
+        Network of one type, derived from a graph that records the network types of its edges
+
+        The view has its own CSR arrays (nodes without edges of the type are
+        left out). Its other columns are read from this graph on first use
+        and its geometries are read from this graph, so loading a view
+        copies neither.
+
+        Args:
+            network_type (str): One of network_filters.NETWORK_TYPES
+
+        Returns:
+            RoadGraphArrays: The network of that type
+        """
+        from network_filters import BIDIRECTIONAL_NETWORK_TYPES, NETWORK_TYPES
+
+        if self.edge_networks is None:
+            raise ValueError("This road graph does not record the network types of its edges")
+        bit = self.graph_attrs.get('network_types', NETWORK_TYPES).index(network_type)
+        view = self.edge_subgraph((np.asarray(self.edge_networks) >> bit) & 1 == 1, lazy=True)
+        view.edge_networks = None
+        if network_type in BIDIRECTIONAL_NETWORK_TYPES:
+            view.edge_oneway = np.zeros(view.n_edges, dtype=bool)
+        view.graph_attrs['network_type'] = network_type
+        view.graph_attrs.pop('network_types', None)
+        return view
+
+    def subgraph(self, node_mask):
+        """
+        Road graph induced by the selected nodes (nodes left without edges are dropped)
+
+        Args:
+            node_mask (ndarray): Boolean mask over nodes
+        """
+        node_mask = np.asarray(node_mask)
+        return self.edge_subgraph(node_mask[self.edge_sources()] & node_mask[np.asarray(self.indices)])
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Road graph made of the edges of several graphs, joining nodes with the same OSM id
+
+        Highway class and name tables are merged, parallel edge keys are
+        renumbered and the graph attributes of the first part are kept.
+
+        Args:
+            parts (list): RoadGraphArrays to join
+
+        Returns:
+            RoadGraphArrays: The joined graph, with arrays copied into memory
+        """
+        all_ids = np.concatenate([np.asarray(part.node_ids) for part in parts])
+        node_ids, first = np.unique(all_ids, return_index=True)
+        node_x = np.concatenate([np.asarray(part.node_x) for part in parts])[first]
+        node_y = np.concatenate([np.asarray(part.node_y) for part in parts])[first]
+
+        highway_classes = sorted({h for part in parts for h in part.highway_classes}, key=str)
+        names = sorted({n for part in parts for n in part.names})
+        highway_code = {h: i for i, h in enumerate(highway_classes)}
+        name_code = {n: i for i, n in enumerate(names)}
+
+        u, v, highway_parts, name_parts, wkb_start, wkb_length, wkb_parts = [], [], [], [], [], [], []
+        byte_base = 0
+        for part in parts:
+            part_ids = np.asarray(part.node_ids)
+            u.append(np.searchsorted(node_ids, part_ids[part.edge_sources()]))
+            v.append(np.searchsorted(node_ids, part_ids[np.asarray(part.indices)]))
+            highway_remap = np.array([highway_code[h] for h in part.highway_classes] or [0], dtype=np.int16)
+            highway_parts.append(highway_remap[np.asarray(part.edge_highway)])
+            name_remap = np.array([name_code[n] for n in part.names] + [len(names)], dtype=np.int32)
+            name_parts.append(name_remap[np.asarray(part.edge_name)])
+            offsets, wkb, positions = part.geometry_arrays(np.arange(part.n_edges))
+            offsets = np.asarray(offsets)
+            wkb_start.append(offsets[positions] + byte_base)
+            wkb_length.append(offsets[positions + 1] - offsets[positions])
+            wkb_parts.append(wkb)
+            byte_base += len(wkb)
+        u, v = np.concatenate(u), np.concatenate(v)
+        order = np.lexsort((v, u))
+        u, v = u[order], v[order]
+
+        # Parallel edges between the same node pair get increasing keys
+        new_pair = np.ones(len(u), dtype=bool)
+        new_pair[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+        group_start = np.maximum.accumulate(np.where(new_pair, np.arange(len(u)), 0))
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u, minlength=len(node_ids)), out=indptr[1:])
+
+        starts = np.concatenate(wkb_start)[order]
+        lengths = np.concatenate(wkb_length)[order]
+        geometry_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=geometry_offsets[1:])
+        byte_index = np.repeat(starts - geometry_offsets[:-1], lengths)
+        byte_index += np.arange(len(byte_index))
+
+        def gather(array_name):
+            return np.concatenate([np.asarray(getattr(part, array_name)) for part in parts])[order]
+
+        arrays = {
+            'node_ids': node_ids,
+            'node_x': node_x,
+            'node_y': node_y,
+            'indptr': indptr,
+            'indices': v.astype(np.asarray(parts[0].indices).dtype),
+            'edge_key': (np.arange(len(u)) - group_start).astype(np.asarray(parts[0].edge_key).dtype),
+            'edge_length': gather('edge_length'),
+            'edge_highway': np.concatenate(highway_parts)[order],
+            'edge_name': np.concatenate(name_parts)[order],
+            'edge_osmid': gather('edge_osmid'),
+            'edge_oneway': gather('edge_oneway'),
+            'edge_geometry_offsets': geometry_offsets,
+            'edge_geometry_wkb': np.concatenate([np.asarray(wkb) for wkb in wkb_parts])[byte_index],
+        }
+        for name in OPTIONAL_ARRAY_NAMES:
+            if all(getattr(part, name) is not None for part in parts):
+                arrays[name] = gather(name)
+        return cls(arrays, highway_classes, names, parts[0].graph_attrs)
+
+    def fingerprint(self):
+        """
+        Short content hash of the adjacency and edge attribute arrays
+        """
+        import hashlib
+
+        digest = hashlib.sha1()
+        for name in ('node_ids', 'indptr', 'indices', 'edge_length', 'edge_highway'):
+            values = getattr(self, name) if name in ('indptr', 'indices') else self._column(name)
+            digest.update(np.ascontiguousarray(values).tobytes())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def from_networkx(cls, G):
+        """
+        Build the columnar representation from an OSMnx MultiDiGraph
+
+        Edges carrying a 'networks' attribute (see network_filters.add_network_bits)
+        keep it as edge_networks, so network_view() works on the result.
+        """
+        import shapely
+
+        nodes = list(G.nodes)
+        node_index = {node: i for i, node in enumerate(nodes)}
+        node_ids = np.array(nodes, dtype=np.int64)
+        node_x = np.array([G.nodes[n]['x'] for n in nodes], dtype=np.float64)
+        node_y = np.array([G.nodes[n]['y'] for n in nodes], dtype=np.float64)
+
+        edges = list(G.edges(keys=True, data=True))
+        n_edges = len(edges)
+        src = np.fromiter((node_index[u] for u, _, _, _ in edges), dtype=np.int64, count=n_edges)
+        order = np.argsort(src, kind='stable')
+        edges = [edges[i] for i in order]
+        src = src[order]
+
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(nodes)), out=indptr[1:])
+        indices = np.fromiter((node_index[v] for _, v, _, _ in edges), dtype=np.int64, count=n_edges)
+
+        highway_values = [str(_first(d.get('highway'), 'default')) for _, _, _, d in edges]
+        highway_classes = sorted(set(highway_values))
+        highway_code = {h: i for i, h in enumerate(highway_classes)}
+
+        name_values = [_first(d.get('name')) for _, _, _, d in edges]
+        names = sorted({str(n) for n in name_values if n is not None})
+        name_code = {n: i for i, n in enumerate(names)}
+        unnamed = len(names)
+
+        # Straight edges carry no geometry in OSMnx; rebuild them from node coordinates
+        geometries = []
+        for u, v, _, d in edges:
+            geom = d.get('geometry')
+            if geom is None:
+                geom = shapely.LineString([
+                    (G.nodes[u]['x'], G.nodes[u]['y']),
+                    (G.nodes[v]['x'], G.nodes[v]['y'])
+                ])
+            geometries.append(geom)
+        wkb = shapely.to_wkb(np.array(geometries, dtype=object))
+        offsets = np.zeros(n_edges + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in wkb], out=offsets[1:])
+        wkb_bytes = np.frombuffer(b''.join(wkb), dtype=np.uint8)
+
+        arrays = {
+            'node_ids': node_ids,
+            'node_x': node_x,
+            'node_y': node_y,
+            'indptr': indptr,
+            'indices': indices,
+            'edge_key': np.array([k for _, _, k, _ in edges], dtype=np.int32),
+            'edge_length': np.array([float(d.get('length', 0.0)) for _, _, _, d in edges], dtype=np.float64),
+            'edge_highway': np.array([highway_code[h] for h in highway_values], dtype=np.int16),
+            'edge_name': np.array(
+                [unnamed if n is None else name_code[str(n)] for n in name_values], dtype=np.int32
+            ),
+            'edge_osmid': np.array(
+                [int(_first(d.get('osmid'), -1)) for _, _, _, d in edges], dtype=np.int64
+            ),
+            'edge_oneway': np.array([bool(d.get('oneway', False)) for _, _, _, d in edges], dtype=bool),
+            'edge_geometry_offsets': offsets,
+            'edge_geometry_wkb': wkb_bytes,
+        }
+        graph_attrs = {k: v for k, v in G.graph.items() if isinstance(v, (str, int, float, bool))}
+        # Network type bits recorded by network_filters.add_network_bits
+        if n_edges and all('networks' in d for _, _, _, d in edges):
+            arrays['edge_networks'] = np.array([d['networks'] for _, _, _, d in edges], dtype=np.uint8)
+            graph_attrs['network_types'] = list(G.graph['network_types'])
+        return cls(arrays, highway_classes, names, graph_attrs)
+
+    def to_networkx(self):
+        """
+        Materialise an OSMnx-compatible MultiDiGraph from the arrays
+        """
+        import networkx as nx
+
+        G = nx.MultiDiGraph(**self.graph_attrs)
+        G.graph.setdefault('crs', 'epsg:4326')
+
+        node_ids = self.node_ids.tolist()
+        G.add_nodes_from(
+            (node_id, {'x': x, 'y': y})
+            for node_id, x, y in zip(node_ids, self.node_x.tolist(), self.node_y.tolist())
+        )
+
+        src = self.edge_sources()
+        highways = self.highway_labels()
+        names = self.name_labels()
+        geometries = self.geometries()
+        for i in range(self.n_edges):
+            data = {
+                'osmid': int(self.edge_osmid[i]),
+                'highway': highways[i],
+                'oneway': bool(self.edge_oneway[i]),
+                'length': float(self.edge_length[i]),
+                'geometry': geometries[i],
+            }
+            if names[i] is not None:
+                data['name'] = names[i]
+            G.add_edge(node_ids[src[i]], node_ids[self.indices[i]], key=int(self.edge_key[i]), **data)
+        return G
+
+    def save(self, path):
+        """
+        Write the arrays to a cache directory, replacing it atomically
+
+        Args:
+            path (str): Cache directory to write
+        """
+        tmp_path = path + '.tmp'
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+
+        for name in ARRAY_NAMES + OPTIONAL_ARRAY_NAMES:
+            if getattr(self, name) is not None:
+                np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(getattr(self, name)))
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'n_nodes': int(self.n_nodes),
+            'n_edges': int(self.n_edges),
+            'highway_classes': self.highway_classes,
+            'names': self.names,
+            'graph_attrs': self.graph_attrs,
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Load a cache directory written by save()
+
+        Args:
+            path (str): Cache directory to read
+            mmap_mode (str): NumPy memory-map mode, or None to read into RAM
+        """
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported graph cache format: {meta.get('format_version')}")
+
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        for name in OPTIONAL_ARRAY_NAMES:
+            if os.path.exists(os.path.join(path, f"{name}.npy")):
+                arrays[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        return cls(arrays, meta['highway_classes'], meta['names'], meta.get('graph_attrs'))
+
+    def share(self):
+        """
+        Make the graph available to worker processes (see from_shared)
+
+        Returns:
+            tuple: (picklable handle, SharedMemory blocks to close and unlink
+            once the workers are done)
+        """
+        arrays = {name: self._column(name) for name in NODE_COLUMNS + EDGE_COLUMNS}
+        arrays = {name: values for name, values in arrays.items() if values is not None}
+        arrays.update(indptr=self.indptr, indices=self.indices)
+        if self._geometry_source is not None:
+            arrays.update(zip(('source_offsets', 'source_wkb', 'source_edges'), self._geometry_source))
+        else:
+            arrays['edge_geometry_offsets'] = self._edge_geometry_offsets
+            arrays['edge_geometry_wkb'] = self._edge_geometry_wkb
+        spec, blocks = share_arrays(arrays)
+        handle = {
+            'arrays': spec,
+            'highway_classes': self.highway_classes,
+            'names': self.names,
+            'graph_attrs': self.graph_attrs,
+        }
+        return handle, blocks
+
+    @classmethod
+    def from_shared(cls, handle):
+        """
+        Graph over the arrays of a share() handle, in another process
+
+        Returns:
+            tuple: (RoadGraphArrays, SharedMemory blocks to keep alive)
+        """
+        arrays, blocks = attach_arrays(handle['arrays'])
+        geometry_source = None
+        if 'source_wkb' in arrays:
+            geometry_source = (arrays.pop('source_offsets'), arrays.pop('source_wkb'), arrays.pop('source_edges'))
+        graph = cls(arrays, handle['highway_classes'], handle['names'], handle['graph_attrs'],
+                    geometry_source=geometry_source)
+        return graph, blocks
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, 'meta.json'))
+
+
+def directory_size(path):
+    """
+    Total size in bytes of a file or of every file below a directory
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Road Network Query Server
+Serves connectivity statistics, routes and regional GeoJSON over a local HTTP API.
+
+The server process loads the road graph once and hands it to a pool of
+worker processes with RoadGraphArrays.share(): arrays still mapped from the
+graph cache are mapped again by path, derived arrays (such as the drive
+view of a cached 'all' graph) are copied once into shared memory. The
+routing and spatial indexes are loaded or built before the workers start,
+so a worker is ready as soon as it has read them from the cache.
+
+Queries run in the workers, so throughput grows with the number of cores;
+the HTTP threads of the server only parse requests and pass responses on.
+Responses are kept in an in-memory LRU cache keyed by endpoint and query,
+and concurrent identical requests share one computation.
+
+Endpoints (GET, JSON responses):
+- /health: network, fingerprint, workers and cache counters
+- /stats: connectivity statistics (see BangladeshRoadMap.analyze_connectivity)
+- /route?from=lat,lon&to=lat,lon[&weight=time|length]: route between two
+  points or OSM node ids, with its line geometry
+- /region?bbox=west,south,east,north or ?center=lat,lon&radius=metres
+  [&highway=trunk,primary]: roads of a region as a GeoJSON FeatureCollection
+"""
+
+import json
+import os
+import signal
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from road_graph_store import RoadGraphArrays
+
+DEFAULT_PORT = 8000
+DEFAULT_CACHE_SIZE = 256
+ROUTING_WEIGHTS = ('time', 'length')
+# Larger regions are refused; export them with --export-parquet instead
+MAX_REGION_EDGES = 500000
+
+# Worker process state, set by _init_worker
+_analyzer = None
+_shared_blocks = []
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def _dumps(value):
+    return json.dumps(value, default=_json_default).encode('utf-8')
+
+
+def _point(text, name):
+    """
+    (lat, lon) tuple from 'lat,lon', or an OSM node id from a single number
+    """
+    if not text:
+        raise ValueError(f"Missing parameter: {name}")
+    parts = text.split(',')
+    try:
+        if len(parts) == 1:
+            return int(parts[0])
+        if len(parts) == 2:
+            return float(parts[0]), float(parts[1])
+    except ValueError:
+        pass
+    raise ValueError(f"{name} must be 'lat,lon' or an OSM node id")
+
+
+def _floats(text, name, count):
+    try:
+        values = [float(part) for part in text.split(',')]
+    except ValueError:
+        values = []
+    if len(values) != count:
+        raise ValueError(f"{name} must be {count} comma-separated numbers")
+    return values
+
+
+def _init_worker(handle, network_type, data_source, fingerprint, node_index):
+    """
+    Attach a worker process to the shared road graph
+    """
+    global _analyzer, _shared_blocks
+    from bangladesh_road_map import BangladeshRoadMap
+
+    road_arrays, _shared_blocks = RoadGraphArrays.from_shared(handle)
+    analyzer = BangladeshRoadMap()
+    analyzer.network_type = network_type
+    analyzer.data_source = data_source
+    analyzer.road_arrays = road_arrays
+    analyzer._graph_fingerprint = fingerprint
+    analyzer.spatial_index = node_index
+    _analyzer = analyzer
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _ping():
+    return os.getpid()
+
+
+def _stats(query):
+    stats = _analyzer.load_cached_stats() or _analyzer.analyze_connectivity(workers=1)
+    if stats is None:
+        raise RuntimeError("Connectivity analysis failed")
+    return 'application/json', _dumps(stats)
+
+
+def _route(query):
+    weight = query.get('weight', 'time')
+    if weight not in ROUTING_WEIGHTS:
+        raise ValueError(f"weight must be one of {', '.join(ROUTING_WEIGHTS)}")
+    result = _analyzer.route(_point(query.get('from'), 'from'), _point(query.get('to'), 'to'), weight)
+    if result is None:
+        raise LookupError("No route found")
+    road_arrays = _analyzer.get_road_arrays()
+    positions = road_arrays.node_positions(result['node_ids'])
+    coordinates = np.column_stack([np.asarray(road_arrays.node_x)[positions],
+                                   np.asarray(road_arrays.node_y)[positions]])
+    result['geometry'] = {'type': 'LineString', 'coordinates': coordinates}
+    return 'application/json', _dumps(result)
+
+
+def _region(query):
+    from map_stream import iter_road_features
+
+    region = {}
+    if 'bbox' in query:
+        region['bbox'] = _floats(query['bbox'], 'bbox', 4)
+    elif 'center' in query and 'radius' in query:
+        region['center'] = _floats(query['center'], 'center', 2)
+        region['radius'] = _floats(query['radius'], 'radius', 1)[0]
+    else:
+        raise ValueError("Give bbox=west,south,east,north or center=lat,lon&radius=metres")
+    highway = query['highway'].split(',') if query.get('highway') else None
+    subgraph = _analyzer.extract_region(highway=highway, **region)
+    if subgraph is None:
+        raise RuntimeError("Spatial index unavailable")
+    if subgraph.n_edges > MAX_REGION_EDGES:
+        raise ValueError(f"Region has {subgraph.n_edges} edges, more than {MAX_REGION_EDGES}; "
+                         "use a smaller region")
+    features = [feature for _, chunk in iter_road_features(subgraph) for feature in chunk]
+    body = '{"type":"FeatureCollection","features":[' + ','.join(features) + ']}'
+    return 'application/geo+json', body.encode('utf-8')
+
+
+ENDPOINTS = {
+    '/stats': _stats,
+    '/route': _route,
+    '/region': _region,
+}
+
+
+class RoadServer:
+    """
+    Worker pool and response cache answering queries on one road network
+    """
+
+    def __init__(self, analyzer, workers=None, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            analyzer (BangladeshRoadMap): Analyzer with the road network loaded
+            workers (int): Worker processes (default: CPU count)
+            cache_size (int): Responses kept in the cache
+        """
+        self.analyzer = analyzer
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.pool = None
+        self.fingerprint = None
+        self._blocks = []
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """
+        Prepare the indexes, share the graph and start the worker processes
+        """
+        analyzer = self.analyzer
+        road_arrays = analyzer.get_road_arrays()
+        self.fingerprint = analyzer.graph_fingerprint()
+        index = analyzer.get_spatial_index(edges=False)
+        for weight in ROUTING_WEIGHTS:
+            analyzer.build_routing_index(weight)
+
+        handle, self._blocks = road_arrays.share()
+        print(f"Starting {self.workers} workers...")
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker,
+            initargs=(handle, analyzer.network_type, analyzer.data_source, self.fingerprint, index)
+        )
+        # Fail here rather than on the first request if a worker cannot attach
+        self.pool.submit(_ping).result()
+
+    def close(self):
+        """
+        Stop the workers and release the shared memory
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def query(self, path, params):
+        """
+        Answer a query, from the cache when possible
+
+        Args:
+            path (str): Endpoint, e.g. '/route'
+            params (dict): Query parameters
+
+        Returns:
+            tuple: (content type, response body bytes, whether it came from the cache)
+        """
+        handler = ENDPOINTS[path]
+        key = (path, tuple(sorted(params.items())))
+        with self._lock:
+            future = self._cache.get(key)
+            cached = future is not None
+            if cached:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                future = self.pool.submit(handler, params)
+                self._cache[key] = future
+                self.misses += 1
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        try:
+            content_type, body = future.result()
+        except Exception:
+            # Errors are not cached
+            with self._lock:
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+            raise
+        return content_type, body, cached
+
+    def health(self):
+        """
+        Network and cache summary for /health
+        """
+        road_arrays = self.analyzer.get_road_arrays()
+        with self._lock:
+            cached = len(self._cache)
+        return {
+            'network_type': self.analyzer.network_type,
+            'data_source': self.analyzer.data_source,
+            'fingerprint': self.fingerprint,
+            'nodes': road_arrays.n_nodes,
+            'edges': road_arrays.n_edges,
+            'workers': self.workers,
+            'cached_responses': cached,
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+        }
+
+    def serve_forever(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """
+        Start the workers and answer HTTP requests until interrupted
+        """
+        self.start()
+        # Release the shared memory on a plain kill as well as on Ctrl+C
+        signal.signal(signal.SIGTERM, _interrupt)
+        httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+        httpd.daemon_threads = True
+        httpd.road_server = self
+        print(f"Serving the {self.analyzer.network_type} road network on http://{host}:{httpd.server_port} "
+              f"({', '.join(['/health'] + list(ENDPOINTS))})")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping server...")
+        finally:
+            httpd.server_close()
+            self.close()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        road_server = self.server.road_server
+        if url.path == '/health':
+            self._send(200, 'application/json', _dumps(road_server.health()))
+            return
+        if url.path not in ENDPOINTS:
+            self._send(404, 'application/json', _dumps({'error': f"Unknown endpoint: {url.path}"}))
+            return
+        try:
+            content_type, body, cached = road_server.query(url.path, params)
+        except ValueError as e:
+            self._send(400, 'application/json', _dumps({'error': str(e)}))
+        except LookupError as e:
+            self._send(404, 'application/json', _dumps({'error': str(e)}))
+        except Exception as e:
+            self._send(500, 'application/json', _dumps({'error': str(e)}))
+        else:
+            self._send(200, content_type, body, {'X-Cache': 'hit' if cached else 'miss'})
+
+    def _send(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
@@ -4,13 +4,42 @@ Simple Bangladesh Road Map Generator
 A lightweight version that creates an interactive map quickly
 """
 
+import os
 import folium
-import osmnx as ox
-import geopandas as gpd
 from folium import plugins
+from bangladesh_road_map import BangladeshRoadMap
+from gazetteer import Gazetteer
+from regions import MAJOR_ROAD_CLASSES, highway_mask
+from road_graph_store import RoadGraphArrays
 import warnings
 warnings.filterwarnings('ignore')
 
+def load_major_roads(analyzer, center, radius=50000):
+    """
+    Major roads within radius metres of center, cut from the cached national network
+    
+    Falls back to downloading the area when no road network has been cached
+    yet (run bangladesh_road_map.py once to work offline).
+    
+    Args:
+        analyzer (BangladeshRoadMap): Analyzer owning the caches
+        center (list): [lat, lon] of the area
+        radius (float): Radius in metres
+    
+    Returns:
+        RoadGraphArrays: Motorway, trunk and primary roads (with their links)
+    """
+    if analyzer.load_cached_graph():
+        return analyzer.extract_region(center=center, radius=radius, highway=MAJOR_ROAD_CLASSES)
+    
+    import osmnx as ox
+    
+    print("No cached road network found, downloading the area...")
+    area = RoadGraphArrays.from_networkx(
+        ox.graph_from_point(center, dist=radius, network_type='drive')
+    )
+    return area.edge_subgraph(highway_mask(area, MAJOR_ROAD_CLASSES))
+
 def create_simple_bangladesh_map():
     """
     Create a simple interactive map of Bangladesh with major roads and cities
@@ -38,19 +67,14 @@ def create_simple_bangladesh_map():
         attr='Map tiles by <a href="https://carto.com/attributions">CARTO</a>, under <a href="https://creativecommons.org/licenses/by/3.0/">CC BY 3.0</a>. Data by <a href="http://openstreetmap.org">OpenStreetMap</a>, under <a href="http://www.openstreetmap.org/copyright">ODbL</a>.'
     ).add_to(m)
     
-    # Major cities in Bangladesh
-    major_cities = {
-        'Dhaka': [23.8103, 90.4125],
-        'Chittagong': [22.3569, 91.7832],
-        'Sylhet': [24.8949, 91.8687],
-        'Rajshahi': [24.3636, 88.6241],
-        'Khulna': [22.8456, 89.5403],
-        'Barisal': [22.7010, 90.3535],
-        'Rangpur': [25.7439, 89.2752],
-        'Mymensingh': [24.7471, 90.4203],
-        'Comilla': [23.4682, 91.1788],
-        'Narayanganj': [23.6238, 90.4990]
-    }
+    # Major cities in Bangladesh, resolved offline from the gazetteer
+    city_names = [
+        'Dhaka', 'Chittagong', 'Sylhet', 'Rajshahi', 'Khulna',
+        'Barisal', 'Rangpur', 'Mymensingh', 'Comilla', 'Narayanganj'
+    ]
+    gazetteer = Gazetteer(os.path.join("data_cache", "gazetteer.sqlite"))
+    major_cities = gazetteer.lookup_many(city_names)
+    gazetteer.close()
     
     # Add major cities
     print("Adding major cities...")
@@ -66,27 +90,12 @@ def create_simple_bangladesh_map():
     
     cities_group.add_to(m)
     
-    # Try to add some major highways (simplified approach)
+    analyzer = BangladeshRoadMap()
+    
+    # Major highways around Dhaka (smaller area for performance)
     print("Adding major highways...")
     try:
-        # Get major highways around Dhaka (smaller area for performance)
-        dhaka_area = ox.graph_from_point(
-            bangladesh_center, 
-            dist=50000,  # 50km radius
-            network_type='drive'
-        )
-        
-        # Convert to GeoDataFrame
-        _, edges_gdf = ox.graph_to_gdfs(dhaka_area)
-        
-        # Filter for major roads only
-        major_roads = edges_gdf[
-            edges_gdf['highway'].astype(str).str.contains(
-                'motorway|trunk|primary', 
-                case=False, 
-                na=False
-            )
-        ]
+        major_roads = load_major_roads(analyzer, bangladesh_center, radius=50000).to_geodataframe()
         
         print(f"Adding {len(major_roads)} major road segments...")
         
@@ -130,11 +139,13 @@ def create_simple_bangladesh_map():
     # Add Bangladesh boundary (simplified)
     print("Adding country boundary...")
     try:
-        # Get Bangladesh boundary
-        bangladesh = ox.geocode_to_gdf('Bangladesh')
+        # Cached Bangladesh boundary (downloaded once if missing)
+        if not analyzer.download_districts():
+            raise RuntimeError("no boundary available")
+        import shapely
         
         folium.GeoJson(
-            bangladesh.geometry.iloc[0],
+            shapely.union_all(analyzer.districts_gdf.geometry.values),
             style_function=lambda x: {
                 'fillColor': 'transparent',
                 'color': 'blue',
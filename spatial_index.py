@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Spatial Index
+Bulk snapping of points onto the cached road network.
+
+Coordinates are projected to a local equirectangular plane in metres
+(centred on the network), which is accurate to a few percent over
+Bangladesh and keeps nearest-neighbour order intact. Nodes go into a SciPy
+cKDTree and edge geometries into a shapely STRtree; both are queried with
+whole NumPy arrays, so a million points snap in seconds. The index is
+pickled into the graph cache directory together with the fingerprint of the
+arrays it was built from, and is dropped whenever the graph is re-saved.
+
+The edge tree is only built for callers that snap to edges, and is stored
+as WKB in a file of its own next to the pickle, so loading the index for
+node snapping never reads the edge geometries.
+"""
+
+import os
+import pickle
+
+import numpy as np
+
+from pbf_ingest import EARTH_RADIUS_M, great_circle_distance
+
+INDEX_FILE = "spatial_index.pkl"
+
+
+class SpatialIndex:
+    def __init__(self, lon0, lat0, node_x, node_y, node_tree, edge_tree=None, fingerprint=None):
+        """
+        Args:
+            lon0 (float): Longitude of the projection origin
+            lat0 (float): Latitude of the projection origin
+            node_x (ndarray): Node longitudes
+            node_y (ndarray): Node latitudes
+            node_tree (cKDTree): Tree over projected node coordinates
+            edge_tree (STRtree): Tree over projected edge geometries
+            fingerprint (str): Fingerprint of the graph the index was built for
+        """
+        self.lon0 = lon0
+        self.lat0 = lat0
+        self.node_x = node_x
+        self.node_y = node_y
+        self.node_tree = node_tree
+        self._edge_tree = edge_tree
+        self._edge_wkb = None
+        self._edge_file = None
+        self.fingerprint = fingerprint
+
+    @property
+    def has_edges(self):
+        """
+        Whether the index can snap to edges, without rebuilding a stored edge tree
+        """
+        return (self._edge_tree is not None or self._edge_wkb is not None
+                or (self._edge_file is not None and os.path.exists(self._edge_file)))
+
+    @property
+    def edge_tree(self):
+        """
+        STRtree over the projected edge geometries, rebuilt on first use after loading
+        """
+        if self._edge_tree is None and self._edge_wkb is None and self.has_edges:
+            with np.load(self._edge_file) as data:
+                self._edge_wkb = (data['offsets'], data['wkb'].tobytes())
+        if self._edge_tree is None and self._edge_wkb is not None:
+            import shapely
+            from shapely.strtree import STRtree
+
+            offsets, buffer = self._edge_wkb
+            self._edge_tree = STRtree(shapely.from_wkb(
+                [buffer[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+            ))
+            self._edge_wkb = None
+        return self._edge_tree
+
+    @edge_tree.setter
+    def edge_tree(self, tree):
+        self._edge_tree = tree
+        self._edge_wkb = None
+        self._edge_file = None
+
+    def _edge_wkb_arrays(self):
+        """
+        (offsets, WKB bytes) of the projected edge geometries, or None without an edge tree
+        """
+        if self._edge_wkb is not None:
+            return self._edge_wkb
+        tree = self.edge_tree
+        if tree is None:
+            return None
+        import shapely
+
+        wkb = shapely.to_wkb(tree.geometries)
+        offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, wkb), dtype=np.int64, count=len(wkb)), out=offsets[1:])
+        return offsets, b''.join(wkb)
+
+    def __getstate__(self):
+        # The pickle only holds the node part; save() writes the edge tree to
+        # its own file, since an STRtree pickles geometry by geometry
+        state = self.__dict__.copy()
+        state['_edge_tree'] = None
+        state['_edge_wkb'] = None
+        state['_edge_file'] = None
+        return state
+
+    @classmethod
+    def build(cls, road_arrays, edges=True, fingerprint=None):
+        """
+        Index the nodes (and optionally the edge geometries) of a road network
+
+        Args:
+            road_arrays (RoadGraphArrays): Road network
+            edges (bool): Also build the edge tree needed by nearest_edges
+            fingerprint (str): Graph fingerprint stored with the index
+        """
+        from scipy.spatial import cKDTree
+
+        node_x = np.array(road_arrays.node_x, dtype=np.float64)
+        node_y = np.array(road_arrays.node_y, dtype=np.float64)
+        lon0 = float(node_x.mean()) if len(node_x) else 0.0
+        lat0 = float(node_y.mean()) if len(node_y) else 0.0
+        index = cls(lon0, lat0, node_x, node_y, None, fingerprint=fingerprint)
+        index.node_tree = cKDTree(np.column_stack(index.project(node_x, node_y)))
+        if edges:
+            index.add_edges(road_arrays)
+        return index
+
+    def add_edges(self, road_arrays):
+        """
+        Build the edge tree needed by nearest_edges for an index built without it
+
+        Args:
+            road_arrays (RoadGraphArrays): The road network the index was built from
+        """
+        import shapely
+        from shapely.strtree import STRtree
+
+        projected = shapely.transform(
+            road_arrays.geometries(), lambda coords: np.column_stack(self.project(coords[:, 0], coords[:, 1]))
+        )
+        self.edge_tree = STRtree(projected)
+
+    def project(self, lons, lats):
+        """
+        Local equirectangular x/y in metres
+        """
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        scale = np.pi / 180 * EARTH_RADIUS_M
+        return (lons - self.lon0) * scale * np.cos(np.radians(self.lat0)), (lats - self.lat0) * scale
+
+    def nearest_nodes(self, lons, lats, max_distance=None, workers=-1):
+        """
+        Nearest node to each point
+
+        Args:
+            lons (array-like): Point longitudes
+            lats (array-like): Point latitudes
+            max_distance (float): Leave points further than this (metres) unsnapped
+            workers (int): Query threads (-1 uses all cores)
+
+        Returns:
+            tuple: (node positions, great-circle distances in metres); points
+            without a node within max_distance get position -1 and distance inf
+        """
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        _, positions = self.node_tree.query(
+            np.column_stack(self.project(lons, lats)), k=1,
+            distance_upper_bound=np.inf if max_distance is None else max_distance * 1.05,
+            workers=workers
+        )
+        positions = np.asarray(positions, dtype=np.int64)
+        found = positions < len(self.node_x)
+        positions[~found] = -1
+
+        distances = np.full(len(lons), np.inf)
+        distances[found] = great_circle_distance(lons[found], lats[found],
+                                                 self.node_x[positions[found]], self.node_y[positions[found]])
+        if max_distance is not None:
+            too_far = distances > max_distance
+            positions[too_far] = -1
+            distances[too_far] = np.inf
+        return positions, distances
+
+    def nodes_within_bounds(self, west, south, east, north):
+        """
+        Positions of the nodes inside a lon/lat box, in ascending order
+
+        The projection is linear in each axis, so the box is a rectangle in
+        the projected plane; a Chebyshev ball query covers it and the
+        candidates are then cut to the exact box.
+        """
+        (x0, x1), (y0, y1) = self.project([west, east], [south, north])
+        half_size = max(x1 - x0, y1 - y0) / 2
+        candidates = np.asarray(self.node_tree.query_ball_point(
+            [(x0 + x1) / 2, (y0 + y1) / 2], half_size * 1.0001, p=np.inf
+        ), dtype=np.int64)
+        x = self.node_x[candidates]
+        y = self.node_y[candidates]
+        inside = (x >= west) & (x <= east) & (y >= south) & (y <= north)
+        return np.sort(candidates[inside])
+
+    def nodes_within_radius(self, lon, lat, radius):
+        """
+        Positions of the nodes within radius metres (great-circle) of a point, in ascending order
+        """
+        x, y = self.project(lon, lat)
+        candidates = np.asarray(self.node_tree.query_ball_point([float(x), float(y)], radius * 1.05),
+                                dtype=np.int64)
+        distances = great_circle_distance(lon, lat, self.node_x[candidates], self.node_y[candidates])
+        return np.sort(candidates[distances <= radius])
+
+    def nodes_within_polygon(self, polygon):
+        """
+        Positions of the nodes inside (or on the boundary of) a lon/lat polygon, in ascending order
+        """
+        import shapely
+
+        candidates = self.nodes_within_bounds(*shapely.bounds(polygon))
+        inside = shapely.intersects_xy(polygon, self.node_x[candidates], self.node_y[candidates])
+        return candidates[inside]
+
+    def nearest_edges(self, lons, lats, max_distance=None, chunk_size=100000):
+        """
+        Nearest edge to each point and where along it the point projects
+
+        Args:
+            lons (array-like): Point longitudes
+            lats (array-like): Point latitudes
+            max_distance (float): Leave points further than this (metres) unsnapped
+            chunk_size (int): Points queried at once
+
+        Returns:
+            tuple: (edge indices, offsets in metres from the edge start,
+            distances in metres); unsnapped points get edge -1 and NaN/inf
+        """
+        import shapely
+
+        if self.edge_tree is None:
+            raise ValueError("Spatial index was built without edges")
+
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        edges = np.full(len(lons), -1, dtype=np.int64)
+        offsets = np.full(len(lons), np.nan)
+        distances = np.full(len(lons), np.inf)
+        geometries = self.edge_tree.geometries
+
+        for start in range(0, len(lons), chunk_size):
+            points = shapely.points(np.column_stack(
+                self.project(lons[start:start + chunk_size], lats[start:start + chunk_size])
+            ))
+            (point_idx, edge_idx), dist = self.edge_tree.query_nearest(
+                points, max_distance=max_distance, return_distance=True, all_matches=False
+            )
+            target = start + point_idx
+            edges[target] = edge_idx
+            distances[target] = dist
+            offsets[target] = shapely.line_locate_point(geometries[edge_idx], points[point_idx])
+        return edges, offsets, distances
+
+    def save(self, path):
+        """
+        Pickle the index, with the edge tree (if any) as WKB in edge_path(path)
+        """
+        edge_file = edge_path(path)
+        edge_wkb = self._edge_wkb_arrays()
+        if edge_wkb is not None:
+            offsets, wkb = edge_wkb
+            with open(edge_file, 'wb') as f:
+                np.savez(f, offsets=offsets, wkb=np.frombuffer(wkb, dtype=np.uint8))
+        elif os.path.exists(edge_file):
+            os.remove(edge_file)
+        with open(path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+        """
+        Load a pickled index; its edge tree is read from edge_path(path) on first use
+        """
+        with open(path, 'rb') as f:
+            index = pickle.load(f)
+        if index._edge_tree is None and index._edge_wkb is None:
+            index._edge_file = edge_path(path)
+        return index
+
+
+def index_path(graph_cache_dir, network_type=None):
+    """
+    Location of the spatial index inside a graph cache directory; network
+    types sharing a cached graph each get their own index file
+    """
+    if network_type is None:
+        return os.path.join(graph_cache_dir, INDEX_FILE)
+    stem, ext = os.path.splitext(INDEX_FILE)
+    return os.path.join(graph_cache_dir, f"{stem}_{network_type}{ext}")
+
+
+def edge_path(path):
+    """
+    Location of the edge tree file of a spatial index file
+    """
+    return os.path.splitext(path)[0] + "_edges.npz"
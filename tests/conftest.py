@@ -0,0 +1,8 @@
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules live at the top level of the repository, benchmark helpers in benchmarks/
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(1, os.path.join(REPO_DIR, 'benchmarks'))
@@ -0,0 +1,167 @@
+"""
+AsyncAcquirer against a local stand-in for the Nominatim search API
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from acquisition import AsyncAcquirer, RetryableError
+
+
+class StandIn(ThreadingHTTPServer):
+    """
+    Answers every query with the queued (status, headers) failures first, then a result
+    """
+
+    def __init__(self, failures=(), delay=0.0):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.failures = list(failures)
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/search"
+
+    def starts(self):
+        return [start for start, _ in self.requests]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((time.monotonic(), parse_qs(urlsplit(self.path).query)['q'][0]))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            failure = server.failures.pop(0) if server.failures else None
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+        if failure is not None:
+            status, headers = failure
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps([{'lat': '23.8103', 'lon': '90.4125'}]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(failures=(), delay=0.0):
+        server = StandIn(failures, delay)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def geocode(acquirer, places):
+    return acquirer.run(lambda a: {place: a.geocode(place) for place in places})
+
+
+def test_retry_after_is_honoured(stand_in):
+    server = stand_in([(429, {'Retry-After': '1'})])
+    acquirer = AsyncAcquirer(nominatim_url=server.url, backoff=0.01,
+                             service_limits={'nominatim': (1, 0.0)})
+
+    assert geocode(acquirer, ['Dhaka']) == {'Dhaka': (23.8103, 90.4125)}
+    starts = server.starts()
+    assert len(starts) == 2
+    assert starts[1] - starts[0] >= 0.95
+
+
+def test_backoff_doubles_with_jitter(stand_in):
+    server = stand_in([(503, {}), (503, {}), (503, {})])
+    acquirer = AsyncAcquirer(nominatim_url=server.url, retries=3, backoff=0.2,
+                             service_limits={'nominatim': (1, 0.0)})
+
+    assert geocode(acquirer, ['Dhaka']) == {'Dhaka': (23.8103, 90.4125)}
+    starts = server.starts()
+    assert len(starts) == 4
+    delays = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    # Delay of retry n is drawn from [backoff * 2**n / 2, backoff * 2**n]
+    for attempt, delay in enumerate(delays):
+        assert 0.2 * 2 ** attempt * 0.5 - 0.02 <= delay <= 0.2 * 2 ** attempt + 0.25
+
+
+def test_gives_up_after_retries(stand_in):
+    server = stand_in([(429, {'Retry-After': '0'})] * 3)
+    acquirer = AsyncAcquirer(nominatim_url=server.url, retries=2, backoff=0.01,
+                             service_limits={'nominatim': (1, 0.0)})
+
+    result = geocode(acquirer, ['Dhaka'])
+    assert isinstance(result['Dhaka'], RetryableError)
+    assert len(server.requests) == 3
+
+
+def test_client_errors_are_not_retried(stand_in):
+    server = stand_in([(404, {})])
+    acquirer = AsyncAcquirer(nominatim_url=server.url, backoff=0.01,
+                             service_limits={'nominatim': (1, 0.0)})
+
+    result = geocode(acquirer, ['Dhaka'])
+    assert not isinstance(result['Dhaka'], RetryableError)
+    assert len(server.requests) == 1
+
+
+def test_nominatim_rate_limit(stand_in):
+    server = stand_in(delay=0.05)
+    acquirer = AsyncAcquirer(nominatim_url=server.url, service_limits={'nominatim': (1, 0.3)})
+
+    places = ['Dhaka', 'Chittagong', 'Sylhet', 'Khulna']
+    found = acquirer.run(lambda a: {'found': a.geocode_many(places)})['found']
+    assert sorted(found) == sorted(places)
+    starts = server.starts()
+    assert len(starts) == len(places)
+    assert server.max_in_flight == 1
+    assert all(later - earlier >= 0.29 for earlier, later in zip(starts, starts[1:]))
+
+
+def test_default_policy_drops_non_transient_errors():
+    calls = {'value': 0, 'connection': 0}
+
+    def value_error():
+        calls['value'] += 1
+        raise ValueError("bad input")
+
+    def connection_error():
+        calls['connection'] += 1
+        if calls['connection'] < 3:
+            raise ConnectionResetError("reset by peer")
+        return 'ok'
+
+    acquirer = AsyncAcquirer(retries=3, backoff=0.01)
+    results = acquirer.run(lambda a: {
+        'value': a.call('local', value_error),
+        'connection': a.call('local', connection_error),
+    })
+    assert isinstance(results['value'], ValueError)
+    assert calls['value'] == 1
+    assert results['connection'] == 'ok'
+    assert calls['connection'] == 3
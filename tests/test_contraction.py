@@ -0,0 +1,41 @@
+"""
+Contraction hierarchy queries must match Dijkstra on the full graph
+"""
+
+import numpy as np
+import pytest
+
+from contraction import ContractionHierarchy
+from routing import edge_travel_times, weighted_csr
+from synthetic_graphs import synthetic_road_arrays
+
+
+@pytest.fixture(scope='module')
+def road_arrays():
+    return synthetic_road_arrays(20)
+
+
+@pytest.mark.parametrize('weight', ['time', 'length'])
+def test_queries_match_dijkstra(road_arrays, weight, tmp_path):
+    from scipy.sparse.csgraph import dijkstra
+
+    costs = edge_travel_times(road_arrays) if weight == 'time' else np.asarray(road_arrays.edge_length)
+    costs = np.maximum(costs, 1e-3)
+    index = ContractionHierarchy.build(
+        road_arrays.n_nodes, road_arrays.edge_sources(), road_arrays.indices, costs
+    )
+    index.save(tmp_path / 'ch.npz')
+    index = ContractionHierarchy.load(tmp_path / 'ch.npz')
+
+    matrix = weighted_csr(road_arrays, costs)
+    pairs = np.random.default_rng(0).integers(0, road_arrays.n_nodes, size=(50, 2))
+    expected = dijkstra(matrix, indices=pairs[:, 0])[np.arange(len(pairs)), pairs[:, 1]]
+    for (source, target), cost in zip(pairs.tolist(), expected):
+        assert index.distance(source, target) == pytest.approx(cost)
+        path_cost, nodes = index.path(source, target)
+        assert path_cost == pytest.approx(cost)
+        if np.isinf(cost):
+            assert nodes == []
+            continue
+        assert nodes[0] == source and nodes[-1] == target
+        assert sum(matrix[u, v] for u, v in zip(nodes[:-1], nodes[1:])) == pytest.approx(cost)
@@ -0,0 +1,30 @@
+"""
+The local network filters must match the Overpass filters of the installed OSMnx
+"""
+
+import re
+
+import pytest
+
+from network_filters import NETWORK_FILTERS, NETWORK_TYPES, network_bits, way_matches
+
+EXCLUSION = re.compile(r'\["([^"]+)"!~"([^"]+)"\]')
+
+
+@pytest.mark.parametrize('network_type', NETWORK_TYPES)
+def test_filters_match_osmnx(network_type):
+    overpass = pytest.importorskip('osmnx._overpass')
+    way_filter = overpass._get_network_filter(network_type)
+    assert dict(EXCLUSION.findall(way_filter)) == NETWORK_FILTERS[network_type]
+
+
+def test_separate_sidewalks_are_left_out_of_walk():
+    tags = {'highway': 'primary', 'sidewalk:left': 'separate'}
+    assert not way_matches(tags, 'walk')
+    assert way_matches(tags, 'drive') and way_matches(tags, 'bike')
+
+
+def test_rest_areas_are_left_out_of_every_network():
+    assert network_bits({'highway': 'rest_area'}) == 0
+    assert network_bits({'highway': 'services'}) == 0
+    assert network_bits({'highway': 'residential'}) == 0b1111
@@ -0,0 +1,18 @@
+"""
+The lightweight CLI commands must not import the geospatial stack
+"""
+
+import os
+
+import pytest
+
+from check_startup import LIGHT_COMMANDS, heavy_imports
+
+
+@pytest.mark.parametrize('args', LIGHT_COMMANDS)
+def test_light_commands_skip_heavy_imports(args, tmp_path):
+    # A cache directory with something in it, so the commands have work to do
+    os.makedirs(tmp_path / 'data_cache' / 'results')
+    (tmp_path / 'data_cache' / 'results' / 'stale.json').write_text('{}')
+
+    assert heavy_imports(args, tmp_path) == []
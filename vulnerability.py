@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Road Network Vulnerability
+Bridges, articulation points and incremental evaluation of link removals.
+
+Bridges and articulation points come from a single depth-first search over
+the simple undirected road graph (SciPy's depth_first_order from a virtual
+root joined to every component) and Tarjan's low-link values, so they take
+linear time. Removing a bridge splits off the DFS subtree below it.
+
+Removal scenarios, e.g. one road link or every link in a flooded area, are
+evaluated incrementally instead of relabelling the whole network:
+
+- Connectivity: breadth-first searches start from every endpoint of the
+  removed links at once. The smallest search always grows next, and
+  searches that meet are merged. A search that runs out of nodes while
+  another search in its component is still growing is a piece cut off by
+  the scenario, so the work is bounded by the size of the pieces rather
+  than the size of the network.
+- Travel times between cities reuse the baseline shortest-path trees. A
+  removal can only lengthen the city pairs whose tree path uses a removed
+  link, so Dijkstra is only rerun from the origins of those pairs.
+
+Scenarios are split across a ProcessPoolExecutor.
+"""
+
+import heapq
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+_WORKER_STATE = None
+
+
+def link_codes(n_nodes, a, b):
+    """
+    Code of every undirected link (a, b) between node positions, independent of direction
+    """
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    return np.minimum(a, b) * n_nodes + np.maximum(a, b)
+
+
+def bridges_and_articulation_points(indptr, indices):
+    """
+    Bridges and articulation points of a simple undirected graph in linear time
+
+    Args:
+        indptr (ndarray): CSR row pointers of the symmetric adjacency
+        indices (ndarray): CSR column indices (see RoadGraphArrays.undirected_csr)
+
+    Returns:
+        dict: bridges ((k, 2) parent/child node positions, the child side is
+        the DFS subtree), bridge_cut_nodes (nodes on the smaller side of each
+        bridge), articulation_points (node positions) and component labels
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components, depth_first_order
+
+    indptr = np.asarray(indptr, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+    n = len(indptr) - 1
+    graph = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+
+    # Virtual root n joined to the first node of every component
+    _, roots = np.unique(labels, return_index=True)
+    extended = csr_matrix(
+        (np.ones(len(indices) + len(roots), dtype=np.int8),
+         np.concatenate([indices, roots]), np.append(indptr, indptr[-1] + len(roots))),
+        shape=(n + 1, n + 1)
+    )
+    order, parent = depth_first_order(extended, n, directed=True, return_predecessors=True)
+    order = order[1:]
+    parent = parent[:n].astype(np.int64)
+    pre = np.empty(n, dtype=np.int64)
+    pre[order] = np.arange(n)
+
+    # Lowest preorder reachable through one non-tree edge
+    low = pre.copy()
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    values = np.where(indices != parent[rows], pre[indices], n)
+    nonempty = np.flatnonzero(np.diff(indptr))
+    if len(nonempty):
+        low[nonempty] = np.minimum(low[nonempty], np.minimum.reduceat(values, indptr[nonempty]))
+
+    # Subtree sizes and low-link values, children before parents
+    low_list = low.tolist()
+    parent_list = parent.tolist()
+    size = [1] * n
+    for v in reversed(order.tolist()):
+        p = parent_list[v]
+        if p == n:
+            continue
+        size[p] += size[v]
+        if low_list[v] < low_list[p]:
+            low_list[p] = low_list[v]
+    low = np.array(low_list, dtype=np.int64)
+    size = np.array(size, dtype=np.int64)
+
+    child = np.flatnonzero(parent != n)
+    above = parent[child]
+    is_bridge = low[child] > pre[above]
+    bridges = np.column_stack([above[is_bridge], child[is_bridge]])
+    subtree = size[child[is_bridge]]
+    component_size = np.bincount(labels)[labels[child[is_bridge]]]
+
+    is_root = parent == n
+    separates = (low[child] >= pre[above]) & ~is_root[above]
+    n_children = np.bincount(above, minlength=n)
+    articulation = np.union1d(above[separates], np.flatnonzero(is_root & (n_children >= 2)))
+    return {
+        'bridges': bridges,
+        'bridge_cut_nodes': np.minimum(subtree, component_size - subtree),
+        'articulation_points': articulation,
+        'labels': labels,
+    }
+
+
+def city_path_links(matrix, city_nodes):
+    """
+    Baseline travel times between cities and the links on their shortest paths
+
+    Args:
+        matrix (csr_matrix): Directed travel times (see routing.weighted_csr)
+        city_nodes (array-like): City node positions
+
+    Returns:
+        tuple: (k x k travel times in seconds, dict link code -> list of
+        (origin, target) city index pairs whose path uses the link)
+    """
+    from scipy.sparse.csgraph import dijkstra
+
+    city_nodes = np.asarray(city_nodes, dtype=np.int64)
+    n = matrix.shape[0]
+    times, predecessors = dijkstra(matrix, directed=True, indices=city_nodes, return_predecessors=True)
+    base = times[:, city_nodes]
+    path_pairs = {}
+    for i, origin in enumerate(city_nodes.tolist()):
+        for j, target in enumerate(city_nodes.tolist()):
+            if i == j or not np.isfinite(base[i, j]):
+                continue
+            v = target
+            while v != origin:
+                u = int(predecessors[i, v])
+                path_pairs.setdefault(min(u, v) * n + max(u, v), []).append((i, j))
+                v = u
+    return base, path_pairs
+
+
+def _init_worker(indptr, indices, labels, matrix, hq_nodes, city_nodes, base_times, path_pairs):
+    global _WORKER_STATE
+    n = matrix.shape[0]
+    _WORKER_STATE = {
+        'indptr': indptr.tolist(),
+        'indices': indices.tolist(),
+        'labels': labels.tolist(),
+        'matrix': matrix,
+        # Sorted (row, column) key of every stored matrix entry
+        'entry_keys': np.repeat(np.arange(n, dtype=np.int64), np.diff(matrix.indptr)) * n + matrix.indices,
+        'hq_nodes': hq_nodes.tolist(),
+        'city_nodes': city_nodes,
+        'base_times': base_times,
+        'path_pairs': path_pairs,
+    }
+
+
+def _cut_pieces(links):
+    """
+    Pieces split off their component when the links are removed
+
+    Returns:
+        tuple: (nodes in the pieces, number of pieces, node -> search id
+        mapping, find function, set of search ids that are pieces)
+    """
+    state = _WORKER_STATE
+    indptr, indices, labels = state['indptr'], state['indices'], state['labels']
+    n = len(indptr) - 1
+    removed = set()
+    for a, b in links:
+        removed.add(a * n + b)
+        removed.add(b * n + a)
+
+    owner = {}
+    parent, frontiers, sizes, components = [], [], [], []
+    active = {}
+    heap = []
+    for start in (node for link in links for node in link):
+        if start in owner:
+            continue
+        g = len(parent)
+        owner[start] = g
+        parent.append(g)
+        frontiers.append(deque([start]))
+        sizes.append(1)
+        components.append(labels[start])
+        active[labels[start]] = active.get(labels[start], 0) + 1
+        heap.append((1, g))
+    heapq.heapify(heap)
+
+    def find(g):
+        while parent[g] != g:
+            parent[g] = parent[parent[g]]
+            g = parent[g]
+        return g
+
+    pieces = set()
+    while heap:
+        size, g = heapq.heappop(heap)
+        if parent[g] != g or size != sizes[g] or not frontiers[g]:
+            continue
+        # The last growing search of a component holds everything not cut off
+        if active[components[g]] <= 1:
+            continue
+        u = frontiers[g].popleft()
+        for w in indices[indptr[u]:indptr[u + 1]]:
+            if u * n + w in removed:
+                continue
+            h = owner.get(w)
+            if h is None:
+                owner[w] = g
+                frontiers[g].append(w)
+                sizes[g] += 1
+                continue
+            h = find(h)
+            if h != g:
+                if len(frontiers[h]) > len(frontiers[g]):
+                    g, h = h, g
+                parent[h] = g
+                sizes[g] += sizes[h]
+                frontiers[g].extend(frontiers[h])
+                frontiers[h] = deque()
+                active[components[g]] -= 1
+        if frontiers[g]:
+            heapq.heappush(heap, (sizes[g], g))
+        else:
+            pieces.add(g)
+            active[components[g]] -= 1
+    return sum(sizes[g] for g in pieces), len(pieces), owner, find, pieces
+
+
+def _evaluate(links):
+    """
+    Connectivity and city travel time impact of removing a set of links
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+
+    state = _WORKER_STATE
+    n = len(state['indptr']) - 1
+    links = [(int(a), int(b)) for a, b in links]
+    cut_nodes, n_pieces, owner, find, pieces = _cut_pieces(links)
+    hqs_cut = sum(1 for node in state['hq_nodes'] if node in owner and find(owner[node]) in pieces)
+
+    base = state['base_times']
+    times = base.copy()
+    origins = sorted({i for a, b in links for i, _ in state['path_pairs'].get(min(a, b) * n + max(a, b), ())})
+    if origins:
+        matrix = state['matrix']
+        a, b = np.array(links, dtype=np.int64).T
+        keys = np.concatenate([a * n + b, b * n + a])
+        positions = np.minimum(np.searchsorted(state['entry_keys'], keys), len(matrix.data) - 1)
+        data = matrix.data.copy()
+        data[positions[state['entry_keys'][positions] == keys]] = np.inf
+        modified = csr_matrix((data, matrix.indices, matrix.indptr), shape=matrix.shape)
+        times[origins] = dijkstra(modified, directed=True,
+                                  indices=state['city_nodes'][origins])[:, state['city_nodes']]
+
+    connected = np.isfinite(base)
+    lost = connected & ~np.isfinite(times)
+    still = connected & ~lost
+    delay = np.zeros_like(base)
+    delay[still] = np.maximum(times[still] - base[still], 0)
+    return {
+        'links_removed': len(links),
+        'nodes_cut_off': int(cut_nodes),
+        'pieces': int(n_pieces),
+        'hqs_cut_off': int(hqs_cut),
+        'city_pairs_disconnected': int(np.triu(lost | lost.T, 1).sum()),
+        'added_travel_min': float(delay.sum() / 60),
+        'max_added_travel_min': float(delay.max() / 60) if delay.size else 0.0,
+    }
+
+
+def evaluate_scenarios(indptr, indices, labels, matrix, scenarios, hq_nodes, city_nodes,
+                       base_times=None, path_pairs=None, workers=None):
+    """
+    Impact of every removal scenario, in parallel across scenarios
+
+    Args:
+        indptr, indices (ndarray): Simple undirected CSR adjacency
+        labels (ndarray): Component label of every node
+        matrix (csr_matrix): Directed travel times (see routing.weighted_csr)
+        scenarios (list): (k, 2) arrays of removed links as node position pairs
+        hq_nodes (array-like): Node positions whose loss of connection is counted
+        city_nodes (array-like): Node positions of the cities for travel times
+        base_times, path_pairs: city_path_links output (computed if missing)
+        workers (int): Worker processes (default: CPU count, 1 runs in-process)
+
+    Returns:
+        list: One dict per scenario with links_removed, nodes_cut_off, pieces,
+        hqs_cut_off, city_pairs_disconnected, added_travel_min and
+        max_added_travel_min
+    """
+    matrix = matrix.tocsr()
+    matrix.sort_indices()
+    city_nodes = np.asarray(city_nodes, dtype=np.int64)
+    if base_times is None or path_pairs is None:
+        base_times, path_pairs = city_path_links(matrix, city_nodes)
+    initargs = (np.asarray(indptr), np.asarray(indices), np.asarray(labels), matrix,
+                np.asarray(hq_nodes, dtype=np.int64), city_nodes, base_times, path_pairs)
+    scenarios = [np.asarray(links, dtype=np.int64).reshape(-1, 2).tolist() for links in scenarios]
+
+    workers = min(workers or os.cpu_count() or 1, len(scenarios))
+    if workers <= 1:
+        _init_worker(*initargs)
+        return [_evaluate(links) for links in scenarios]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        return list(pool.map(_evaluate, scenarios,
+                             chunksize=max(1, math.ceil(len(scenarios) / (4 * workers)))))